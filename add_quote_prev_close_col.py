@@ -0,0 +1,14 @@
+from app.database import engine
+from sqlalchemy import text
+
+def add_previous_close_column():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE price_quotes ADD COLUMN previous_close FLOAT"))
+            conn.commit()
+            print("Successfully added previous_close column to price_quotes table.")
+        except Exception as e:
+            print(f"Error (might already exist): {e}")
+
+if __name__ == "__main__":
+    add_previous_close_column()
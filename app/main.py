@@ -59,7 +59,7 @@ def health_check():
     return {"status": "healthy"}
 
 # Import and include routers
-from app.routers import net_worth, holdings, goals, cashflow, analytics, crypto
+from app.routers import net_worth, holdings, goals, cashflow, analytics, crypto, prices
 
 app.include_router(net_worth.router)
 app.include_router(holdings.router)
@@ -67,22 +67,23 @@ app.include_router(goals.router)
 app.include_router(cashflow.router)
 app.include_router(analytics.router)
 app.include_router(crypto.router)
+app.include_router(prices.router)
 
 import asyncio
 from datetime import datetime
 from app.database import SessionLocal
-from app.services.analytics_service import AnalyticsService
+from app.services.scheduler_service import SchedulerService
 import logging
 import sys
 
-# Configure Logging to both file and console
+# Configure Logging to both file and console (console only under tests, so test runs stay out of scheduler.log)
+log_handlers = [logging.StreamHandler(sys.stdout)]
+if settings.ENVIRONMENT != "testing":
+    log_handlers.insert(0, logging.FileHandler("scheduler.log"))
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("scheduler.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=log_handlers
 )
 logger = logging.getLogger(__name__)
 
@@ -122,45 +123,18 @@ async def run_scheduler():
             
             db = SessionLocal()
             try:
-                # 1. Update all prices first so the snapshot is accurate
-                from app.services.holdings_service import HoldingsService
-                holdings_service = HoldingsService(db, user_id=1)
-                
-                logger.info("Scheduler: Refreshing prices...")
-                # Add timeout to prevent hanging (Increased to 300s)
-                await asyncio.wait_for(holdings_service.update_all_prices_async(), timeout=300)
-                
-                # Auto-sync Trading212 if credentials exist
-                try:
-                    creds = holdings_service.get_trading212_credentials()
-                    if creds:
-                        logger.info("Scheduler: Auto-syncing Trading212...")
-                        # Add timeout to prevent hanging (Increased to 300s)
-                        await asyncio.wait_for(
-                            holdings_service.sync_trading212_investments(creds['api_key_id'], creds['api_secret_key']),
-                            timeout=300
-                        )
-                        logger.info("Scheduler: Trading212 sync completed successfully")
-                    else:
-                        logger.debug("Scheduler: Skipped T212 sync (no credentials configured)")
-                except asyncio.TimeoutError:
-                    logger.error("Scheduler: Trading212 sync timed out")
-                except Exception as e:
-                    logger.error(f"Scheduler: Auto-sync failed: {e}")
+                # Prices, T212 sync, then the snapshot with fresh prices
+                result = await SchedulerService(db, user_id=1).run_tick()
+                if result["prices"].get("timed_out"):
+                    scheduler_status["last_error"] = "Timeout"
+                else:
+                    scheduler_status["last_error"] = None
                 
-                # 2. Capture the snapshot with fresh prices
-                service = AnalyticsService(db, user_id=1)
-                service.capture_snapshot()
-                service.cleanup_history()
-                
-                logger.info("Scheduler: Snapshot completed successfully")
+                logger.info("Scheduler: Snapshot completed successfully "
+                            f"({', '.join(f'{k} {v:.1f}s' for k, v in result['stages'].items())})")
                 scheduler_status["last_run"] = datetime.utcnow().isoformat()
                 scheduler_status["last_status"] = "completed"
-                scheduler_status["last_error"] = None
                 
-            except asyncio.TimeoutError:
-                 logger.error("Scheduler: Price update timed out")
-                 scheduler_status["last_error"] = "Timeout"
             except Exception as e:
                  logger.error(f"Scheduler error inner: {e}")
                  scheduler_status["last_error"] = str(e)
@@ -175,7 +149,8 @@ async def run_scheduler():
 @app.get("/scheduler/status")
 def get_scheduler_status():
     """Check the health and status of the background price update scheduler"""
-    return scheduler_status
+    from app.utils.price_fetcher import get_price_fetcher
+    return {**scheduler_status, "concurrency": get_price_fetcher().concurrency_stats()}
 
 @app.on_event("startup")
 async def startup_event():
@@ -199,5 +174,16 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Startup: Failed to seed user: {e}")
 
-    # 2. Start Scheduler
+    # 2. Create the shared PriceFetcher up front so the scheduler and handlers reuse its caches,
+    # and warm it from the DB (special funds, then stored quotes) without blocking startup
+    from app.utils.price_fetcher import get_price_fetcher
+    price_fetcher = get_price_fetcher()
+    asyncio.get_running_loop().run_in_executor(None, price_fetcher.load_stored_quotes)
+
+    # 3. Start Scheduler
     asyncio.create_task(run_scheduler())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from app.utils.price_fetcher import close_price_fetcher
+    await close_price_fetcher()
@@ -321,3 +321,58 @@ class CryptoBalanceSnapshot(Base):
             'balance': self.balance,
             'currency': self.currency
         }
+
+class PriceQuote(Base):
+    """
+    Last good price per symbol (in GBP), written behind by PriceFetcher.
+    Lets the price cache survive restarts and scale-to-zero wakes.
+    """
+    __tablename__ = 'price_quotes'
+    
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(50), nullable=False, unique=True, index=True)
+    price = Column(Float, nullable=False)
+    previous_close = Column(Float, nullable=True) # Last close (GBP), where the source provides one
+    currency = Column(String(10), default='GBP')
+    source = Column(String(50))
+    fetched_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'symbol': self.symbol,
+            'price': self.price,
+            'previous_close': self.previous_close,
+            'currency': self.currency,
+            'source': self.source,
+            'fetched_at': self.fetched_at.isoformat() if self.fetched_at else None
+        }
+
+class SpecialFund(Base):
+    """
+    Funds priced by scraping (FT / HL) or a non-standard Yahoo symbol, keyed by ISIN.
+    Replaces the hardcoded map in PriceFetcher; defaults are seeded at startup.
+    """
+    __tablename__ = 'special_funds'
+    
+    id = Column(Integer, primary_key=True)
+    isin = Column(String(12), nullable=False, unique=True, index=True)
+    name = Column(String(200), nullable=False)
+    hl_url = Column(Text, nullable=True)
+    ft_url = Column(Text, nullable=True)
+    yahoo_symbol = Column(String(50), nullable=True)
+    preferred_source = Column(String(20), nullable=True) # 'ft', 'hl' or 'yahoo'; tried first
+    quoted_in_pence = Column(Boolean, default=False) # Yahoo quote is in GBX
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'isin': self.isin,
+            'name': self.name,
+            'hl_url': self.hl_url,
+            'ft_url': self.ft_url,
+            'yahoo_symbol': self.yahoo_symbol,
+            'preferred_source': self.preferred_source,
+            'quoted_in_pence': self.quoted_in_pence,
+            'is_active': self.is_active
+        }
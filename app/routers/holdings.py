@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List, Dict, Optional
 from app.database import get_db
 from app.dependencies import get_current_user_id
 from app.services.holdings_service import HoldingsService
@@ -127,12 +127,13 @@ def delete_platform(
 
 @router.post("/refresh-prices")
 async def refresh_prices(
+    max_age: Optional[int] = Query(None, ge=0, description="Refetch prices older than this many seconds (default: per asset class, 0 = all)"),
     db: Session = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
     """Update current prices for all investments with symbols using robust PriceFetcher"""
     holdings_service = HoldingsService(db, user_id)
-    return await holdings_service.update_all_prices_async()
+    return await holdings_service.update_all_prices_async(max_age=max_age)
 
 from pydantic import BaseModel
 
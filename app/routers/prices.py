@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from app.utils.price_fetcher import get_price_fetcher
+
+router = APIRouter(
+    prefix="/prices",
+    tags=["prices"]
+)
+
+@router.get("/stats")
+def get_price_stats():
+    """Provider health for the shared price fetcher: call outcomes/latency, rate-limit waits, circuit breakers and coalesced lookups"""
+    price_fetcher = get_price_fetcher()
+    return {
+        "providers": price_fetcher.provider_stats(),
+        "rate_limits": price_fetcher.rate_limit_stats(),
+        "breakers": {name: breaker.to_dict() for name, breaker in price_fetcher.breakers.items()},
+        "inflight": price_fetcher.inflight.to_dict()
+    }
+
+@router.get("/cache")
+def get_price_cache_stats():
+    """Shared price cache: size, entries per source, and hit/miss/stale/eviction counters"""
+    return get_price_fetcher().cache_stats()
+
+@router.get("/fx")
+def get_fx_rates():
+    """Current GBP rates per currency, where each came from and when they were last refreshed"""
+    return get_price_fetcher().fx.to_dict()
@@ -7,8 +7,10 @@ from hdwallet.cryptocurrencies import Bitcoin as BTC
 from typing import List, Dict, Optional
 
 class CryptoService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.db = db
+        # Custom transport (e.g. ProviderReplay.transport()) for offline use
+        self.transport = transport
         self.MEMPOOL_API = "https://mempool.space/api"
 
     def validate_xpub(self, xpub: str) -> bool:
@@ -118,7 +120,7 @@ class CryptoService:
         # Better approach: check xpub summary if supported? No, mempool.space doesn't support xpub natively in public API.
         # We must check addresses. Limit to first 20 for MVP.
         
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(transport=self.transport) as client:
             # Parallelize?
             for addr in addresses:
                 try:
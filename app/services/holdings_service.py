@@ -5,11 +5,17 @@ from app.schemas import InvestmentCreate
 from datetime import datetime
 from typing import List, Dict, Optional, Any
 import asyncio
+from app.utils.deadline import Deadline
 
 class HoldingsService:
-    def __init__(self, db: Session, user_id: int):
+    # Symbols per price batch in a refresh; each batch is committed as soon as it's priced
+    PRICE_COMMIT_BATCH = 20
+
+    def __init__(self, db: Session, user_id: int, use_yfinance: bool = True):
         self.db = db
         self.user_id = user_id
+        # False when providers are replayed offline: company names then fall back to the T212 ticker
+        self.use_yfinance = use_yfinance
 
     def get_investments_by_platform(self) -> Dict[str, List[Dict]]:
         """Get all investments organized by platform"""
@@ -378,8 +384,8 @@ class HoldingsService:
 
     def update_all_prices(self) -> Dict[str, Any]:
         """Update live prices for all investments"""
-        from app.utils.price_fetcher import PriceFetcher
-        price_fetcher = PriceFetcher()
+        from app.utils.price_fetcher import get_price_fetcher
+        price_fetcher = get_price_fetcher()
         
         investments = self.db.query(Investment).filter(Investment.user_id == self.user_id).all()
         
@@ -397,66 +403,114 @@ class HoldingsService:
         for investment in investments:
             if investment.symbol and investment.symbol in prices:
                 investment.current_price = prices[investment.symbol]
-                investment.last_updated = datetime.now()
+                investment.last_updated = datetime.utcnow()
                 updated_count += 1
                 
         self.db.commit()
         return {"status": "success", "updated_count": updated_count}
 
-    async def update_all_prices_async(self) -> Dict[str, Any]:
+    async def update_all_prices_async(self, max_age: Optional[int] = None,
+                                      deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         Update live prices for all investments asynchronously.
         InvestEngine holdings use 'previous_close' to align with their app.
         Others use 'live' prices.
+        Only symbols whose price is older than their freshness target (or max_age seconds) are fetched.
+        Prices are committed in batches as they arrive; with a deadline, whatever hasn't arrived
+        by then is abandoned and the result is marked timed_out (everything before it is kept).
         """
-        from app.utils.price_fetcher import PriceFetcher
+        from app.utils.price_fetcher import get_price_fetcher
+        from app.utils.refresh_planner import RefreshPlanner
         import logging
         logger = logging.getLogger(__name__)
         
-        price_fetcher = PriceFetcher()
-        
-        investments = self.db.query(Investment).filter(Investment.user_id == self.user_id).all()
-        
-        # Split investments
-        investengine_investments = [inv for inv in investments if inv.platform == 'InvestEngine ISA']
-        standard_investments = [inv for inv in investments if inv.platform != 'InvestEngine ISA']
-        
-        investengine_symbols = list(set([inv.symbol for inv in investengine_investments if inv.symbol]))
-        standard_symbols = list(set([inv.symbol for inv in standard_investments if inv.symbol]))
+        price_fetcher = get_price_fetcher()
+        
+        all_investments = self.db.query(Investment).filter(Investment.user_id == self.user_id).all()
+        
+        # Plan: a symbol held in several places is as old as its oldest price
+        priced_at = {}
+        for inv in all_investments:
+            if not inv.symbol:
+                continue
+            as_of = inv.last_updated if inv.current_price else None
+            if inv.symbol not in priced_at:
+                priced_at[inv.symbol] = as_of
+            elif priced_at[inv.symbol] is not None and (as_of is None or as_of < priced_at[inv.symbol]):
+                priced_at[inv.symbol] = as_of
+        due, fresh = RefreshPlanner(price_fetcher).plan(priced_at, max_age=max_age)
+        if fresh:
+            logger.info(f"HoldingsService: {len(fresh)}/{len(priced_at)} symbols fresh enough, skipping them")
+        
+        # Fetch live price and previous close together, once per symbol (ETFs like VUAG.L are
+        # often held on both InvestEngine and elsewhere); each platform picks its pricing mode
+        due_symbols = set(due)
+        holders: Dict[str, List[Investment]] = {}
+        for inv in all_investments:
+            if inv.symbol in due_symbols:
+                holders.setdefault(inv.symbol, []).append(inv)
+        all_symbols = sorted(holders)
         
         updated_count = 0
-        
-        # 1. Fetch Standard (Live)
-        prices_standard = {}
-        if standard_symbols:
-            logger.info(f"HoldingsService: Fetching LIVE prices for {len(standard_symbols)} symbols...")
-            prices_standard = await price_fetcher.get_multiple_prices_async(standard_symbols, use_previous_close=False)
-            
-        # 2. Fetch InvestEngine (Previous Close)
-        prices_investengine = {}
-        if investengine_symbols:
-            logger.info(f"HoldingsService: Fetching PREV CLOSE prices for {len(investengine_symbols)} InvestEngine symbols...")
-            prices_investengine = await price_fetcher.get_multiple_prices_async(investengine_symbols, use_previous_close=True)
-            
-        # 3. Update Investments
-        
-        # Standard
-        for investment in standard_investments:
-             if investment.symbol and investment.symbol in prices_standard:
-                 investment.current_price = prices_standard[investment.symbol]
-                 investment.last_updated = datetime.now()
-                 updated_count += 1
-        
-        # InvestEngine
-        for investment in investengine_investments:
-             if investment.symbol and investment.symbol in prices_investengine:
-                 investment.current_price = prices_investengine[investment.symbol]
-                 investment.last_updated = datetime.now()
-                 updated_count += 1
-                
-        self.db.commit()
-        logger.info(f"HoldingsService: Updated {updated_count} investments (Std: {len(prices_standard)}, IE: {len(prices_investengine)}).")
-        return {"status": "success", "updated_count": updated_count}
+        priced_symbols = 0
+        timed_out = False
+        
+        def apply(quotes: Dict[str, Dict]) -> int:
+            count = 0
+            for symbol, quote in quotes.items():
+                if quote.get('stale'):
+                    logger.warning(f"HoldingsService: {symbol} priced from a stale quote ({quote['source']}, "
+                                   f"{quote['age_seconds'] / 3600:.1f}h old)")
+                for investment in holders.get(symbol, []):
+                    use_previous_close = investment.platform == 'InvestEngine ISA'
+                    price = price_fetcher.pick_prices({symbol: quote}, use_previous_close).get(symbol)
+                    if price is not None:
+                        investment.current_price = price
+                        # A cached price is only as fresh as when it was quoted: stamping it now would
+                        # let the planner skip the holding while a newer price sits in the cache
+                        investment.last_updated = quote.get('as_of') or datetime.utcnow()
+                        count += 1
+            return count
+        
+        if all_symbols:
+            logger.info(f"HoldingsService: Fetching quotes for {len(all_symbols)} symbols")
+            batches = [all_symbols[i:i + self.PRICE_COMMIT_BATCH]
+                       for i in range(0, len(all_symbols), self.PRICE_COMMIT_BATCH)]
+            
+            async def fetch(batch: List[str]) -> Dict[str, Dict]:
+                # Symbols whose market hasn't moved since their last quote (weekends, overnight,
+                # funds between valuations) are served from the cache without a request
+                if deadline is None:
+                    return await price_fetcher.get_multiple_quotes_async(batch, market_aware=True)
+                with deadline.use():
+                    return await price_fetcher.get_multiple_quotes_async(batch, market_aware=True)
+            
+            tasks = [asyncio.ensure_future(fetch(batch)) for batch in batches]
+            try:
+                # Commit each batch as it lands so a timeout keeps everything fetched so far
+                for next_batch in asyncio.as_completed(tasks, timeout=deadline.remaining() if deadline else None):
+                    try:
+                        quotes = await next_batch
+                    except asyncio.TimeoutError:
+                        timed_out = True
+                        break
+                    except Exception as e:
+                        logger.warning(f"HoldingsService: Price batch failed: {e}")
+                        continue
+                    priced_symbols += len(quotes)
+                    updated_count += apply(quotes)
+                    self.db.commit()
+            finally:
+                for task in tasks:
+                    task.cancel()
+        
+        if timed_out:
+            logger.warning(f"HoldingsService: Refresh deadline hit, kept {priced_symbols}/{len(all_symbols)} "
+                           f"symbols ({updated_count} investments)")
+        else:
+            logger.info(f"HoldingsService: Updated {updated_count} investments ({priced_symbols}/{len(all_symbols)} symbols priced).")
+        return {"status": "timeout" if timed_out else "success", "updated_count": updated_count,
+                "fetched_symbols": len(due), "skipped_fresh": len(fresh), "timed_out": timed_out}
                 
     
     def normalize_trading212_ticker(self, ticker: str) -> str:
@@ -481,6 +535,8 @@ class HoldingsService:
 
     def get_company_name_safe(self, symbol: str, default: str) -> str:
         """Dynamically fetch company name from Yahoo Finance with fallback"""
+        if not self.use_yfinance:
+            return default
         import yfinance as yf
         try:
             # We don't want to block the sync too long, so we try quickly or fall back
@@ -491,24 +547,25 @@ class HoldingsService:
         except Exception:
             return default
 
-    async def sync_trading212_investments(self, api_key_id: str, api_secret_key: str) -> Dict[str, Any]:
-        """Import/Sync investments from Trading212 (Full Replace)"""
+    async def sync_trading212_investments(self, api_key_id: str, api_secret_key: str,
+                                          session=None) -> Dict[str, Any]:
+        """Import/Sync investments from Trading212 (Full Replace). `session` goes to Trading212Service."""
         from app.services.trading212_service import Trading212Service
-        from app.utils.price_fetcher import PriceFetcher
+        from app.utils.price_fetcher import get_price_fetcher
         import json
         import logging
         logger = logging.getLogger(__name__)
         
         logger.info("T212 Sync: Starting full sync (replace mode)...")
         
-        t212 = Trading212Service(api_key_id, api_secret_key)
+        t212 = Trading212Service(api_key_id, api_secret_key, session=session)
         
         loop = asyncio.get_running_loop()
         portfolio = await loop.run_in_executor(None, t212.fetch_portfolio)
         
         logger.info(f"T212 Sync: Fetched {len(portfolio)} positions from Trading212 API")
 
-        price_fetcher = PriceFetcher()
+        price_fetcher = get_price_fetcher()
         
         # 1. Clear existing Trading212 investments (FULL REPLACE - not additive)
         target_platform = 'Trading212 ISA'
@@ -521,11 +578,12 @@ class HoldingsService:
         
         added_count = 0
         
-        # Prefetch rates if possible, or fetch on demand
-        usd_to_gbp = price_fetcher.get_usd_to_gbp_rate()
+        # One FX refresh for the whole sync (USD, EUR, CHF, JPY -> GBP)
+        fx_rates = await price_fetcher.get_fx_rates_async()
+        usd_to_gbp = fx_rates['USD']
         
         with open("debug_log.txt", "a") as f:
-             f.write(f"USD to GBP Rate: {usd_to_gbp}\n")
+             f.write(f"FX Rates to GBP: {fx_rates}\n")
         
         for item in portfolio:
             raw_ticker = item.get('ticker', '')
@@ -610,11 +668,11 @@ class HoldingsService:
                           with open("debug_log.txt", "a") as f:
                                 f.write(f"  -> Fallback Converted UK Pence to GBP {avg_price}\n")
             
-            elif currency == 'EUR':
-                # Optional: Add EUR support if needed
-                # For now, treat as 1:0.83 (approx) or fetch rate?
-                # Let's just log warning and leave as is for now to avoid breaking
-                pass
+            elif currency in fx_rates:
+                # EUR/CHF/JPY listings: convert at the current rate
+                avg_price = price_fetcher.fx.convert([avg_price], [currency])[0]
+                with open("debug_log.txt", "a") as f:
+                    f.write(f"  -> Converted {currency} to GBP {avg_price}\n")
             
             # Fallback for weird cases: if no currency, rely on symbol
             elif not currency:
@@ -635,6 +693,8 @@ class HoldingsService:
                 elif currency == 'GBP' and t212_current_price_raw > 500:
                     # Likely pence for UK stocks
                     initial_current_price = t212_current_price_raw / 100.0
+                elif currency in fx_rates:
+                    initial_current_price = price_fetcher.fx.convert([t212_current_price_raw], [currency])[0]
                 else:
                     initial_current_price = t212_current_price_raw
             else:
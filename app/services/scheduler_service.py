@@ -0,0 +1,86 @@
+from sqlalchemy.orm import Session
+from app.services.analytics_service import AnalyticsService
+from app.services.holdings_service import HoldingsService
+from app.utils.deadline import Deadline
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class SchedulerService:
+    """
+    One iteration of the background scheduler: refresh prices, auto-sync Trading212,
+    capture the net worth snapshot and thin the history.
+    """
+
+    PRICE_DEADLINE_SECONDS = 300
+    T212_TIMEOUT_SECONDS = 300
+
+    def __init__(self, db: Session, user_id: int = 1):
+        self.db = db
+        self.user_id = user_id
+
+    async def run_tick(self, t212_session=None,
+                       on_stage: Optional[Callable[[str], None]] = None,
+                       use_yfinance: bool = True) -> Dict[str, Any]:
+        """
+        Run every stage in order. Returns the price refresh result, whether the T212 sync ran,
+        and seconds per stage. `on_stage(name)` is called as each stage starts (e.g. to
+        attribute queries); `t212_session` goes to Trading212Service and `use_yfinance` to
+        HoldingsService.
+        """
+        stages: Dict[str, float] = {}
+        started = None
+        current = None
+
+        def stage(name: Optional[str]):
+            nonlocal started, current
+            now = time.perf_counter()
+            if current is not None:
+                stages[current] = now - started
+            started, current = now, name
+            if name is not None and on_stage is not None:
+                on_stage(name)
+
+        holdings_service = HoldingsService(self.db, user_id=self.user_id, use_yfinance=use_yfinance)
+
+        stage('prices')
+        logger.info("Scheduler: Refreshing prices...")
+        # Deadline instead of a hard timeout: prices are committed as they arrive, so
+        # running out of time keeps what was fetched and the snapshot still goes ahead
+        prices = await holdings_service.update_all_prices_async(deadline=Deadline(self.PRICE_DEADLINE_SECONDS))
+        if prices.get("timed_out"):
+            logger.error("Scheduler: Price update hit its deadline, snapshotting with the prices fetched so far")
+
+        stage('t212')
+        t212_synced = False
+        # Auto-sync Trading212 if credentials exist
+        try:
+            creds = holdings_service.get_trading212_credentials()
+            if creds:
+                logger.info("Scheduler: Auto-syncing Trading212...")
+                await asyncio.wait_for(
+                    holdings_service.sync_trading212_investments(creds['api_key_id'], creds['api_secret_key'],
+                                                                 session=t212_session),
+                    timeout=self.T212_TIMEOUT_SECONDS
+                )
+                t212_synced = True
+                logger.info("Scheduler: Trading212 sync completed successfully")
+            else:
+                logger.debug("Scheduler: Skipped T212 sync (no credentials configured)")
+        except asyncio.TimeoutError:
+            logger.error("Scheduler: Trading212 sync timed out")
+        except Exception as e:
+            logger.error(f"Scheduler: Auto-sync failed: {e}")
+
+        # Capture the snapshot with fresh prices
+        service = AnalyticsService(self.db, user_id=self.user_id)
+        stage('snapshot')
+        service.capture_snapshot()
+        stage('cleanup')
+        service.cleanup_history()
+        stage(None)
+
+        return {"prices": prices, "t212_synced": t212_synced, "stages": stages}
@@ -5,7 +5,9 @@ import logging
 class Trading212Service:
     BASE_URL = "https://live.trading212.com/api/v0"
 
-    def __init__(self, api_key_id: str, api_secret_key: str):
+    def __init__(self, api_key_id: str, api_secret_key: str, session: Optional[requests.Session] = None):
+        # Custom session (e.g. ProviderReplay.session()) for offline use
+        self.session = session or requests.Session()
         self.api_key_id = api_key_id.strip()
         self.api_secret_key = api_secret_key.strip()
         self.base_headers = {
@@ -40,7 +42,7 @@ class Trading212Service:
                 headers = {**self.base_headers, "Authorization": auth_header}
                 
                 logging.info(f"T212: Attempting connection to {url_base}...")
-                response = requests.get(endpoint, headers=headers, timeout=10)
+                response = self.session.get(endpoint, headers=headers, timeout=10)
                 
                 logging.info(f"T212: Response status={response.status_code}")
                 
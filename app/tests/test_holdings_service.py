@@ -0,0 +1,169 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy.orm import sessionmaker
+from app.models import Investment
+from app.services.holdings_service import HoldingsService
+from app.utils.deadline import Deadline, current_deadline
+from app.utils import price_fetcher as pf
+from app.utils.price_cache import PriceCache
+from app.utils.price_fetcher import PriceFetcher
+
+
+def test_update_all_prices_skips_fresh_symbols(db_engine, monkeypatch):
+    monkeypatch.setattr(PriceFetcher, "_PRICE_CACHE", PriceCache())
+    monkeypatch.setattr(pf, "_shared_fetcher", PriceFetcher())
+    requested = []
+
+    async def fake_quotes(symbols, market_aware=False):
+        requested.append(sorted(symbols))
+        return {s: {"last_price": 2.0, "previous_close": 1.9} for s in symbols}
+
+    monkeypatch.setattr(pf._shared_fetcher, "get_multiple_quotes_async", fake_quotes)
+
+    session = sessionmaker(bind=db_engine)()
+    try:
+        now = datetime.utcnow()
+        session.add_all([
+            # Just priced (e.g. by the T212 sync) vs. an old price
+            Investment(user_id=99, platform="Trading212 ISA", name="Bitcoin", symbol="BTC",
+                       current_price=1.0, last_updated=now),
+            Investment(user_id=99, platform="Trading212 ISA", name="Ethereum", symbol="ETH",
+                       current_price=1.0, last_updated=now - timedelta(hours=1)),
+        ])
+        session.commit()
+
+        result = asyncio.run(HoldingsService(session, 99).update_all_prices_async())
+        assert requested == [["ETH"]]
+        assert result["updated_count"] == 1
+        assert result["skipped_fresh"] == 1
+
+        asyncio.run(HoldingsService(session, 99).update_all_prices_async(max_age=0))
+        assert requested[-1] == ["BTC", "ETH"]
+    finally:
+        session.query(Investment).filter(Investment.user_id == 99).delete()
+        session.commit()
+        session.close()
+
+
+def test_refresh_deadline_commits_prices_fetched_so_far(db_engine, monkeypatch):
+    monkeypatch.setattr(PriceFetcher, "_PRICE_CACHE", PriceCache())
+    monkeypatch.setattr(pf, "_shared_fetcher", PriceFetcher())
+    monkeypatch.setattr(HoldingsService, "PRICE_COMMIT_BATCH", 1)
+    deadlines = []
+
+    async def fake_quotes(symbols, market_aware=False):
+        deadlines.append(current_deadline())
+        if symbols == ["ETH"]:
+            await asyncio.sleep(5)  # Provider hangs past the deadline
+        return {s: {"last_price": 2.0, "previous_close": 1.9} for s in symbols}
+
+    monkeypatch.setattr(pf._shared_fetcher, "get_multiple_quotes_async", fake_quotes)
+
+    session = sessionmaker(bind=db_engine)()
+    try:
+        session.add_all([
+            Investment(user_id=98, platform="Trading212 ISA", name="Bitcoin", symbol="BTC", current_price=1.0),
+            Investment(user_id=98, platform="Trading212 ISA", name="Ethereum", symbol="ETH", current_price=1.0),
+        ])
+        session.commit()
+
+        deadline = Deadline(0.2)
+        result = asyncio.run(HoldingsService(session, 98).update_all_prices_async(max_age=0, deadline=deadline))
+        assert result["timed_out"]
+        assert result["updated_count"] == 1
+        assert deadlines == [deadline, deadline]
+
+        # BTC was committed before the deadline, ETH kept its old price
+        other = sessionmaker(bind=db_engine)()
+        prices = {i.symbol: i.current_price for i in other.query(Investment).filter(Investment.user_id == 98)}
+        other.close()
+        assert prices == {"BTC": 2.0, "ETH": 1.0}
+    finally:
+        session.query(Investment).filter(Investment.user_id == 98).delete()
+        session.commit()
+        session.close()
+
+
+def test_stale_fund_price_stays_due(db_engine, monkeypatch):
+    monkeypatch.setattr(PriceFetcher, "_PRICE_CACHE", PriceCache())
+    monkeypatch.setattr(pf, "_shared_fetcher", PriceFetcher())
+    quoted_at = datetime.utcnow() - timedelta(days=3)
+    requested = []
+
+    async def last_known_good(symbols, market_aware=False):
+        requested.append(sorted(symbols))
+        return {s: {"last_price": 2.5, "previous_close": None, "source": "ft", "stale": True,
+                    "as_of": quoted_at, "age_seconds": 3 * 86400} for s in symbols}
+
+    monkeypatch.setattr(pf._shared_fetcher, "get_multiple_quotes_async", last_known_good)
+
+    session = sessionmaker(bind=db_engine)()
+    try:
+        session.add(Investment(user_id=96, platform="HL Stocks & Shares LISA", name="Positive Change",
+                               symbol="GB00BYVGKV59", current_price=2.0, last_updated=quoted_at))
+        session.commit()
+
+        result = asyncio.run(HoldingsService(session, 96).update_all_prices_async())
+        assert result["updated_count"] == 1
+        investment = session.query(Investment).filter(Investment.user_id == 96).one()
+        assert investment.current_price == 2.5
+        assert investment.last_updated == quoted_at
+
+        # Still as old as its quote, so the next tick retries it
+        asyncio.run(HoldingsService(session, 96).update_all_prices_async())
+        assert requested == [["GB00BYVGKV59"], ["GB00BYVGKV59"]]
+    finally:
+        session.query(Investment).filter(Investment.user_id == 96).delete()
+        session.commit()
+        session.close()
+
+
+def test_holding_served_stale_picks_up_the_revalidated_price(db_engine, monkeypatch):
+    from app.utils.market_calendar import MARKETS
+
+    monkeypatch.setattr(PriceFetcher, "_PRICE_CACHE", PriceCache())
+    fetcher = PriceFetcher()
+    monkeypatch.setattr(pf, "_shared_fetcher", fetcher)
+    now = datetime.utcnow()
+    # A NAV cached before the latest valuation: stale, served while it's refreshed to 3.5
+    monkeypatch.setattr(MARKETS["FUND"], "last_change", lambda now=None: datetime.utcnow() - timedelta(hours=1))
+    fetcher._PRICE_CACHE.set("GB00BYVGKV59", {"price": 3.0, "previous_close": None,
+                                               "time": now - timedelta(hours=8), "source": "ft"})
+
+    async def revalidated(symbols):
+        for symbol in symbols:
+            fetcher._cache_price(symbol, 3.5, "ft")
+        return {s: {"last_price": 3.5, "previous_close": None} for s in symbols}
+
+    monkeypatch.setattr(fetcher, "_fetch_quotes_async", revalidated)
+
+    async def two_ticks():
+        first = await HoldingsService(session, 94).update_all_prices_async()
+        await asyncio.gather(*fetcher._background_tasks)
+        return first, await HoldingsService(session, 94).update_all_prices_async()
+
+    session = sessionmaker(bind=db_engine)()
+    try:
+        session.add(Investment(user_id=94, platform="HL Stocks & Shares LISA", name="Positive Change",
+                               symbol="GB00BYVGKV59", current_price=2.0, last_updated=now - timedelta(days=2)))
+        session.commit()
+
+        first, second = asyncio.run(two_ticks())
+        assert first["updated_count"] == 1
+        assert second["updated_count"] == 1
+        assert second["skipped_fresh"] == 0
+        investment = session.query(Investment).filter(Investment.user_id == 94).one()
+        assert investment.current_price == 3.5
+        assert (datetime.utcnow() - investment.last_updated).total_seconds() < 60
+    finally:
+        session.query(Investment).filter(Investment.user_id == 94).delete()
+        session.commit()
+        session.close()
+
+def test_company_names_skip_yfinance_when_offline(monkeypatch):
+    import sys
+    # The shared fetcher is live; only the service's own flag decides
+    monkeypatch.setattr(pf, "_shared_fetcher", PriceFetcher(use_yfinance=True))
+    monkeypatch.setitem(sys.modules, "yfinance", None)
+
+    assert HoldingsService(None, 95, use_yfinance=False).get_company_name_safe("AAPL", "Apple") == "Apple"
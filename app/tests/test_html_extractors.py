@@ -0,0 +1,51 @@
+import pytest
+from app.utils.html_extractors import (
+    FtPriceExtractor, GoogleFxExtractor, GoogleQuoteExtractor, HlPriceExtractor
+)
+
+
+def feed_in_chunks(extractor, html, size):
+    for i in range(0, len(html), size):
+        if extractor.feed(html[i:i + size]):
+            break
+    return extractor.close()
+
+
+HL_PAGE = (
+    "<html><body>" + "<p>filler</p>" * 400
+    + "<div>Buy: 356.20p</div>"
+    + "<div>Sell: 355.10p</div>"
+    + "<p>footer</p>" * 400 + "</body></html>"
+)
+
+
+def test_hl_chunked_matches_whole_document():
+    # Sell beats Buy even though Buy comes first in the page
+    assert HlPriceExtractor().extract(HL_PAGE) == pytest.approx(3.551)
+    for size in (7, 64, 1000, 4096):
+        assert feed_in_chunks(HlPriceExtractor(), HL_PAGE, size) == pytest.approx(3.551)
+
+
+def test_stops_reading_once_best_pattern_found():
+    extractor = HlPriceExtractor()
+    assert extractor.feed("<div>Sell: 1,234.5p</div>") is True
+    # Later chunks are ignored
+    extractor.feed("<div>Sell: 999.0p</div>")
+    assert extractor.close() == pytest.approx(12.345)
+
+
+def test_match_split_across_chunks_is_not_cut_short():
+    extractor = HlPriceExtractor()
+    assert extractor.feed("<div>Sell: 35") is False
+    extractor.feed("5.10p</div>")
+    assert extractor.close() == pytest.approx(3.551)
+
+
+def test_ft_gbx_and_google_currency():
+    ft = '<span>Price (GBX)</span><span class="v">355.10</span>'
+    assert feed_in_chunks(FtPriceExtractor(), ft, 5) == pytest.approx(3.551)
+    assert FtPriceExtractor().extract("<p>no price here</p>") is None
+
+    assert GoogleQuoteExtractor().extract('<div class="YMlKec fxKbKc">£1,012.50</div>') == (1012.5, "GBP")
+    # FX falls back to the broad pattern, skipping numbers outside the expected range
+    assert GoogleFxExtractor().extract("<b>1.2345</b><span>0.7925</span>") == pytest.approx(0.7925)
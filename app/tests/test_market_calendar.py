@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timedelta
+from app.utils.market_calendar import MARKETS, market_for
+from app.utils.price_cache import PriceCache
+from app.utils.price_fetcher import PriceFetcher
+
+
+def test_market_sessions_and_last_change():
+    lse, us = MARKETS["LSE"], MARKETS["US"]
+
+    # Tuesday 2024-03-05 (GMT, New York on EST)
+    assert lse.is_open(datetime(2024, 3, 5, 12, 0))
+    assert not us.is_open(datetime(2024, 3, 5, 12, 0))
+    assert us.is_open(datetime(2024, 3, 5, 15, 0))
+    # Overnight: the last change is yesterday's close plus settle time
+    assert lse.last_change(datetime(2024, 3, 6, 7, 0)) == datetime(2024, 3, 5, 16, 50)
+    assert us.last_change(datetime(2024, 3, 6, 3, 0)) == datetime(2024, 3, 5, 21, 20)
+    # Weekend goes back to Friday; British Summer Time shifts the UTC close
+    assert lse.last_change(datetime(2024, 3, 9, 12, 0)) == datetime(2024, 3, 8, 16, 50)
+    assert lse.last_change(datetime(2024, 7, 6, 12, 0)) == datetime(2024, 7, 5, 15, 50)
+
+    assert MARKETS["FUND"].last_change(datetime(2024, 3, 11, 7, 0)) == datetime(2024, 3, 8, 8, 0)
+    assert MARKETS["CRYPTO"].is_open(datetime(2024, 3, 9, 3, 0))
+
+    assert market_for("VUAG.L") is lse
+    assert market_for("AAPL") is us
+    assert market_for("BTC", is_crypto=True) is MARKETS["CRYPTO"]
+    assert market_for("SAP.DE") is None
+
+
+def test_market_aware_quotes_skip_closed_markets(monkeypatch):
+    monkeypatch.setattr(PriceFetcher, "_PRICE_CACHE", PriceCache())
+    fetcher = PriceFetcher()
+
+    # Both quotes are an hour old: past the cache TTL, but only crypto has moved since
+    an_hour_ago = datetime.utcnow() - timedelta(hours=1)
+    fetcher._PRICE_CACHE.set("GB00BYVGKV59", {"price": 2.0, "previous_close": None, "time": an_hour_ago,
+                                               "source": "ft"})
+    fetcher._PRICE_CACHE.set("BTC", {"price": 50000.0, "previous_close": None, "time": an_hour_ago,
+                                      "source": "coingecko"})
+    monkeypatch.setattr(MARKETS["FUND"], "last_change", lambda now=None: an_hour_ago - timedelta(hours=1))
+
+    fetched = []
+
+    async def fake_fetch(symbols):
+        fetched.extend(symbols)
+        return {s: {"last_price": 1.0, "previous_close": None} for s in symbols}
+
+    monkeypatch.setattr(fetcher, "_fetch_quotes_async", fake_fetch)
+    monkeypatch.setattr(fetcher, "_schedule_revalidation", fetched.extend)
+
+    quotes = asyncio.run(fetcher.get_multiple_quotes_async(["GB00BYVGKV59", "BTC", "AAPL"], market_aware=True))
+
+    assert quotes["GB00BYVGKV59"]["last_price"] == 2.0
+    # BTC is stale (revalidated in the background), AAPL has nothing cached
+    assert sorted(fetched) == ["AAPL", "BTC"]
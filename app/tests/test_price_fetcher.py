@@ -0,0 +1,793 @@
+import asyncio
+import time
+import httpx
+import pytest
+from app.utils.http_client import AsyncHttpClient
+from app.utils.price_cache import PriceCache
+from app.utils.price_fetcher import PriceFetcher
+from app.utils.yahoo_client import YahooClient
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    """PriceFetcher with empty class-level caches and fixed FX rates (USD->GBP 0.8)"""
+    monkeypatch.setattr(PriceFetcher, "_PRICE_CACHE", PriceCache())
+    monkeypatch.setattr(PriceFetcher, "_CURRENCY_CACHE", {})
+    monkeypatch.setattr(PriceFetcher, "_COINGECKO_CACHE", {"time": None, "data": {}})
+    f = PriceFetcher()
+
+    rates = {"USD": 0.8, "EUR": 0.85, "CHF": 0.9, "JPY": 0.005, "GBP": 1.0, "GBX": 0.01, "GBp": 0.01}
+
+    async def fixed_rates():
+        return rates
+
+    monkeypatch.setattr(f, "get_fx_rates", lambda: rates)
+    monkeypatch.setattr(f, "get_fx_rates_async", fixed_rates)
+    return f
+
+
+def test_parse_yahoo_spark_nested_and_flat():
+    nested = {"spark": {"result": [
+        {"symbol": "AAPL", "response": [{
+            "meta": {"currency": "USD", "regularMarketPrice": 200.0, "previousClose": 198.0},
+            "indicators": {"quote": [{"close": [199.0]}]}
+        }]}
+    ], "error": None}}
+    flat = {"RR.L": {"symbol": "RR.L", "close": [None, 1250.0], "chartPreviousClose": 1240.0}}
+
+    assert YahooClient.parse_spark(nested) == {
+        "AAPL": {"price": 200.0, "previous_close": 198.0, "currency": "USD"}
+    }
+    assert YahooClient.parse_spark(flat) == {
+        "RR.L": {"price": 1250.0, "previous_close": 1240.0, "currency": None}
+    }
+
+
+def test_yahoo_chart_quote_skips_yfinance(fetcher, monkeypatch):
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        return httpx.Response(200, json={"chart": {"result": [{
+            "meta": {"currency": "GBp", "regularMarketPrice": 1250.0},
+            "indicators": {"quote": [{"close": [1230.0, None, 1240.0, 1250.0]}]}
+        }], "error": None}})
+
+    def no_yfinance(symbol):
+        raise AssertionError("yfinance fallback used")
+
+    fetcher.http = AsyncHttpClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(fetcher, "_fetch_from_yfinance", no_yfinance)
+
+    assert asyncio.run(fetcher._fetch_from_yahoo("RR.L")) == (1250.0, "GBp", 1240.0)
+    assert paths == ["/v8/finance/chart/RR.L"]
+
+
+def test_yfinance_fallback_only_when_chart_has_no_data(fetcher, monkeypatch):
+    statuses = {"RR.L": 429, "VOD.L": 503, "NEW.L": 404}
+    yfinance_calls = []
+
+    def handler(request):
+        return httpx.Response(statuses[request.url.path.rsplit("/", 1)[-1]])
+
+    def yfinance(symbol):
+        yfinance_calls.append(symbol)
+        return (100.0, "GBp", None)
+
+    fetcher.http = AsyncHttpClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(fetcher, "_fetch_from_yfinance", yfinance)
+
+    # Throttled or failing: no second route to Yahoo, and the failures stay on its breaker
+    for symbol in ["RR.L", "VOD.L"]:
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(fetcher._fetch_from_yahoo(symbol))
+    assert yfinance_calls == []
+    assert fetcher.breakers["yahoo"].consecutive_failures == 2
+
+    # No chart data for the symbol: yfinance is tried
+    assert asyncio.run(fetcher._fetch_from_yahoo("NEW.L")) == (100.0, "GBp", None)
+    assert yfinance_calls == ["NEW.L"]
+
+def test_multiple_prices_async_batches_yahoo_and_falls_back_for_misses(fetcher, monkeypatch):
+    batch_calls = []
+
+    async def fake_batch(symbols):
+        batch_calls.append(list(symbols))
+        return {
+            "AAPL": {"price": 200.0, "previous_close": 198.0, "currency": "USD"},
+            "RR.L": {"price": 1250.0, "previous_close": 1240.0, "currency": "GBp"},
+        }
+
+    single_calls = []
+
+    async def fake_get_quote(symbol):
+        single_calls.append(symbol)
+        return {"last_price": 1.0, "previous_close": None}
+
+    async def no_sleep(_):
+        return None
+
+    monkeypatch.setattr(fetcher, "get_yahoo_quotes_batch_async", fake_batch)
+    monkeypatch.setattr(fetcher, "_fetch_quote", fake_get_quote)
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+
+    prices = asyncio.run(fetcher.get_multiple_prices_async(["AAPL", "RR.L", "MISSING"]))
+
+    assert batch_calls == [["AAPL", "RR.L", "MISSING"]]
+    assert single_calls == ["MISSING"]
+    assert prices["AAPL"] == pytest.approx(160.0)
+    assert prices["RR.L"] == pytest.approx(12.5)
+
+    previous = asyncio.run(fetcher.get_multiple_prices_async(["AAPL"]))
+    assert previous["AAPL"] == pytest.approx(160.0)  # Served from cache
+    assert len(batch_calls) == 1
+
+
+def test_crypto_prices_batch_uses_one_request(fetcher):
+    requests_made = []
+
+    def handler(request):
+        requests_made.append(dict(request.url.params))
+        quotes = {
+            "bitcoin": {"gbp": 50000.0, "usd": 62500.0},
+            "ethereum": {"usd": 2500.0},
+            "solana": {"gbp": 120.0},
+        }
+        return httpx.Response(200, json={c: quotes[c] for c in request.url.params["ids"].split(",")})
+
+    fetcher.http = AsyncHttpClient(transport=httpx.MockTransport(handler))
+
+    prices = asyncio.run(fetcher.get_crypto_prices_batch_async(["BTC", "ETH-USD", "AAPL"]))
+
+    assert len(requests_made) == 1
+    assert requests_made[0]["ids"] == "bitcoin,ethereum"
+    assert requests_made[0]["vs_currencies"] == "gbp,usd"
+    assert prices == {"BTC": 50000.0, "ETH-USD": pytest.approx(2000.0)}
+
+    # Single-symbol lookups reuse the cached batch response
+    assert asyncio.run(fetcher.get_crypto_price_from_coingecko_async("BTC-USD")) == 50000.0
+    assert len(requests_made) == 1
+
+    # A later batch replaces the shared response, so coins it left out are fetched again
+    assert asyncio.run(fetcher.get_crypto_prices_batch_async(["SOL"])) == {"SOL": 120.0}
+    assert "_COINGECKO_CACHE" not in vars(fetcher)
+    assert PriceFetcher._COINGECKO_CACHE["data"].keys() == {"solana"}
+    asyncio.run(fetcher.get_crypto_price_from_coingecko_async("ETH"))
+    assert len(requests_made) == 3
+
+
+def test_coingecko_retries_stop_at_the_deadline(fetcher):
+    from app.utils.deadline import Deadline
+
+    requests_made = []
+
+    def throttled(request):
+        requests_made.append(request.url.path)
+        return httpx.Response(429)
+
+    fetcher.http = AsyncHttpClient(transport=httpx.MockTransport(throttled))
+
+    async def lookups():
+        with Deadline(0.5).use():
+            return (await fetcher.get_crypto_prices_batch_async(["BTC"]),
+                    await fetcher.get_crypto_price_from_coingecko_async("ETH"))
+
+    started = time.monotonic()
+    assert asyncio.run(lookups()) == ({}, None)
+    # Without the deadline: two backoffs (1.5s + 3s) per lookup
+    assert time.monotonic() - started < 0.5
+    assert len(requests_made) == 2
+
+def test_shared_fetcher_fetches_fx_once_across_threads(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.utils import price_fetcher as pf
+
+    monkeypatch.setattr(pf, "_shared_fetcher", None)
+    shared = pf.get_price_fetcher()
+    assert pf.get_price_fetcher() is shared
+
+    batches = []
+
+    async def slow_batch(symbols):
+        batches.append(symbols)
+        await asyncio.sleep(0.05)
+        return {"USDGBP=X": {"price": 0.79, "previous_close": None, "currency": "GBP"}}
+
+    async def no_scrape():
+        return None
+
+    monkeypatch.setattr(shared.yahoo, "get_quotes", slow_batch)
+    monkeypatch.setattr(shared, "scrape_google_currency_async", no_scrape)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        rates = list(pool.map(lambda _: pf.get_price_fetcher().get_usd_to_gbp_rate(), range(8)))
+
+    assert rates == [0.79] * 8
+    # One request for the whole matrix
+    assert batches == [["USDGBP=X", "EURGBP=X", "CHFGBP=X", "JPYGBP=X"]]
+
+    asyncio.run(pf.close_price_fetcher())
+    assert pf._shared_fetcher is None
+
+
+def test_fx_matrix_converts_mixed_currencies():
+    from app.utils.fx_service import FxService
+
+    calls = []
+
+    class FakeYahoo:
+        async def get_quotes(self, symbols):
+            calls.append(symbols)
+            return {"USDGBP=X": {"price": 0.78}, "EURGBP=X": {"price": 0.86}, "JPYGBP=X": {"price": 0.0052}}
+
+    async def usd_fallback():
+        raise AssertionError("batch had USD")
+
+    fx = FxService(FakeYahoo(), fallbacks={"USD": usd_fallback})
+
+    async def run():
+        await fx.get_rates_async()
+        await fx.get_rates_async()
+
+    asyncio.run(run())
+    assert len(calls) == 1
+
+    converted = fx.convert([100, 100, 1000, 250, 100, 5], ["USD", "eur", "JPY", "GBX", "CHF", "XYZ"])
+    assert converted[:4] == [pytest.approx(78), pytest.approx(86), pytest.approx(5.2), pytest.approx(2.5)]
+    # CHF missing from the batch: static rate until a fetch succeeds; unknown currencies stay None
+    assert converted[4] == pytest.approx(100 * FxService.STATIC_RATES["CHF"])
+    assert converted[5] is None
+    assert fx.to_dict()["sources"]["CHF"] == "static"
+
+
+def test_stale_stored_quote_served_then_revalidated(db_engine, monkeypatch):
+    from datetime import datetime, timedelta
+    from sqlalchemy.orm import sessionmaker
+    from app.models import PriceQuote
+    from app.utils.quote_store import QuoteStore
+
+    monkeypatch.setattr(PriceFetcher, "_PRICE_CACHE", PriceCache())
+    session_factory = sessionmaker(bind=db_engine)
+    store = QuoteStore(session_factory=session_factory)
+    store.save({"VUAG.L": {"price": 90.0, "source": "yahoo", "time": datetime.utcnow() - timedelta(hours=1)}})
+
+    fetcher = PriceFetcher(quote_store=store)
+    live_fetches = []
+
+    async def fake_fetch(symbols):
+        live_fetches.append(list(symbols))
+        for symbol in symbols:
+            fetcher._cache_price(symbol, 95.0, "yahoo", 94.0)
+        return {symbol: {"last_price": 95.0, "previous_close": 94.0} for symbol in symbols}
+
+    monkeypatch.setattr(fetcher, "_fetch_quotes_async", fake_fetch)
+
+    async def run():
+        prices = await fetcher.get_multiple_prices_async(["VUAG.L"])
+        # The stale stored value is returned without waiting on the network
+        assert prices == {"VUAG.L": 90.0}
+        await asyncio.gather(*fetcher._background_tasks)
+
+    try:
+        asyncio.run(run())
+
+        assert live_fetches == [["VUAG.L"]]
+        assert fetcher._get_cached_price("VUAG.L") == 95.0
+        assert store.load(["VUAG.L"])["VUAG.L"]["price"] == 95.0
+        assert store.load(["VUAG.L"])["VUAG.L"]["previous_close"] == 94.0
+    finally:
+        with session_factory() as session:
+            session.query(PriceQuote).delete()
+            session.commit()
+
+
+def test_refresh_waits_for_a_stored_quote_load_in_progress(monkeypatch):
+    import threading
+    from datetime import datetime
+
+    monkeypatch.setattr(PriceFetcher, "_PRICE_CACHE", PriceCache())
+    release = threading.Event()
+
+    class SlowStore:
+        def load(self, symbols=None):
+            release.wait(5)
+            return {"VUAG.L": {"price": 90.0, "source": "yahoo", "time": datetime.utcnow()}}
+
+        def save(self, quotes):
+            return len(quotes)
+
+    fetcher = PriceFetcher(quote_store=SlowStore())
+    live_fetches = []
+
+    async def fake_fetch(symbols):
+        live_fetches.append(list(symbols))
+        return {}
+
+    monkeypatch.setattr(fetcher, "_fetch_quotes_async", fake_fetch)
+
+    # Startup load still reading the store when the first refresh comes in
+    startup = threading.Thread(target=fetcher.load_stored_quotes)
+    startup.start()
+    threading.Timer(0.1, release.set).start()
+    try:
+        prices = asyncio.run(fetcher.get_multiple_prices_async(["VUAG.L"]))
+    finally:
+        release.set()
+        startup.join()
+
+    assert prices == {"VUAG.L": 90.0}
+    assert live_fetches == []
+
+def test_circuit_breaker_opens_and_backs_off():
+    from app.utils.circuit_breaker import CircuitBreaker
+
+    breaker = CircuitBreaker("yahoo", failure_threshold=2, base_cooloff=60)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.is_open()
+    breaker.record_failure()
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+    # Cool-off elapses: one half-open trial is allowed, and failing it doubles the cool-off
+    from datetime import datetime, timedelta
+    breaker.open_until = datetime.utcnow() - timedelta(seconds=1)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open()
+    assert breaker.open_until - datetime.utcnow() > timedelta(seconds=100)
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_get_price_skips_failed_sources(fetcher, monkeypatch):
+    yahoo_calls = []
+    google_calls = []
+
+    async def failing_yahoo(symbol):
+        yahoo_calls.append(symbol)
+        raise Exception("429 Client Error: Too Many Requests")
+
+    async def google(symbol):
+        google_calls.append(symbol)
+        return None
+
+    monkeypatch.setattr(fetcher, "_fetch_from_yahoo", failing_yahoo)
+    monkeypatch.setattr(fetcher, "_fetch_from_google", google)
+
+    for symbol in ["AAA", "BBB", "CCC", "DDD", "AAA"]:
+        assert fetcher.get_price(symbol) is None
+
+    # Yahoo's circuit opens after three throttled symbols; Google misses are remembered per symbol
+    assert yahoo_calls == ["AAA", "BBB", "CCC"]
+    assert google_calls == ["AAA", "BBB", "CCC", "DDD"]
+    assert fetcher.breakers["yahoo"].state == "open"
+
+
+def test_router_prefers_source_that_last_worked(fetcher, monkeypatch):
+    calls = []
+
+    async def yahoo(symbol):
+        calls.append("yahoo")
+        return None
+
+    async def google(symbol):
+        calls.append("google")
+        return (1250.0, "GBX", None)
+
+    monkeypatch.setattr(fetcher, "_fetch_from_yahoo", yahoo)
+    monkeypatch.setattr(fetcher, "_fetch_from_google", google)
+
+    assert fetcher.get_price("RR.L") == pytest.approx(12.5)
+    assert calls == ["yahoo", "google"]
+    assert fetcher.router.preferred("RR.L") == "google"
+    assert not fetcher.is_yahoo_symbol("RR.L")
+
+    fetcher._PRICE_CACHE.clear()
+    calls.clear()
+    assert fetcher.get_price("RR.L") == pytest.approx(12.5)
+    assert calls == ["google"]
+
+
+def test_scrapes_share_async_client(fetcher):
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        if request.url.host == "www.google.com":
+            return httpx.Response(200, text='<div class="YMlKec fxKbKc">$185.10</div>')
+        return httpx.Response(200, text="<span>Price (GBX)</span><span class=\"v\">355.10</span>")
+
+    fetcher.http = AsyncHttpClient(transport=httpx.MockTransport(handler))
+
+    async def run():
+        return await asyncio.gather(
+            fetcher.scrape_google_finance_async("AAPL"),
+            fetcher.scrape_ft_price_async("https://markets.ft.com/data/funds/tearsheet/summary?s=X:GBX"),
+        )
+
+    google, ft = asyncio.run(run())
+    assert google == (185.10, "USD")
+    assert ft == pytest.approx(3.551)
+    assert sorted(hosts) == ["markets.ft.com", "www.google.com"]
+
+
+def test_token_bucket_paces_requests_and_records_waits(monkeypatch):
+    from app.utils import rate_limiter
+
+    now = [100.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: now[0])
+    bucket = rate_limiter.TokenBucket("coingecko", rate=2.0, capacity=2)
+
+    # The burst goes straight through, then each request waits for its own refill slot
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits == [0.0, 0.0, pytest.approx(0.5), pytest.approx(1.0)]
+
+    now[0] += 1.5
+    assert bucket.reserve() == 0.0
+
+    stats = bucket.to_dict()
+    assert stats["acquired"] == 5
+    assert stats["waited"] == 2
+    assert stats["total_wait_seconds"] == pytest.approx(1.5)
+    assert stats["max_wait_seconds"] == pytest.approx(1.0)
+
+
+def test_aimd_limiter_grows_when_fast_and_halves_on_throttle():
+    from app.utils.concurrency_limiter import AimdLimiter
+
+    limiter = AimdLimiter("yahoo", initial=2, max_limit=4, latency_target=1.0, decrease_cooldown=60)
+
+    async def run():
+        await limiter.acquire()
+        await limiter.acquire()
+        # Window is full: the third caller queues until a slot is released
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        limiter.release(latency=0.1)
+        await waiter
+        assert limiter.in_flight == 2
+
+        for _ in range(10):
+            limiter.release(latency=0.1)
+            await limiter.acquire()
+        assert limiter.window == 4
+        await limiter.acquire()
+        await limiter.acquire()
+
+        limiter.release(throttled=True)
+        limiter.release(throttled=True)  # Same burst: only one halving within the cooldown
+        assert limiter.window == 2
+
+        limiter.release(latency=5.0)  # Slow success holds the window
+        assert limiter.window == 2
+        assert limiter.in_flight == 1
+
+    asyncio.run(run())
+
+
+def test_live_and_previous_close_come_from_one_fetch(fetcher, monkeypatch):
+    batch_calls = []
+
+    async def fake_batch(symbols):
+        batch_calls.append(list(symbols))
+        return {"VUAG.L": {"price": 9800.0, "previous_close": 9750.0, "currency": "GBp"}}
+
+    monkeypatch.setattr(fetcher, "get_yahoo_quotes_batch_async", fake_batch)
+
+    async def run():
+        quotes = await fetcher.get_multiple_quotes_async(["VUAG.L"])
+        live = await fetcher.get_multiple_prices_async(["VUAG.L"])
+        previous = await fetcher.get_multiple_prices_async(["VUAG.L"], use_previous_close=True)
+        return quotes, live, previous
+
+    quotes, live, previous = asyncio.run(run())
+
+    assert quotes["VUAG.L"] == {"last_price": pytest.approx(98.0), "previous_close": pytest.approx(97.5)}
+    assert live == {"VUAG.L": pytest.approx(98.0)}
+    assert previous == {"VUAG.L": pytest.approx(97.5)}
+    assert batch_calls == [["VUAG.L"]]
+
+
+def test_concurrent_lookups_share_one_fetch(fetcher, monkeypatch):
+    batch_calls = []
+    single_calls = []
+
+    async def slow_batch(symbols):
+        batch_calls.append(list(symbols))
+        await asyncio.sleep(0.01)
+        return {s: {"price": 100.0, "previous_close": 99.0, "currency": "GBP"} for s in symbols}
+
+    async def slow_quote(symbol):
+        single_calls.append(symbol)
+        await asyncio.sleep(0.01)
+        return {"last_price": 5.0, "previous_close": None}
+
+    monkeypatch.setattr(fetcher, "get_yahoo_quotes_batch_async", slow_batch)
+    monkeypatch.setattr(fetcher, "_fetch_quote", slow_quote)
+
+    async def run():
+        return await asyncio.gather(
+            fetcher.get_multiple_prices_async(["AAPL", "MSFT"]),
+            fetcher.get_multiple_prices_async(["MSFT", "AAPL"], use_previous_close=True),
+            fetcher.get_price_async("LU1033663649"),
+            fetcher.get_price_async("LU1033663649"),
+        )
+
+    live, previous, fund_a, fund_b = asyncio.run(run())
+
+    assert live == {"AAPL": 100.0, "MSFT": 100.0}
+    assert previous == {"AAPL": 99.0, "MSFT": 99.0}
+    assert fund_a == fund_b == 5.0
+    assert batch_calls == [["AAPL", "MSFT"]]
+    assert single_calls == ["LU1033663649"]
+    assert fetcher.inflight.to_dict()["in_flight"] == 0
+
+
+def test_price_cache_evicts_lru_and_counts_lookups():
+    from datetime import datetime, timedelta
+
+    cache = PriceCache(max_entries=2, fresh_ttl=300, stale_ttl=3600)
+    now = datetime.utcnow()
+    cache.set("AAA", {"price": 1.0, "time": now, "source": "yahoo"})
+    cache.set("BBB", {"price": 2.0, "time": now - timedelta(minutes=30), "source": "google"})
+
+    assert cache.get("AAA")["price"] == 1.0          # Hit, and AAA becomes most recent
+    assert cache.get("BBB") is None                  # Stale: a miss for fresh-only callers
+    assert cache.get("BBB", allow_stale=True)["price"] == 2.0
+
+    cache.set("CCC", {"price": 3.0, "time": now, "source": "yahoo"})
+    assert cache.peek("AAA") is None                 # Least recently used goes first
+    assert cache.peek("BBB") is not None
+
+    cache.set("DDD", {"price": 4.0, "time": now - timedelta(hours=2), "source": "ft"})
+    assert cache.get("DDD", allow_stale=True) is None  # Past the stale TTL: dropped
+
+    stats = cache.to_dict()
+    assert stats["size"] == 1
+    assert stats["by_source"] == {"yahoo": 1}
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 2)
+    assert (stats["evictions"], stats["expirations"]) == (2, 1)
+
+
+def test_fund_serves_last_known_good_when_scrapes_fail(db_engine, fetcher, monkeypatch):
+    from datetime import datetime, timedelta
+    from sqlalchemy.orm import sessionmaker
+    from app.models import PriceQuote
+    from app.utils.quote_store import QuoteStore
+
+    session_factory = sessionmaker(bind=db_engine)
+    fetcher.quote_store = QuoteStore(session_factory=session_factory)
+    fetcher.quote_store.save({
+        "GB00BYVGKV59": {"price": 3.62, "source": "ft", "time": datetime.utcnow() - timedelta(hours=20)},
+        "LU1033663649": {"price": 9.1, "source": "hl", "time": datetime.utcnow() - timedelta(days=40)},
+    })
+
+    async def failing_scrape(url):
+        return None
+
+    monkeypatch.setattr(fetcher, "scrape_ft_price_async", failing_scrape)
+    monkeypatch.setattr(fetcher, "scrape_hl_price_async", failing_scrape)
+
+    try:
+        quote = asyncio.run(fetcher.get_quote_async("GB00BYVGKV59"))
+        assert quote["last_price"] == 3.62
+        assert quote["stale"] and quote["source"] == "ft"
+        assert 19 * 3600 < quote["age_seconds"] < 21 * 3600
+        # Not re-cached as fresh
+        assert fetcher._get_cached_price("GB00BYVGKV59") is None
+
+        # Too old to trust: no price rather than a badly wrong one
+        assert fetcher.get_special_fund_price("LU1033663649") is None
+    finally:
+        with session_factory() as session:
+            session.query(PriceQuote).delete()
+            session.commit()
+
+
+def test_next_fund_valuation_skips_weekends():
+    from datetime import datetime
+    from app.utils.market_calendar import next_fund_valuation
+
+    assert next_fund_valuation(datetime(2024, 3, 5, 7, 30)) == datetime(2024, 3, 5, 8, 0)   # Tue before 08:00
+    assert next_fund_valuation(datetime(2024, 3, 5, 9, 0)) == datetime(2024, 3, 6, 8, 0)    # Tue after
+    assert next_fund_valuation(datetime(2024, 3, 8, 12, 0)) == datetime(2024, 3, 11, 8, 0)  # Fri -> Mon
+
+
+def test_fund_registry_drives_sources_and_nav_is_cached(db_engine, fetcher, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+    from app.models import SpecialFund
+    from app.utils.fund_registry import FundRegistry, DEFAULT_SPECIAL_FUNDS
+
+    session_factory = sessionmaker(bind=db_engine)
+    registry = FundRegistry(session_factory=session_factory)
+    try:
+        with session_factory() as session:
+            session.add(SpecialFund(isin="GB00TEST0001", name="Test Fund", ft_url="https://ft/x",
+                                    hl_url="https://hl/x", preferred_source="hl"))
+            session.commit()
+
+        fetcher.fund_registry = registry
+        assert fetcher.load_special_funds() == len(DEFAULT_SPECIAL_FUNDS) + 1
+        assert list(fetcher._sources("GB00TEST0001")) == ["hl", "ft"]
+
+        scrapes = []
+
+        async def hl(url):
+            scrapes.append(url)
+            return 2.5
+
+        monkeypatch.setattr(fetcher, "scrape_hl_price_async", hl)
+
+        assert fetcher.get_price("GB00TEST0001") == 2.5
+        # Beyond the normal 5 minute TTL, the NAV still holds until the next valuation point
+        from datetime import datetime, timedelta
+        entry = fetcher._PRICE_CACHE.peek("GB00TEST0001")
+        entry["time"] = datetime.utcnow() - timedelta(hours=1)
+        assert entry["expires"] > datetime.utcnow()
+        assert fetcher.get_price("GB00TEST0001") == 2.5
+        assert scrapes == ["https://hl/x"]
+    finally:
+        with session_factory() as session:
+            session.query(SpecialFund).delete()
+            session.commit()
+
+
+def test_pluggable_provider_shares_cache_normalizer_and_stats(fetcher, monkeypatch):
+    from app.utils.price_providers import PriceProvider
+
+    class StaticProvider(PriceProvider):
+        name = "static"
+
+        def handles(self, symbol):
+            return symbol.endswith(".DE")
+
+        async def fetch(self, symbol):
+            return (100.0, "EUR", 98.0)
+
+    async def yahoo(symbol):
+        return None
+
+    monkeypatch.setattr(fetcher, "_fetch_from_yahoo", yahoo)
+    fetcher.add_provider(StaticProvider(fetcher), before="yahoo")
+
+    assert list(fetcher._sources("SAP.DE")) == ["static", "yahoo", "google"]
+    assert list(fetcher._sources("AAPL")) == ["yahoo", "google"]
+
+    # EUR normalized to GBP by the shared normalizer, then served from the shared cache
+    assert fetcher.get_price("SAP.DE") == pytest.approx(85.0)
+    assert fetcher.get_price("SAP.DE", use_previous_close=True) == pytest.approx(83.3)
+
+    stats = fetcher.provider_stats()
+    assert stats["static"]["calls"] == 1
+    assert stats["static"]["successes"] == 1
+    assert stats["yahoo"]["calls"] == 0
+    assert "static" in fetcher.breakers
+
+
+def test_slow_source_is_hedged_after_its_p90(fetcher, monkeypatch):
+    yahoo_done = []
+
+    async def slow_yahoo(symbol):
+        try:
+            await asyncio.sleep(5)
+        finally:
+            yahoo_done.append(symbol)
+        return (150.0, "USD", 148.0)
+
+    async def google(symbol):
+        return (152.0, "USD", None)
+
+    monkeypatch.setattr(fetcher, "_fetch_from_yahoo", slow_yahoo)
+    monkeypatch.setattr(fetcher, "_fetch_from_google", google)
+    # Yahoo usually answers in ~50ms, so 5s is way past its budget
+    for _ in range(10):
+        fetcher.providers["yahoo"].stats.record("success", 0.05)
+    assert fetcher.hedge_budget(fetcher.providers["yahoo"]) == fetcher._HEDGE_MIN_BUDGET
+
+    started = time.monotonic()
+    assert fetcher.get_price("AAPL") == pytest.approx(121.6)
+    assert time.monotonic() - started < 2
+    assert fetcher._PRICE_CACHE.get("AAPL")["source"] == "google"
+
+    stats = fetcher.provider_stats()
+    assert stats["google"]["hedges"] == 1
+    assert stats["google"]["hedge_wins"] == 1
+    assert stats["yahoo"]["cancelled"] == 1
+    assert yahoo_done == ["AAPL"]
+
+
+def test_expired_deadline_refuses_provider_calls(fetcher, monkeypatch):
+    from app.utils.deadline import Deadline
+
+    requests_made = []
+
+    async def fake_get(url, **kwargs):
+        requests_made.append(url)
+        raise AssertionError("request made past the deadline")
+
+    monkeypatch.setattr(fetcher.http, "get", fake_get)
+
+    async def run():
+        with Deadline(0).use():
+            return await fetcher._fetch_quote("AAPL")
+
+    assert asyncio.run(run()) is None
+    assert requests_made == []
+    stats = fetcher.provider_stats()
+    assert stats["yahoo"]["skipped"] == 1
+    assert stats["yahoo"]["errors"] == 0
+    # Not held against the symbol or the provider
+    assert not fetcher.negative_cache.is_blocked("AAPL", "yahoo")
+    assert fetcher.breakers["yahoo"].state == "closed"
+
+
+def test_cancelled_half_open_call_hands_back_the_trial(fetcher, monkeypatch):
+    from datetime import datetime, timedelta
+
+    breaker = fetcher.breakers["google"]
+    breaker.open_count = 1
+    breaker.open_until = datetime.utcnow() - timedelta(seconds=1)
+
+    async def hanging_get(url, **kwargs):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(fetcher.http, "get", hanging_get)
+
+    async def run():
+        task = asyncio.ensure_future(fetcher._http_get("google", "https://www.google.com/finance/quote/AAPL"))
+        await asyncio.sleep(0.05)
+        assert breaker.trial_in_flight
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert breaker.state == "half_open"
+    assert not breaker.trial_in_flight
+    assert breaker.allow()
+
+
+def test_deadline_cut_half_open_calls_hand_back_the_trial(fetcher, monkeypatch):
+    from datetime import datetime, timedelta
+    from app.utils.deadline import Deadline, DeadlineExceeded
+
+    breaker = fetcher.breakers["google"]
+    url = "https://www.google.com/finance/quote/AAPL"
+
+    def half_open():
+        breaker.open_count = 1
+        breaker.open_until = datetime.utcnow() - timedelta(seconds=1)
+        breaker.trial_in_flight = False
+
+    async def slow_acquire():
+        await asyncio.sleep(0.1)
+
+    async def times_out(url, **kwargs):
+        await asyncio.sleep(0.1)
+        raise httpx.ReadTimeout("timed out")
+
+    async def call():
+        with Deadline(0.05).use():
+            await fetcher._http_get("google", url)
+
+    # Deadline passes while queueing on the rate limit
+    half_open()
+    acquire = fetcher.rate_limits["google"].acquire
+    monkeypatch.setattr(fetcher.rate_limits["google"], "acquire", slow_acquire)
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(call())
+    assert not breaker.trial_in_flight and breaker.allow()
+
+    # Deadline passes mid-request and the request times out
+    half_open()
+    monkeypatch.setattr(fetcher.rate_limits["google"], "acquire", acquire)
+    monkeypatch.setattr(fetcher.http, "get", times_out)
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(call())
+    assert breaker.state == "half_open"
+    assert not breaker.trial_in_flight and breaker.allow()
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from app.utils.http_client import AsyncHttpClient
+from app.utils.price_cache import PriceCache
+from app.utils.price_fetcher import PriceFetcher
+from app.utils.provider_replay import ProviderReplay, RecordingTransport, canned_providers, synthetic_price
+
+
+@pytest.fixture
+def offline_fetcher(monkeypatch):
+    """PriceFetcher factory over a ProviderReplay, with empty class-level caches"""
+    monkeypatch.setattr(PriceFetcher, "_PRICE_CACHE", PriceCache())
+    monkeypatch.setattr(PriceFetcher, "_CURRENCY_CACHE", {})
+    monkeypatch.setattr(PriceFetcher, "_COINGECKO_CACHE", {"time": None, "data": {}})
+
+    def make(replay):
+        return PriceFetcher(http_client=AsyncHttpClient(transport=replay.transport()), use_yfinance=False)
+    return make
+
+
+def test_refresh_runs_offline_against_canned_providers(offline_fetcher):
+    replay = canned_providers()
+    fetcher = offline_fetcher(replay)
+
+    quotes = asyncio.run(fetcher.get_multiple_quotes_async(["AAPL", "VUAG.L", "BTC", "GB00BYVGKV59"]))
+
+    assert quotes["AAPL"]["last_price"] == pytest.approx(190.0 * 0.79)
+    assert quotes["AAPL"]["previous_close"] == pytest.approx(188.5 * 0.79)
+    assert quotes["VUAG.L"]["last_price"] == pytest.approx(89.5)
+    assert quotes["BTC"]["last_price"] == pytest.approx(52000.0)
+    assert quotes["GB00BYVGKV59"]["last_price"] == pytest.approx(synthetic_price("GB00BYVGKV59", 100.0, 5000.0) / 100)
+
+    counts = replay.counts()
+    assert counts["yahoo"] >= 2  # Spark batch for the stocks, FX matrix
+    assert counts["coingecko"] == 1
+    assert "other" not in counts
+
+
+def test_injected_429s_fall_through_to_the_next_source(offline_fetcher):
+    replay = canned_providers(throttle={"yahoo": 1.0})
+    fetcher = offline_fetcher(replay)
+
+    assert fetcher.get_price("MSFT") == pytest.approx(410.0 * 0.79)
+    assert fetcher._PRICE_CACHE.get("MSFT")["source"] == "google"
+    assert all(status == 429 for _, url, status in replay.requests if "yahoo" in url)
+
+
+def test_t212_and_mempool_through_replay():
+    from app.services.crypto_service import CryptoService
+    from app.services.trading212_service import Trading212Service
+
+    replay = canned_providers(latency={"t212": 0.01})
+
+    positions = Trading212Service("key", "secret", session=replay.session()).fetch_portfolio()
+    assert [p["ticker"] for p in positions] == ["AAPL_US_EQ", "VUAGl_EQ"]
+
+    balance = asyncio.run(CryptoService(None, transport=replay.transport()).fetch_balance(["bc1qreplay"]))
+    assert balance > 0
+    assert replay.counts() == {"t212": 1, "mempool": 1}
+
+
+def test_recorded_cassette_replays_without_routes(tmp_path):
+    import httpx
+
+    source = canned_providers()
+    recorder = ProviderReplay()
+
+    async def record():
+        async with httpx.AsyncClient(transport=RecordingTransport(recorder, inner=source.transport())) as client:
+            return (await client.get("https://query1.finance.yahoo.com/v8/finance/chart/AAPL",
+                                     params={"range": "5d", "interval": "1d"})).json()
+
+    recorded = asyncio.run(record())
+    recorder.save(tmp_path / "cassette.json")
+
+    replay = ProviderReplay().load(tmp_path / "cassette.json")
+    with httpx.Client(transport=replay.transport()) as client:
+        # Same request, query parameters in a different order
+        response = client.get("https://query1.finance.yahoo.com/v8/finance/chart/AAPL?interval=1d&range=5d")
+        assert response.json() == recorded
+        assert client.get("https://query1.finance.yahoo.com/v8/finance/chart/MSFT").status_code == 404
+
+
+def test_scheduler_tick_runs_offline(db_engine, offline_fetcher, monkeypatch):
+    from datetime import datetime
+    from sqlalchemy.orm import sessionmaker
+    from app.models import Investment, NetWorthSnapshot
+    from app.services.scheduler_service import SchedulerService
+    from app.utils import price_fetcher as pf
+
+    monkeypatch.setattr(pf, "_shared_fetcher", offline_fetcher(canned_providers()))
+    session = sessionmaker(bind=db_engine)()
+    try:
+        session.add(Investment(user_id=97, platform="Degiro", name="Microsoft", symbol="MSFT",
+                               holdings=2.0, current_price=1.0, last_updated=datetime(2024, 1, 1)))
+        session.commit()
+
+        stages_seen = []
+        result = asyncio.run(SchedulerService(session, user_id=97).run_tick(on_stage=stages_seen.append,
+                                                                              use_yfinance=False))
+
+        assert stages_seen == ["prices", "t212", "snapshot", "cleanup"]
+        assert list(result["stages"]) == stages_seen
+        assert result["prices"]["updated_count"] == 1
+        assert not result["t212_synced"]
+        snapshot = session.query(NetWorthSnapshot).filter(NetWorthSnapshot.user_id == 97).one()
+        assert snapshot.total_amount == pytest.approx(2 * 410.0 * 0.79)
+    finally:
+        session.query(NetWorthSnapshot).filter(NetWorthSnapshot.user_id == 97).delete()
+        session.query(Investment).filter(Investment.user_id == 97).delete()
+        session.commit()
+        session.close()
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+from app.utils.price_cache import PriceCache
+from app.utils.price_fetcher import PriceFetcher
+from app.utils.refresh_planner import RefreshPlanner
+
+
+def test_refresh_planner_uses_class_targets_and_max_age(monkeypatch):
+    monkeypatch.setattr(PriceFetcher, "_PRICE_CACHE", PriceCache())
+    planner = RefreshPlanner(PriceFetcher())
+    # Tuesday 12:00 UTC: LSE open, US closed since yesterday's session settled
+    now = datetime(2024, 3, 5, 12, 0)
+    priced_at = {
+        "BTC": now - timedelta(minutes=2),
+        "VUAG.L": now - timedelta(minutes=10),
+        "AAPL": now - timedelta(hours=12),
+        "GB00BYVGKV59": now - timedelta(hours=3),
+        "NEW.L": None,
+    }
+
+    due, fresh = planner.plan(priced_at, now=now)
+    assert sorted(due) == ["NEW.L", "VUAG.L"]
+    assert sorted(fresh) == ["AAPL", "BTC", "GB00BYVGKV59"]
+
+    due, fresh = planner.plan(priced_at, max_age=60, now=now)
+    assert fresh == []
+    due, fresh = planner.plan(priced_at, max_age=0, now=now)
+    assert len(due) == 5
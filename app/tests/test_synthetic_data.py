@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import CryptoWallet, Investment, MonthlyFinancialRecord, NetWorthSnapshot, PlatformCash
+from app.utils.synthetic_data import SyntheticDataGenerator
+
+
+def generate(seed, **options):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    counts = SyntheticDataGenerator(db, seed=seed, now=datetime(2024, 6, 3, 12, 0), batch_size=50).generate(**options)
+    rows = {
+        model.__tablename__: [tuple(getattr(row, c.name) for c in model.__table__.columns)
+                              for row in db.query(model).order_by(model.id)]
+        for model in (Investment, PlatformCash, MonthlyFinancialRecord, NetWorthSnapshot, CryptoWallet)
+    }
+    db.close()
+    return counts, rows
+
+
+def test_generator_is_deterministic_by_seed():
+    options = dict(users=2, holdings=15, months=6, snapshots=120, wallets=1, t212_sync=False)
+    counts, rows = generate(7, **options)
+
+    assert counts["users"] == 2
+    assert counts["investments"] == 30
+    assert len(rows["investments"]) == 32  # Plus one per wallet
+    assert counts["snapshots"] == 240
+    assert counts["monthly_records"] == 12
+    assert counts["wallet_snapshots"] == 2 * 90
+    # Snapshots are 5 minutes apart going back from now, newest first
+    first, second = rows["net_worth_snapshots"][:2]
+    assert (first[2] - second[2]).total_seconds() == 300
+
+    assert generate(7, **options) == (counts, rows)
+    assert generate(8, **options)[1]["investments"] != rows["investments"]
@@ -0,0 +1,136 @@
+from typing import Dict, Tuple, Optional
+from datetime import datetime, timedelta
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the provider's circuit is open"""
+
+    def __init__(self, provider: str):
+        super().__init__(f"Circuit open for {provider}")
+        self.provider = provider
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+    Opens after `failure_threshold` consecutive failures, then refuses calls for a cool-off
+    that doubles each time the provider fails again (up to `max_cooloff` seconds).
+    After the cool-off a single trial call is let through (half-open).
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, base_cooloff: int = 60, max_cooloff: int = 1800):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooloff = base_cooloff
+        self.max_cooloff = max_cooloff
+
+        self.consecutive_failures = 0
+        self.open_count = 0  # Times opened without a success in between (drives the back-off)
+        self.open_until: Optional[datetime] = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.open_until is None:
+            return 'closed'
+        if datetime.utcnow() < self.open_until:
+            return 'open'
+        return 'half_open'
+
+    def is_open(self) -> bool:
+        """True while calls should be skipped (does not consume the half-open trial)"""
+        with self._lock:
+            if self.open_until is None:
+                return False
+            if datetime.utcnow() < self.open_until:
+                return True
+            return self.trial_in_flight
+
+    def allow(self) -> bool:
+        """Check whether a call may proceed; claims the trial slot when half-open"""
+        with self._lock:
+            if self.open_until is None:
+                return True
+            if datetime.utcnow() < self.open_until or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        """Give back a claimed half-open trial without a verdict (call cancelled or never made)"""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.open_until is not None:
+                logger.info(f"CircuitBreaker: {self.name} recovered, closing circuit")
+            self.consecutive_failures = 0
+            self.open_count = 0
+            self.open_until = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            half_open_trial = self.trial_in_flight
+            self.trial_in_flight = False
+
+            if half_open_trial or self.consecutive_failures >= self.failure_threshold:
+                cooloff = min(self.base_cooloff * (2 ** self.open_count), self.max_cooloff)
+                self.open_count += 1
+                self.open_until = datetime.utcnow() + timedelta(seconds=cooloff)
+                logger.warning(f"CircuitBreaker: {self.name} opened for {cooloff}s after {self.consecutive_failures} failures")
+
+    def to_dict(self) -> Dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'open_until': self.open_until.isoformat() if self.open_until else None
+        }
+
+
+class NegativeCache:
+    """
+    Remembers (symbol, source) lookups that failed, so they are skipped for a while.
+    The cool-off doubles with each repeated failure (base_ttl, 2x, 4x ... up to max_ttl).
+    """
+
+    def __init__(self, base_ttl: int = 300, max_ttl: int = 21600):
+        self.base_ttl = base_ttl
+        self.max_ttl = max_ttl
+        # {(symbol, source): {'failures': int, 'until': datetime}}
+        self._entries: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def is_blocked(self, symbol: str, source: str) -> bool:
+        with self._lock:
+            entry = self._entries.get((symbol, source))
+            return bool(entry and datetime.utcnow() < entry['until'])
+
+    def record_failure(self, symbol: str, source: str):
+        with self._lock:
+            entry = self._entries.get((symbol, source))
+            failures = entry['failures'] + 1 if entry else 1
+            ttl = min(self.base_ttl * (2 ** (failures - 1)), self.max_ttl)
+            self._entries[(symbol, source)] = {
+                'failures': failures,
+                'until': datetime.utcnow() + timedelta(seconds=ttl)
+            }
+
+    def record_success(self, symbol: str, source: str):
+        with self._lock:
+            self._entries.pop((symbol, source), None)
+
+    def to_dict(self) -> Dict[str, Dict]:
+        now = datetime.utcnow()
+        with self._lock:
+            return {
+                f"{symbol}:{source}": {'failures': e['failures'], 'until': e['until'].isoformat()}
+                for (symbol, source), e in self._entries.items()
+                if now < e['until']
+            }
@@ -0,0 +1,93 @@
+from collections import deque
+from typing import Dict, Optional
+import asyncio
+import threading
+import time
+
+class AimdLimiter:
+    """
+    Adaptive concurrency window for one provider (AIMD).
+    Every fast 2xx response grows the window by 1/window (about +1 per window's worth of
+    successes); a 429 or timeout halves it, at most once per `decrease_cooldown` seconds so
+    one throttled burst counts as a single signal. Slow successes leave it unchanged.
+    """
+
+    def __init__(self, name: str, initial: int = 4, min_limit: int = 1, max_limit: int = 16,
+                 latency_target: float = 2.0, decrease_cooldown: float = 1.0):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease_cooldown = decrease_cooldown
+
+        self.in_flight = 0
+        self.last_decrease = None
+        self.increases = 0
+        self.decreases = 0
+        # Waiting callers: (loop, future), granted a slot in FIFO order
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def window(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_flight < self.window and not self._waiters:
+                self.in_flight += 1
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was handed over just as we were cancelled
+                self.release()
+            raise
+
+    def release(self, throttled: bool = False, latency: Optional[float] = None):
+        """Free a slot and feed back the outcome (throttled, or a latency for a successful call)"""
+        with self._lock:
+            self.in_flight -= 1
+            if throttled:
+                now = time.monotonic()
+                if self.last_decrease is None or now - self.last_decrease >= self.decrease_cooldown:
+                    self.limit = max(float(self.min_limit), self.limit / 2)
+                    self.last_decrease = now
+                    self.decreases += 1
+            elif latency is not None and latency <= self.latency_target:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+                self.increases += 1
+            self._wake_waiters()
+
+    def _wake_waiters(self):
+        """Hand free slots to queued callers (lock held)"""
+        while self._waiters and self.in_flight < self.window:
+            loop, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            loop.call_soon_threadsafe(self._grant, future)
+
+    def _grant(self, future: asyncio.Future):
+        if future.done():
+            # Cancelled before the hand-over landed; give the slot back
+            self.release()
+        else:
+            future.set_result(True)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'window': self.window,
+                'limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'waiting': len(self._waiters),
+                'increases': self.increases,
+                'decreases': self.decreases
+            }
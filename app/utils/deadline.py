@@ -0,0 +1,46 @@
+from typing import Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+
+class DeadlineExceeded(Exception):
+    """Raised when a provider call would start after the current deadline"""
+
+
+class Deadline:
+    """
+    Point in time (monotonic) a piece of work must finish by, e.g. one scheduler refresh.
+    Installed with `use()`, it applies to every provider call made from that task and the
+    tasks it starts: calls past it are refused and request timeouts are capped to what's left.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def cap(self, timeout: Optional[float]) -> float:
+        """A request timeout that doesn't run past the deadline"""
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    @contextmanager
+    def use(self):
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar('deadline', default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the running task, if any"""
+    return _current.get()
@@ -0,0 +1,80 @@
+from typing import Dict, Optional
+import logging
+
+from app.database import SessionLocal
+from app.models import SpecialFund
+
+logger = logging.getLogger(__name__)
+
+# Seeded into the special_funds table on startup (existing rows are left alone)
+DEFAULT_SPECIAL_FUNDS = {
+    'GB00BYVGKV59': {
+        'name': 'Baillie Gifford Positive Change Class B - Acc',
+        'hl_url': 'https://www.hl.co.uk/funds/fund-discounts,-prices--and--factsheets/search-results/b/baillie-gifford-positive-change-class-b-accumulation',
+        'ft_url': 'https://markets.ft.com/data/funds/tearsheet/summary?s=GB00BYVGKV59:GBX',
+        'preferred_source': 'ft'
+    },
+    'LU1033663649': {
+        'name': 'Fidelity Global Technology Class W - Acc',
+        'hl_url': 'https://www.hl.co.uk/funds/fund-discounts,-prices--and--factsheets/search-results/f/fidelity-global-technology-w-gbp-accumulation',
+        'ft_url': 'https://markets.ft.com/data/funds/tearsheet/summary?s=LU1033663649:GBP',
+        'preferred_source': 'ft'
+    },
+    'LU0345781172': {
+        'name': 'Ninety One GSF Global Natural Resources Class I - Acc',
+        'hl_url': 'https://www.hl.co.uk/funds/fund-discounts,-prices--and--factsheets/search-results/n/ninety-one-gsf-global-natural-resources-class-i-accumulation',
+        'ft_url': 'https://markets.ft.com/data/funds/tearsheet/performance?s=LU0954591375:GBP',
+        'preferred_source': 'ft'
+    },
+    'GB00BMN91T34': {
+        'name': 'UBS S&P 500 Index Class C - Acc',
+        'hl_url': 'https://www.hl.co.uk/funds/fund-discounts,-prices--and--factsheets/search-results/u/ubs-s-and-p-500-index-accumulation',
+        'ft_url': 'https://markets.ft.com/data/funds/tearsheet/summary?s=GB00BMN91T34:GBP',
+        'preferred_source': 'ft'
+    }
+}
+
+class FundRegistry:
+    """Reads and seeds the special_funds table"""
+    
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory or SessionLocal
+
+    def load(self) -> Optional[Dict[str, Dict]]:
+        """Return {isin: fund info} for active funds, or None if the table can't be read"""
+        db = self.session_factory()
+        try:
+            funds = {}
+            for row in db.query(SpecialFund).filter(SpecialFund.is_active == True).all():
+                info = {'name': row.name, 'quoted_in_pence': bool(row.quoted_in_pence)}
+                for field in ('hl_url', 'ft_url', 'yahoo_symbol', 'preferred_source'):
+                    value = getattr(row, field)
+                    if value:
+                        info[field] = value
+                funds[row.isin] = info
+            return funds
+        except Exception as e:
+            logger.warning(f"FundRegistry: Failed to load special funds: {e}")
+            return None
+        finally:
+            db.close()
+
+    def seed_defaults(self) -> int:
+        """Insert any DEFAULT_SPECIAL_FUNDS missing from the table. Returns rows added."""
+        db = self.session_factory()
+        try:
+            existing = {isin for (isin,) in db.query(SpecialFund.isin).all()}
+            added = 0
+            for isin, info in DEFAULT_SPECIAL_FUNDS.items():
+                if isin in existing:
+                    continue
+                db.add(SpecialFund(isin=isin, **info))
+                added += 1
+            db.commit()
+            return added
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"FundRegistry: Failed to seed special funds: {e}")
+            return 0
+        finally:
+            db.close()
@@ -0,0 +1,113 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+from datetime import datetime
+import logging
+
+from app.utils.singleflight import SingleFlight
+from app.utils.yahoo_client import YahooClient
+
+logger = logging.getLogger(__name__)
+
+class FxService:
+    """
+    Matrix of FX rates to GBP (USD, EUR, CHF, JPY), fetched together in one Yahoo spark
+    request per refresh and cached for `ttl` seconds. Currencies the batch misses go to
+    their fallback fetcher (if any), then keep their last rate, then a static rate.
+    Concurrent refreshes on a loop share one fetch.
+    """
+
+    CURRENCIES = ('USD', 'EUR', 'CHF', 'JPY')
+    # Rates that never need fetching (pence quotes count as GBP / 100)
+    FIXED_RATES = {'GBP': 1.0, 'GBX': 0.01, 'GBp': 0.01}
+    # Last resort, only used until the first successful fetch
+    STATIC_RATES = {'USD': 0.75, 'EUR': 0.85, 'CHF': 0.9, 'JPY': 0.005}
+
+    def __init__(self, yahoo: YahooClient, ttl: int = 900, inflight: Optional[SingleFlight] = None,
+                 fallbacks: Optional[Dict[str, Callable[[], Awaitable[Optional[float]]]]] = None):
+        self.yahoo = yahoo
+        self.ttl = ttl
+        self.inflight = inflight or SingleFlight()
+        self.fallbacks = fallbacks or {}
+
+        self.rates: Dict[str, float] = {}
+        self.sources: Dict[str, str] = {}
+        self.updated: Optional[datetime] = None
+        self.refreshes = 0
+
+    @staticmethod
+    def pair(currency: str) -> str:
+        return f"{currency}GBP=X"
+
+    def is_fresh(self) -> bool:
+        return bool(self.updated and (datetime.utcnow() - self.updated).total_seconds() < self.ttl)
+
+    async def get_rates_async(self) -> Dict[str, float]:
+        """{currency: GBP per unit} for every supported currency, refreshed when older than ttl"""
+        if not self.is_fresh():
+            await self.inflight.do('fx', 'matrix', self._refresh)
+        return self.current()
+
+    def current(self) -> Dict[str, float]:
+        """Rates as they stand, without fetching (static rates for anything never fetched)"""
+        return {**self.STATIC_RATES, **self.rates, **self.FIXED_RATES}
+
+    async def _refresh(self):
+        rates = {}
+        sources = {}
+        try:
+            quotes = await self.yahoo.get_quotes([self.pair(c) for c in self.CURRENCIES])
+        except Exception as e:
+            logger.warning(f"FX batch fetch failed: {e}")
+            quotes = {}
+        for currency in self.CURRENCIES:
+            quote = quotes.get(self.pair(currency))
+            if quote and quote['price'] > 0:
+                rates[currency] = quote['price']
+                sources[currency] = 'yahoo'
+
+        for currency in self.CURRENCIES:
+            if currency in rates or currency not in self.fallbacks:
+                continue
+            try:
+                rate = await self.fallbacks[currency]()
+            except Exception as e:
+                logger.warning(f"FX fallback failed for {currency}: {e}")
+                rate = None
+            if rate:
+                rates[currency] = rate
+                sources[currency] = 'fallback'
+
+        missing = [c for c in self.CURRENCIES if c not in rates]
+        if missing:
+            logger.warning(f"FX: no fresh rate for {', '.join(missing)}, keeping last known")
+
+        self.rates.update(rates)
+        self.sources.update(sources)
+        self.updated = datetime.utcnow()
+        self.refreshes += 1
+
+    @staticmethod
+    def _key(currency: Optional[str]) -> str:
+        # 'GBp' (pence) differs from 'GBP' only by case
+        return currency if currency == 'GBp' else (currency or '').upper()
+
+    def rate(self, currency: Optional[str]) -> Optional[float]:
+        """GBP per unit of currency from the current matrix (None for unsupported currencies)"""
+        return self.current().get(self._key(currency))
+
+    def convert(self, amounts: Sequence[float], currencies: Sequence[Optional[str]]) -> List[Optional[float]]:
+        """Convert amounts[i] in currencies[i] to GBP with the current matrix (None where unsupported)"""
+        rates = self.current()
+        converted = []
+        for amount, currency in zip(amounts, currencies):
+            rate = rates.get(self._key(currency))
+            converted.append(amount * rate if amount is not None and rate is not None else None)
+        return converted
+
+    def to_dict(self) -> Dict:
+        return {
+            'rates': self.current(),
+            'sources': {c: self.sources.get(c, 'static') for c in self.CURRENCIES},
+            'updated': self.updated.isoformat() if self.updated else None,
+            'fresh': self.is_fresh(),
+            'refreshes': self.refreshes
+        }
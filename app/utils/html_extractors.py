@@ -0,0 +1,189 @@
+from typing import Any, List, Optional, Pattern, Tuple
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StreamingExtractor:
+    """
+    Incremental price extractor over an HTML stream.
+    Patterns are precompiled and ordered by priority (0 = best). Each chunk is scanned only
+    from a small overlap before the new text onwards, and scanning stops as soon as a
+    match for one of the DECISIVE patterns is found. Otherwise the best match seen (lowest
+    priority, earliest in the page) wins once the stream ends - the same result as running
+    each pattern over the whole page in order, without waiting for the rest of the download.
+    """
+
+    # How far back each scan starts, so matches spanning chunk boundaries are still found
+    OVERLAP = 1024
+    PATTERNS: List[Tuple[Pattern, Any]] = []
+    # Priorities specific enough to take as soon as they're seen
+    DECISIVE: Tuple[int, ...] = (0,)
+
+    def __init__(self):
+        self.text = ''
+        self.done = False
+        self._best = None  # (priority, start, value)
+
+    def feed(self, chunk: str) -> bool:
+        """Scan the next chunk. Returns True once the result can't improve (stop reading)."""
+        if self.done or not chunk:
+            return self.done
+        start = self._rescan_from()
+        self.text += chunk
+        self._scan(start, final=False)
+        return self.done
+
+    def close(self) -> Any:
+        """Finish the stream and return the extracted value (or None)"""
+        if not self.done:
+            self._scan(self._rescan_from(), final=True)
+            self.done = True
+        return self._best[2] if self._best else None
+
+    def extract(self, html: str) -> Any:
+        """Run over a complete document"""
+        self.feed(html)
+        return self.close()
+
+    def _rescan_from(self) -> int:
+        """
+        Where the next scan starts: OVERLAP back from the end, moved back to a tag end ('>')
+        so a pattern never starts matching halfway through a number or word
+        """
+        start = self.text.rfind('>', 0, max(0, len(self.text) - self.OVERLAP))
+        return max(start, 0)
+
+    def _scan(self, start: int, final: bool):
+        for priority, (pattern, option) in enumerate(self.PATTERNS):
+            if self._best and self._best[0] <= priority:
+                # Anything found now would be later in the page at the same or worse priority
+                break
+            for match in pattern.finditer(self.text, start):
+                if match.end() >= len(self.text) and not final:
+                    # Could still grow with the next chunk; rescanned via the overlap
+                    break
+                value = self.parse(match, option)
+                if value is None:
+                    continue
+                if self._best is None or priority < self._best[0]:
+                    self._best = (priority, match.start(), value)
+                break
+            if self._best and self._best[0] in self.DECISIVE:
+                self.done = True
+                return
+
+    def parse(self, match, option) -> Any:
+        """Turn a match into a value, or None to keep looking"""
+        raise NotImplementedError
+
+
+class HlPriceExtractor(StreamingExtractor):
+    """Hargreaves Lansdown fund page: price shown in pence (e.g. "355.10p"), returned in GBP"""
+
+    PATTERNS = [(re.compile(pattern, re.IGNORECASE), None) for pattern in (
+        r'Sell:\s*([1-9][\d,]{3,6}\.?\d*)p',
+        r'Buy:\s*([1-9][\d,]{3,6}\.?\d*)p',
+        r'Price:\s*([1-9][\d,]{3,6}\.?\d*)p',
+        r'>([1-9][\d,]{3,6}\.?\d*)p</span>',
+        r'Sell:\s*(\d{3,4}\.?\d*)p',
+        r'Buy:\s*(\d{3,4}\.?\d*)p',
+        r'(\d{3,4}\.?\d*)p\s+(?:Buy|Sell)',
+    )]
+
+    def parse(self, match, option) -> Optional[float]:
+        try:
+            price_pence = float(match.group(1).replace(',', ''))
+        except ValueError:
+            return None
+        if 10 <= price_pence <= 500000:
+            return price_pence / 100
+        return None
+
+
+class FtPriceExtractor(StreamingExtractor):
+    """FT fund tearsheet: 'Price (GBP)' or 'Price (GBX)' (pence), returned in GBP"""
+
+    PATTERNS = [(re.compile(pattern, re.IGNORECASE), divisor) for pattern, divisor in (
+        # GBP Patterns
+        (r'Price\s*\(GBP\)</span>\s*<span[^>]*>(\d+\.?\d*)</span>', 1.0),
+        (r'Price\s*\(GBP\)\s*(\d+\.?\d*)', 1.0),
+        (r'Price\s*</span>\s*<span[^>]*>£?(\d+\.?\d*)</span>', 1.0),
+        # GBX Patterns (Pence) -> Divide by 100
+        (r'Price\s*\(GBX\)</span>\s*<span[^>]*>(\d+\.?\d*)</span>', 100.0),
+        (r'Price\s*\(GBX\)\s*(\d+\.?\d*)', 100.0),
+    )]
+    # A fund is quoted in either GBP or GBX, so either labelled price element settles it
+    DECISIVE = (0, 3)
+
+    TEXT_PATTERNS = [
+        (re.compile(r'Price\s*\(GBP\)\s*(\d+\.?\d*)', re.IGNORECASE), 1.0),
+        (re.compile(r'Price\s*\(GBX\)\s*(\d+\.?\d*)', re.IGNORECASE), 100.0),
+    ]
+
+    def parse(self, match, divisor) -> Optional[float]:
+        try:
+            return float(match.group(1)) / divisor
+        except ValueError:
+            return None
+
+    def fallback(self) -> Optional[float]:
+        """Main-text extraction for pages the HTML patterns miss (slow; imports trafilatura on first use)"""
+        if not self.text:
+            return None
+        try:
+            import trafilatura
+            extracted = trafilatura.extract(self.text)
+        except Exception as e:
+            logger.warning(f"FT text extraction failed: {e}")
+            return None
+        if not extracted:
+            return None
+        for pattern, divisor in self.TEXT_PATTERNS:
+            match = pattern.search(extracted)
+            if match:
+                return float(match.group(1)) / divisor
+        return None
+
+
+class GoogleQuoteExtractor(StreamingExtractor):
+    """Google Finance quote page: (price, currency code or None) from the YMlKec price div"""
+
+    PATTERNS = [(re.compile(r'class="YMlKec fxKbKc">([^<]+)</div>'), None)]
+
+    def parse(self, match, option) -> Optional[Tuple[float, Optional[str]]]:
+        raw_text = match.group(1)
+        # Detect currency
+        currency = None
+        if 'GBX' in raw_text:
+            currency = 'GBX'
+        elif '£' in raw_text:
+            currency = 'GBP'
+        elif '$' in raw_text:
+            currency = 'USD'
+        elif '€' in raw_text:
+            currency = 'EUR'
+        # Cleanup: Remove currency symbols ($, £, etc) and commas
+        clean = raw_text.replace('$', '').replace('£', '').replace(',', '').replace('GBX', '').strip()
+        try:
+            return (float(clean), currency)
+        except ValueError:
+            return None
+
+
+class GoogleFxExtractor(StreamingExtractor):
+    """Google Finance USD-GBP page: the YMlKec rate, else the first 4dp number in FX range"""
+
+    PATTERNS = [
+        (re.compile(r'class="YMlKec fxKbKc">([^<]+)</div>'), None),
+        (re.compile(r'>(\d+\.\d{4,})<'), (0.5, 1.0)),
+    ]
+
+    def parse(self, match, bounds) -> Optional[float]:
+        try:
+            value = float(match.group(1).replace(',', '').strip())
+        except ValueError:
+            return None
+        if bounds and not (bounds[0] < value < bounds[1]):
+            return None
+        return value
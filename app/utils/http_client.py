@@ -0,0 +1,84 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+import asyncio
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+class AsyncHttpClient:
+    """
+    Shared async HTTP transport for price, FX and scrape requests.
+    One pooled httpx.AsyncClient (keep-alive, HTTP connection reuse) per event loop,
+    plus a per-host cap on concurrent requests so one slow site can't hog the pool.
+    """
+
+    DEFAULT_TIMEOUT = 10.0
+    LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60)
+
+    # Concurrent requests allowed per host
+    HOST_LIMITS = {
+        'query1.finance.yahoo.com': 8,
+        'query2.finance.yahoo.com': 8,
+        'api.coingecko.com': 4,
+        'www.google.com': 4,
+        'markets.ft.com': 2,
+        'www.hl.co.uk': 2,
+    }
+    DEFAULT_HOST_LIMIT = 4
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        # Custom transport (e.g. httpx.MockTransport) for offline use
+        self.transport = transport
+        # {loop: {'client': httpx.AsyncClient, 'hosts': {host: asyncio.Semaphore}}}
+        self._loops: Dict[asyncio.AbstractEventLoop, Dict] = {}
+
+    def _state(self) -> Dict:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            # Drop state for loops that have since closed (e.g. sync callers using asyncio.run)
+            for old_loop in [l for l in self._loops if l.is_closed()]:
+                del self._loops[old_loop]
+            state = {
+                'client': httpx.AsyncClient(
+                    limits=self.LIMITS,
+                    timeout=self.DEFAULT_TIMEOUT,
+                    follow_redirects=True,
+                    transport=self.transport
+                ),
+                'hosts': {}
+            }
+            self._loops[loop] = state
+        return state
+
+    def _host_semaphore(self, state: Dict, host: str) -> asyncio.Semaphore:
+        semaphore = state['hosts'].get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.HOST_LIMITS.get(host, self.DEFAULT_HOST_LIMIT))
+            state['hosts'][host] = semaphore
+        return semaphore
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """GET on the pooled client, waiting for a free slot on the target host"""
+        state = self._state()
+        host = urlsplit(url).hostname or ''
+        async with self._host_semaphore(state, host):
+            return await state['client'].get(url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Streaming GET (body read incrementally; leaving early drops the rest of the download)"""
+        state = self._state()
+        host = urlsplit(url).hostname or ''
+        async with self._host_semaphore(state, host):
+            async with state['client'].stream('GET', url, **kwargs) as response:
+                yield response
+
+    async def aclose(self):
+        """Close the client belonging to the running loop"""
+        state = self._loops.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state['client'].aclose()
@@ -0,0 +1,107 @@
+from typing import Optional
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+# Funds value once a day; by this time (UTC) the previous valuation is published on FT/HL
+FUND_PRICES_PUBLISHED_HOUR = 8
+
+def next_fund_valuation(after: datetime) -> datetime:
+    """First fund publication time (weekday, FUND_PRICES_PUBLISHED_HOUR UTC) strictly after `after`"""
+    candidate = after.replace(hour=FUND_PRICES_PUBLISHED_HOUR, minute=0, second=0, microsecond=0)
+    if candidate <= after:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+def last_fund_valuation(at: datetime) -> datetime:
+    """Most recent fund publication time at or before `at`"""
+    candidate = at.replace(hour=FUND_PRICES_PUBLISHED_HOUR, minute=0, second=0, microsecond=0)
+    if candidate > at:
+        candidate -= timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate -= timedelta(days=1)
+    return candidate
+
+
+class Market:
+    """
+    When prices on a market can change. All datetimes are naive UTC, like the rest of the app.
+    Sessions run on weekdays between `open` and `close` local time; quotes keep moving for
+    `settle` after the close (closing auction, delayed feeds). Exchange holidays aren't
+    modelled, so a holiday just refreshes like a normal trading day.
+    """
+
+    def __init__(self, name: str, tz: Optional[str] = None, open: Optional[time] = None,
+                 close: Optional[time] = None, settle: timedelta = timedelta(minutes=20),
+                 always_open: bool = False):
+        self.name = name
+        self.tz = ZoneInfo(tz) if tz else None
+        self.open = open
+        self.close = close
+        self.settle = settle
+        self.always_open = always_open
+
+    def last_change(self, now: Optional[datetime] = None) -> datetime:
+        """Latest time a price could have moved: now during a session, else the end of the last one"""
+        now = now or datetime.utcnow()
+        if self.always_open:
+            return now
+
+        local = now.replace(tzinfo=timezone.utc).astimezone(self.tz)
+        day = local.date()
+        for _ in range(7):
+            if day.weekday() < 5:
+                opens = datetime.combine(day, self.open, tzinfo=self.tz)
+                if local >= opens:
+                    settled = datetime.combine(day, self.close, tzinfo=self.tz) + self.settle
+                    if local < settled:
+                        return now
+                    return settled.astimezone(timezone.utc).replace(tzinfo=None)
+            day -= timedelta(days=1)
+        return now
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        """True while prices are moving (session plus settle time)"""
+        now = now or datetime.utcnow()
+        return self.last_change(now) == now
+
+    def moved_since(self, since: datetime, now: Optional[datetime] = None) -> bool:
+        """True if the price may differ from a quote taken at `since`"""
+        return since < self.last_change(now)
+
+
+class FundMarket(Market):
+    """Daily-priced funds (OEICs/SICAVs): one new price per weekday publication"""
+
+    def __init__(self, name: str = 'FUND'):
+        super().__init__(name)
+
+    def last_change(self, now: Optional[datetime] = None) -> datetime:
+        return last_fund_valuation(now or datetime.utcnow())
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        return False
+
+
+MARKETS = {
+    'LSE': Market('LSE', 'Europe/London', time(8, 0), time(16, 30)),
+    'US': Market('US', 'America/New_York', time(9, 30), time(16, 0)), # NYSE and NASDAQ
+    'CRYPTO': Market('CRYPTO', always_open=True),
+    'FUND': FundMarket(),
+}
+
+def market_for(symbol: str, is_crypto: bool = False, is_fund: bool = False) -> Optional[Market]:
+    """
+    Market a symbol trades on: special funds and crypto by kind, '.L' on the LSE, plain tickers
+    in the US. None for other exchanges (callers should always refresh those).
+    """
+    if is_fund:
+        return MARKETS['FUND']
+    if is_crypto or symbol.endswith('-USD'):
+        return MARKETS['CRYPTO']
+    if symbol.endswith('.L'):
+        return MARKETS['LSE']
+    if '.' not in symbol and '=' not in symbol and not symbol.startswith('^'):
+        return MARKETS['US']
+    return None
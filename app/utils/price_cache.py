@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from typing import Dict, Optional
+from datetime import datetime
+import threading
+
+class PriceCache:
+    """
+    Size-bounded, TTL-aware price cache with LRU eviction.
+    Entries are dicts with at least 'price', 'time' (UTC) and 'source'. Entries younger than
+    `fresh_ttl` are hits; up to `stale_ttl` they are only returned to callers that accept stale
+    data; past that they are dropped. An entry may carry its own 'expires' (UTC) instead, e.g. a
+    fund NAV that holds until the next valuation point; its stale window then starts there.
+    Keeps hit/miss/stale/eviction counters.
+    """
+
+    def __init__(self, max_entries: int = 2000, fresh_ttl: int = 300, stale_ttl: int = 86400):
+        self.max_entries = max_entries
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _age(self, entry: Dict) -> float:
+        return (datetime.utcnow() - entry['time']).total_seconds()
+
+    def _overdue(self, entry: Dict) -> float:
+        """Seconds past the end of the entry's fresh period (negative while fresh)"""
+        expires = entry.get('expires')
+        if expires is not None:
+            return (datetime.utcnow() - expires).total_seconds()
+        return self._age(entry) - self.fresh_ttl
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return self._overdue(entry) < 0
+
+    def _is_expired(self, entry: Dict) -> bool:
+        if entry.get('expires') is not None:
+            return self._overdue(entry) >= self.stale_ttl
+        return self._age(entry) >= self.stale_ttl
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Dict]:
+        """Entry for key if fresh (or stale but within stale_ttl when allow_stale), else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if self._is_expired(entry):
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            fresh = self.is_fresh(entry)
+            if not fresh and not allow_stale:
+                self.misses += 1
+                return None
+
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def peek(self, key: str) -> Optional[Dict]:
+        """Entry for key regardless of age, without touching counters or LRU order"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key: str, entry: Dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            sources = {}
+            fresh = 0
+            for entry in self._entries.values():
+                source = entry.get('source') or 'unknown'
+                sources[source] = sources.get(source, 0) + 1
+                if self.is_fresh(entry):
+                    fresh += 1
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'fresh_entries': fresh,
+                'by_source': sources,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.stale_hits) / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
@@ -1,21 +1,77 @@
-import yfinance as yf
 import logging
 import requests
-import re
-from typing import Optional, Dict, List
-import trafilatura
+import httpx
+from typing import Optional, Dict, List, Tuple, Callable, Any
 from datetime import datetime
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import time
 import asyncio
+import threading
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, NegativeCache
+from app.utils.source_router import SourceRouter
+from app.utils.http_client import AsyncHttpClient
+from app.utils.rate_limiter import TokenBucket
+from app.utils.concurrency_limiter import AimdLimiter
+from app.utils.deadline import DeadlineExceeded, current_deadline
+from app.utils.singleflight import SingleFlight
+from app.utils.price_cache import PriceCache
+from app.utils.fund_registry import DEFAULT_SPECIAL_FUNDS
+from app.utils.market_calendar import Market, market_for, next_fund_valuation
+from app.utils.yahoo_client import YahooClient
+from app.utils.fx_service import FxService
+from app.utils.price_providers import DEFAULT_PROVIDERS, PriceProvider, RawQuote, normalize_quote
+from app.utils.html_extractors import (
+    StreamingExtractor, HlPriceExtractor, FtPriceExtractor, GoogleQuoteExtractor, GoogleFxExtractor
+)
 
 logger = logging.getLogger(__name__)
 
 class PriceFetcher:
     """Handles fetching live prices from various sources"""
     
-    def __init__(self):
-        self.usd_to_gbp_rate = None
-        self.last_rate_update = None
+    def __init__(self, quote_store=None, http_client: Optional[AsyncHttpClient] = None, fund_registry=None,
+                 use_yfinance: bool = True):
+        # Serializes FX refreshes so concurrent threads wait for one scrape instead of each doing their own
+        # (async callers share the in-flight refresh instead)
+        self._rate_lock = threading.Lock()
+        
+        # In-flight lookups: concurrent callers for the same symbol (or the FX rate) share one fetch
+        self.inflight = SingleFlight()
+        
+        # Pooled async HTTP client (keep-alive, per-host limits) shared by every request this fetcher makes
+        self.http = http_client or AsyncHttpClient()
+        # Yahoo chart/spark JSON over that client (yfinance is only the fallback; it does its own
+        # networking, so offline runs turn it off)
+        self.use_yfinance = use_yfinance
+        self.yahoo = YahooClient(functools.partial(self._http_get, 'yahoo'))
+        # GBP rates for every supported currency, one batched fetch per refresh (USD falls back to Google/yfinance)
+        self.fx = FxService(self.yahoo, ttl=self._FX_TTL_SECONDS, inflight=self.inflight,
+                            fallbacks={'USD': self._fetch_usd_to_gbp_fallback})
+        
+        # Optional persistent cache (QuoteStore): read through once, written behind after refreshes
+        self.quote_store = quote_store
+        self._store_loaded = False
+        self._store_lock = threading.Lock()
+        self._pending_writes = {}
+        self._write_lock = threading.Lock()
+        self._revalidating = set()
+        self._background_tasks = set()
+        
+        # Per-provider circuit breakers and per (symbol, source) failure memory
+        self.breakers = {name: CircuitBreaker(name) for name in self.PROVIDERS}
+        # Per-provider request rate (token buckets), shared by HTTP calls and yfinance fallbacks
+        self.rate_limits = {name: TokenBucket(name, **limit) for name, limit in self.RATE_LIMITS.items()}
+        # Per-provider in-flight window, adapted from 429/timeout/latency feedback
+        self.concurrency = {name: AimdLimiter(name, **limit) for name, limit in self.CONCURRENCY_LIMITS.items()}
+        self.negative_cache = NegativeCache()
+        # Learned per-symbol source order (which source answers, and how fast)
+        self.router = SourceRouter()
+        # Price provider pipeline: {name: provider}, in fallback order
+        self.providers: Dict[str, PriceProvider] = {}
+        for provider_cls in DEFAULT_PROVIDERS:
+            self.add_provider(provider_cls(self))
         
         # CoinGecko cryptocurrency mappings
         self.crypto_mappings = {
@@ -62,39 +118,363 @@ class PriceFetcher:
             'DOGE': 'dogecoin'
         }
         
-        # Special fund mappings for funds that don't work with yfinance
-        self.special_funds = {
-            'GB00BYVGKV59': {
-                'name': 'Baillie Gifford Positive Change Class B - Acc',
-                'hl_url': 'https://www.hl.co.uk/funds/fund-discounts,-prices--and--factsheets/search-results/b/baillie-gifford-positive-change-class-b-accumulation',
-                'ft_url': 'https://markets.ft.com/data/funds/tearsheet/summary?s=GB00BYVGKV59:GBX'
-            },
-            'LU1033663649': {
-                'name': 'Fidelity Global Technology Class W - Acc',
-                'hl_url': 'https://www.hl.co.uk/funds/fund-discounts,-prices--and--factsheets/search-results/f/fidelity-global-technology-w-gbp-accumulation',
-                'ft_url': 'https://markets.ft.com/data/funds/tearsheet/summary?s=LU1033663649:GBP'
-            },
-            'LU0345781172': {
-                'name': 'Ninety One GSF Global Natural Resources Class I - Acc',
-                'hl_url': 'https://www.hl.co.uk/funds/fund-discounts,-prices--and--factsheets/search-results/n/ninety-one-gsf-global-natural-resources-class-i-accumulation',
-                'ft_url': 'https://markets.ft.com/data/funds/tearsheet/performance?s=LU0954591375:GBP'
-            },
-            'GB00BMN91T34': {
-                'name': 'UBS S&P 500 Index Class C - Acc',
-                'hl_url': 'https://www.hl.co.uk/funds/fund-discounts,-prices--and--factsheets/search-results/u/ubs-s-and-p-500-index-accumulation',
-                'ft_url': 'https://markets.ft.com/data/funds/tearsheet/summary?s=GB00BMN91T34:GBP'
+        # Special fund mappings for funds that don't work with yfinance (the special_funds
+        # table when a FundRegistry is given, loaded once alongside the stored quotes)
+        self.fund_registry = fund_registry
+        self._funds_loaded = False
+        self.special_funds = {isin: dict(info) for isin, info in DEFAULT_SPECIAL_FUNDS.items()}
+    
+    PROVIDERS = tuple(provider.name for provider in DEFAULT_PROVIDERS)
+
+    # Allowed request rate per provider: steady requests/second and burst size
+    RATE_LIMITS = {
+        'yahoo': {'rate': 5.0, 'capacity': 10},
+        'coingecko': {'rate': 0.5, 'capacity': 5}, # Free tier allows ~30 calls/min
+        'google': {'rate': 2.0, 'capacity': 5},
+        'ft': {'rate': 1.0, 'capacity': 2},
+        'hl': {'rate': 1.0, 'capacity': 2},
+    }
+
+    # Starting and maximum concurrent requests per provider (the window adapts in between)
+    CONCURRENCY_LIMITS = {
+        'yahoo': {'initial': 4, 'max_limit': 16},
+        'coingecko': {'initial': 2, 'max_limit': 4},
+        'google': {'initial': 2, 'max_limit': 8},
+        'ft': {'initial': 2, 'max_limit': 4},
+        'hl': {'initial': 2, 'max_limit': 4},
+    }
+
+    def add_provider(self, provider: PriceProvider, before: Optional[str] = None):
+        """
+        Plug a provider into the pipeline (last, or ahead of `before`). Providers outside
+        PROVIDERS get a breaker, rate limit and concurrency window with default settings.
+        """
+        name = provider.name
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(name)
+            self.rate_limits[name] = TokenBucket(name, rate=1.0, capacity=2)
+            self.concurrency[name] = AimdLimiter(name, initial=2, max_limit=4)
+        
+        providers = {k: v for k, v in self.providers.items() if k != name}
+        if before in providers:
+            ordered = {}
+            for key, value in providers.items():
+                if key == before:
+                    ordered[name] = provider
+                ordered[key] = value
+            providers = ordered
+        else:
+            providers[name] = provider
+        self.providers = providers
+
+    def _sources(self, symbol: str) -> Dict[str, PriceProvider]:
+        """
+        Providers that can price a symbol, in default order: a special fund's preferred
+        source first, then pipeline order
+        """
+        sources = {name: provider for name, provider in self.providers.items() if provider.handles(symbol)}
+        preferred = (self.special_funds.get(symbol) or {}).get('preferred_source')
+        if preferred in sources:
+            sources = {preferred: sources.pop(preferred), **sources}
+        return sources
+
+    def provider_stats(self) -> Dict[str, Dict]:
+        """Calls, outcomes and latency per provider"""
+        return {name: provider.stats.to_dict() for name, provider in self.providers.items()}
+
+    def is_crypto(self, symbol: str) -> bool:
+        return symbol.replace('-USD', '').upper() in self.crypto_mappings
+
+    def market_for(self, symbol: str) -> Optional[Market]:
+        """Trading calendar for a symbol (None if unknown, i.e. always worth refreshing)"""
+        return market_for(symbol, is_crypto=self.is_crypto(symbol), is_fund=symbol in self.special_funds)
+
+    def lookup_symbol(self, symbol: str) -> str:
+        """Symbol as quoted on Yahoo/Google (crypto as the -USD pair)"""
+        if self.is_crypto(symbol):
+            return f"{symbol.replace('-USD', '').upper()}-USD"
+        return symbol
+
+    @asynccontextmanager
+    async def _provider_call(self, provider: str):
+        """
+        Guard one request to a provider: circuit breaker, rate limit and concurrency window.
+        The body sets call['status'] to the HTTP status; 429s, 5xx responses and transport
+        errors count as provider failures.
+        Under a deadline (see app.utils.deadline) calls that would start after it are refused
+        with DeadlineExceeded, and a timeout caused by the deadline isn't held against the provider
+        (a half-open trial cut short by it is handed back, like any other unsettled call).
+        """
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded(provider)
+        breaker = self.breakers[provider]
+        # A half-open breaker lets this one call through as its trial
+        trial = breaker.state == 'half_open'
+        if not breaker.allow():
+            raise CircuitOpenError(provider)
+        
+        # Whatever happens below without a success/failure verdict (cancelled while queueing or
+        # mid-request, e.g. losing a hedged race) must hand back a claimed half-open trial
+        settled = False
+        try:
+            await self.rate_limits[provider].acquire()
+            limiter = self.concurrency[provider]
+            await limiter.acquire()
+            if deadline is not None and deadline.expired:
+                # Spent the time queueing for the provider
+                limiter.release()
+                raise DeadlineExceeded(provider)
+            started = time.monotonic()
+            call = {'status': None}
+            try:
+                yield call
+            except httpx.TransportError as e:
+                if deadline is not None and deadline.expired:
+                    limiter.release()
+                    raise
+                limiter.release(throttled=isinstance(e, httpx.TimeoutException))
+                breaker.record_failure()
+                settled = True
+                raise
+            except BaseException:
+                limiter.release()
+                raise
+            
+            status = call['status'] or 0
+            if status == 429 or status >= 500:
+                limiter.release(throttled=True)
+                breaker.record_failure()
+            else:
+                limiter.release(latency=time.monotonic() - started)
+                breaker.record_success()
+            settled = True
+        finally:
+            if trial and not settled:
+                breaker.release_trial()
+
+    async def _http_get(self, provider: str, url: str, **kwargs) -> httpx.Response:
+        """GET through the shared async client, guarded per provider (see _provider_call)"""
+        async with self._provider_call(provider) as call:
+            response = await self.http.get(url, **self._deadline_timeout(kwargs))
+            call['status'] = response.status_code
+        return response
+
+    async def _http_extract(self, provider: str, url: str, extractor: StreamingExtractor, **kwargs) -> Any:
+        """
+        Stream a page through an extractor, stopping the download as soon as it has its value.
+        Returns the extracted value, or None for non-200 responses.
+        """
+        async with self._provider_call(provider) as call:
+            async with self.http.stream(url, **self._deadline_timeout(kwargs)) as response:
+                call['status'] = response.status_code
+                if response.status_code != 200:
+                    return None
+                async for chunk in response.aiter_text():
+                    if extractor.feed(chunk):
+                        break
+        return extractor.close()
+
+    def _deadline_timeout(self, kwargs: Dict) -> Dict:
+        """Request kwargs with the timeout capped to the current deadline"""
+        deadline = current_deadline()
+        if deadline is None:
+            return kwargs
+        return {**kwargs, 'timeout': deadline.cap(kwargs.get('timeout', AsyncHttpClient.DEFAULT_TIMEOUT))}
+
+    def _is_provider_error(self, error: Exception) -> bool:
+        """True if an exception means the provider is struggling (not just an unknown symbol)"""
+        if isinstance(error, (requests.ConnectionError, requests.Timeout, httpx.TransportError)):
+            return True
+        message = str(error).lower()
+        return any(marker in message for marker in ('429', 'too many requests', 'rate limit', 'timed out'))
+
+    async def _try_source(self, symbol: str, provider: PriceProvider) -> Optional[RawQuote]:
+        """
+        Ask one provider for a symbol, skipping it if the provider's circuit is open
+        or this symbol recently failed there. Returns the provider's result or None.
+        """
+        source = provider.name
+        breaker = self.breakers[source]
+        if breaker.is_open() or self.negative_cache.is_blocked(symbol, source):
+            provider.stats.record('skipped')
+            return None
+        
+        started = time.monotonic()
+        outcome = 'success'
+        try:
+            result = await provider.fetch(symbol)
+        except (CircuitOpenError, DeadlineExceeded):
+            provider.stats.record('skipped')
+            return None
+        except asyncio.CancelledError:
+            # Lost a hedged race: not a failure of the source
+            provider.stats.record('cancelled')
+            raise
+        except Exception as e:
+            if self._is_provider_error(e):
+                breaker.record_failure()
+            logger.warning(f"PriceFetcher: {source} failed for {symbol}: {e}")
+            result = None
+            outcome = 'error'
+        latency = time.monotonic() - started
+        
+        deadline = current_deadline()
+        if result is None and deadline is not None and deadline.expired:
+            # Cut short by the deadline: says nothing about the source or the symbol
+            provider.stats.record('skipped')
+            return None
+        if result is None:
+            provider.stats.record(outcome if outcome == 'error' else 'miss', latency)
+            self.negative_cache.record_failure(symbol, source)
+            self.router.record_failure(symbol, source)
+        else:
+            provider.stats.record('success', latency)
+            self.negative_cache.record_success(symbol, source)
+            self.router.record_success(symbol, source, latency)
+        return result
+
+    # Hedging: once a source has been waiting longer than its recent p90 latency, the next
+    # source starts alongside it. Until a provider has enough samples it gets the default budget.
+    _HEDGE_PERCENTILE = 0.9
+    _HEDGE_MIN_SAMPLES = 5
+    _HEDGE_DEFAULT_BUDGET = 3.0
+    _HEDGE_MIN_BUDGET = 0.25
+
+    def hedge_budget(self, provider: PriceProvider) -> float:
+        """Seconds to wait on a provider before hedging with the next source"""
+        if provider.stats.samples < self._HEDGE_MIN_SAMPLES:
+            return self._HEDGE_DEFAULT_BUDGET
+        return max(self._HEDGE_MIN_BUDGET, provider.stats.latency_percentile(self._HEDGE_PERCENTILE))
+
+    async def _hedged_fetch(self, symbol: str, providers: List[PriceProvider]) -> Optional[Tuple[str, RawQuote]]:
+        """
+        (source, raw quote) from the first provider to answer with a price. Providers start in
+        order; the next one starts early if the latest has run past its hedge budget, and
+        straight away when one fails. Slower calls still running are cancelled.
+        """
+        remaining = list(providers)
+        running: Dict[asyncio.Future, PriceProvider] = {}
+        first = providers[0] if providers else None
+        
+        def launch() -> PriceProvider:
+            provider = remaining.pop(0)
+            running[asyncio.ensure_future(self._try_source(symbol, provider))] = provider
+            return provider
+        
+        try:
+            latest = launch() if remaining else None
+            while running:
+                budget = self.hedge_budget(latest) if remaining else None
+                done, _ = await asyncio.wait(running, timeout=budget, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slow: hedge with the next source, keep waiting on both
+                    latest = launch()
+                    continue
+                
+                for task in done:
+                    provider = running.pop(task)
+                    result = task.result()
+                    if provider is not first:
+                        provider.stats.record_hedge(won=result is not None)
+                    if result is not None:
+                        return provider.name, result
+                
+                if remaining:
+                    latest = launch()
+            return None
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _retry_backoff(self, seconds: float) -> bool:
+        """Sleep before a retry; False (without sleeping) if the current deadline would pass first"""
+        deadline = current_deadline()
+        if deadline is not None and deadline.remaining() < seconds:
+            return False
+        await asyncio.sleep(seconds)
+        return True
+
+    COINGECKO_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price"
+    # Last multi-coin response: {'time': datetime, 'data': {coin_id: {'gbp': float, 'usd': float}}}
+    _COINGECKO_CACHE = {'time': None, 'data': {}}
+
+    async def get_crypto_prices_batch_async(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Fetch GBP prices for every crypto symbol in a single CoinGecko request.
+        The raw gbp/usd response is cached together so single lookups reuse it.
+        """
+        ids_by_symbol = {}
+        for symbol in symbols:
+            clean_symbol = symbol.replace('-USD', '').upper()
+            if clean_symbol in self.crypto_mappings:
+                ids_by_symbol[symbol] = self.crypto_mappings[clean_symbol]
+        
+        if not ids_by_symbol:
+            return {}
+        
+        coin_ids = sorted(set(ids_by_symbol.values()))
+        data = self._get_cached_coingecko(coin_ids)
+        
+        if data is None:
+            params = {'ids': ','.join(coin_ids), 'vs_currencies': 'gbp,usd'}
+            headers = {
+                'User-Agent': 'Mozilla/5.0',
+                'Accept': 'application/json'
             }
-        }
+            for attempt in range(3):
+                try:
+                    if attempt > 0 and not await self._retry_backoff(1.5 * attempt): break
+                    response = await self._http_get('coingecko', self.COINGECKO_PRICE_URL, params=params, headers=headers, timeout=15)
+                    
+                    if response.status_code == 200:
+                        data = response.json()
+                        # Replace the whole response in place: the cache is shared class-level state
+                        # and merging would pass coins left out of this batch off as fresh
+                        self._COINGECKO_CACHE.update(time=datetime.utcnow(), data=data)
+                    elif response.status_code == 429:
+                        continue
+                        
+                except CircuitOpenError:
+                    logger.info("CoinGecko circuit open, skipping batch request")
+                    break
+                except DeadlineExceeded:
+                    break
+                except Exception as e:
+                    logger.warning(f"CoinGecko batch request failed: {e}")
+                    continue
+                break
         
-        # Fallback prices (manually updated periodically)
-        self.fallback_prices = {
-            'GB00BYVGKV59': 3.5510,   # Baillie Gifford Positive Change (355.10p)
-            'LU1033663649': 9.334,    # Fidelity Global Technology (933.40p)
-            'LU0345781172': 48.24,    # Ninety One Natural Resources
-            'GB00BMN91T34': 2.1106    # UBS S&P 500 (211.06p)
-        }
-    
-    def get_crypto_price_from_coingecko(self, symbol: str) -> Optional[float]:
+        if not data:
+            return {}
+        
+        prices = {}
+        for symbol, coin_id in ids_by_symbol.items():
+            coin = data.get(coin_id) or {}
+            price = None
+            if coin.get('gbp') is not None:
+                price = float(coin['gbp'])
+            elif coin.get('usd') is not None:
+                price = await self.convert_usd_to_gbp_async(float(coin['usd']))
+            
+            if price:
+                self._cache_price(symbol, price, 'coingecko')
+                prices[symbol] = price
+        
+        logger.info(f"PriceFetcher: CoinGecko batch resolved {len(prices)}/{len(ids_by_symbol)} symbols")
+        return prices
+
+    def _get_cached_coingecko(self, coin_ids: List[str]) -> Optional[Dict]:
+        """Return the cached CoinGecko response if it is fresh and covers every coin id"""
+        cached_time = self._COINGECKO_CACHE.get('time')
+        cached_data = self._COINGECKO_CACHE.get('data') or {}
+        if not cached_time or (datetime.utcnow() - cached_time).total_seconds() >= self._CACHE_TTL_SECONDS:
+            return None
+        if not all(coin_id in cached_data for coin_id in coin_ids):
+            return None
+        return cached_data
+
+    async def get_crypto_price_from_coingecko_async(self, symbol: str) -> Optional[float]:
         """Fetch cryptocurrency price from CoinGecko"""
         try:
             clean_symbol = symbol.replace('-USD', '').upper()
@@ -102,16 +482,22 @@ class PriceFetcher:
                 return None
                 
             coin_id = self.crypto_mappings[clean_symbol]
+            
+            # Reuse the last multi-coin response if it covers this coin
+            cached_data = self._get_cached_coingecko([coin_id])
+            if cached_data and cached_data[coin_id].get('gbp') is not None:
+                return float(cached_data[coin_id]['gbp'])
+            
             url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_id}&vs_currencies=gbp"
             
             for attempt in range(3):
                 try:
-                    if attempt > 0: time.sleep(1.5 * attempt)
+                    if attempt > 0 and not await self._retry_backoff(1.5 * attempt): break
                     headers = {
                         'User-Agent': 'Mozilla/5.0',
                         'Accept': 'application/json'
                     }
-                    response = requests.get(url, headers=headers, timeout=15)
+                    response = await self._http_get('coingecko', url, headers=headers, timeout=15)
                     
                     if response.status_code == 200:
                         data = response.json()
@@ -120,6 +506,8 @@ class PriceFetcher:
                     elif response.status_code == 429:
                         continue
                         
+                except (CircuitOpenError, DeadlineExceeded):
+                    break
                 except Exception:
                     continue
                 break
@@ -127,117 +515,123 @@ class PriceFetcher:
             logger.error(f"Error fetching CoinGecko price: {e}")
         return None
 
-    # Simple in-memory cache: {symbol: {'price': float, 'time': datetime}}
-    _PRICE_CACHE = {}
     _CACHE_TTL_SECONDS = 300 # 5 Minutes Cache to be safe
+    # Older quotes (e.g. loaded from the DB after a restart) are still served while a background refresh runs
+    _STALE_TTL_SECONDS = 86400
+    # Oldest last-known-good price served when every source for a fund fails
+    _LAST_GOOD_MAX_AGE_SECONDS = 7 * 86400
+    # Shared by every fetcher: {symbol: {'price', 'previous_close', 'time' (UTC), 'source'}}, LRU-bounded
+    _PRICE_CACHE = PriceCache(max_entries=2000, fresh_ttl=_CACHE_TTL_SECONDS, stale_ttl=_STALE_TTL_SECONDS)
+    _FX_TTL_SECONDS = 900 # 15 Minutes
 
-    def get_price(self, symbol: str, use_previous_close: bool = False) -> Optional[float]:
-        """Fetch current price for a given symbol with caching"""
+    # Listing currency per symbol (doesn't change, and flat spark payloads omit it)
+    _CURRENCY_CACHE = {}
+
+    def _run_sync(self, coro):
+        """
+        Run a coroutine to completion from sync code. Uses a fresh event loop (closing its
+        HTTP client afterwards), or a worker thread if this thread already runs a loop.
+        """
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await self.http.aclose()
+        
         try:
-            if not symbol: return None
-            
-            # Check Cache
-            now = datetime.now()
-            cached = self._PRICE_CACHE.get(symbol)
-            if cached:
-                age = (now - cached['time']).total_seconds()
-                # If cache is valid (abs(age) handles partial clock weirdness, though unexpected)
-                if age < self._CACHE_TTL_SECONDS:
-                    # logger.info(f"PriceFetcher: Using cached value for {symbol} (Age: {int(age)}s)")
-                    return cached['price']
-
-            # Crypto
-            is_crypto = False
-            clean_symbol = symbol.replace('-USD', '').upper()
-            if clean_symbol in self.crypto_mappings:
-                is_crypto = True
-                price = self.get_crypto_price_from_coingecko(symbol)
-                if price:
-                    self._PRICE_CACHE[symbol] = {'price': price, 'time': now}
-                    return price
-                
-                # If CoinGecko failed, enforce -USD suffix for fallbacks
-                if not symbol.endswith('-USD'):
-                    symbol = f"{clean_symbol}-USD"
-            
-            # Special funds
-            if symbol in self.special_funds:
-                price = self.get_special_fund_price(symbol)
-                if price:
-                    self._PRICE_CACHE[symbol] = {'price': price, 'time': now}
-                    return price
-                
-            # Yahoo Finance
-            ticker = yf.Ticker(symbol)
-            
-            price = None
-            currency = 'USD' # Default assumption
-            
-            # Method 1: fast_info (Newer, faster, less prone to breaking)
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(runner())
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, runner()).result()
+
+    async def _run_blocking(self, fn: Callable, *args):
+        """Run a blocking call (yfinance) in the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(fn, *args))
+
+    async def _run_yahoo(self, fn: Callable, *args):
+        """
+        Run a blocking yfinance call guarded like any other Yahoo request (see _provider_call).
+        Throttling/connection errors from yfinance count against Yahoo like a 429.
+        """
+        if not self.use_yfinance:
+            return None
+        error = None
+        async with self._provider_call('yahoo') as call:
+            deadline = current_deadline()
             try:
-                if use_previous_close:
-                    price = ticker.fast_info.previous_close
-                    currency = ticker.fast_info.currency
-                    # logger.info(f"PriceFetcher: Got previous_close for {symbol}: {price} {currency}")
+                if deadline is not None:
+                    # Stop waiting at the deadline (the worker thread finishes on its own)
+                    result = await asyncio.wait_for(self._run_blocking(fn, *args), deadline.remaining())
                 else:
-                    price = ticker.fast_info.last_price
-                    currency = ticker.fast_info.currency
-                    # logger.info(f"PriceFetcher: Got fast_info for {symbol}: {price} {currency}")
+                    result = await self._run_blocking(fn, *args)
             except Exception as e:
-                # logger.warning(f"PriceFetcher: fast_info failed for {symbol}: {e}")
-                pass
-            
-            # Method 2: History (Reliable Fallback)
-            if price is None:
-                try:
-                    hist = ticker.history(period="5d")
-                    if not hist.empty:
-                        price = float(hist['Close'].iloc[-1])
-                        meta = ticker.history_metadata
-                        if meta and 'currency' in meta:
-                            currency = meta['currency']
-                        elif symbol.endswith('.L'):
-                            currency = 'GBp'
-                        # logger.info(f"PriceFetcher: Got history price for {symbol}: {price} {currency}")
-                except Exception as e:
-                    # logger.warning(f"PriceFetcher: history failed for {symbol}: {e}")
-                    pass
-
-            # Method 3: Google Finance Fallback (If Yahoo Failed)
-            if price is None:
-                # logger.info(f"PriceFetcher: Yahoo failed for {symbol}, trying Google Finance...")
-                result = self.scrape_google_finance(symbol)
-                if result:
-                    price, detected_currency = result
-                    if detected_currency:
-                        currency = detected_currency
-                    elif symbol.endswith('.L'): 
-                         # Fallback if Google gave just number without currency symbol
-                         # Heuristic: If > 500, assume Pence (GBp)
-                         # VUAG.L (98.0) -> GBP (Don't divide)
-                         # RR.L (1250) -> GBp (Divide)
-                         if float(price) > 500:
-                             currency = 'GBp'
-                         else:
-                             currency = 'GBP'
-
-            # Process Price
-            if price is not None:
-                final_price = float(price)
-                
-                # Normalization
-                if currency == 'GBp' or currency == 'GBX': 
-                    final_price = final_price / 100
-                elif symbol.endswith('.L') and final_price > 500 and currency != 'GBP':
-                     # Catch-all for UK stocks that look like Pence but currency wasn't set to GBP explicitly
-                     final_price = final_price / 100
-                    
-                if currency == 'USD':
-                    final_price = self.convert_usd_to_gbp(final_price)
+                if not self._is_provider_error(e):
+                    raise
+                call['status'] = 429
+                error = e
+        if error is not None:
+            raise error
+        return result
+
+    def get_price(self, symbol: str, use_previous_close: bool = False) -> Optional[float]:
+        """Fetch current price for a given symbol with caching"""
+        if not symbol: return None
+        cached = self._get_cached_price(symbol, use_previous_close=use_previous_close)
+        if cached is not None:
+            return cached
+        quote = self._run_sync(self.inflight.do('quote', symbol, lambda: self._fetch_quote(symbol)))
+        return self._pick_price(quote, use_previous_close)
+
+    async def get_price_async(self, symbol: str, use_previous_close: bool = False) -> Optional[float]:
+        """Fetch current (or previous close) price asynchronously"""
+        return self._pick_price(await self.get_quote_async(symbol), use_previous_close)
+
+    async def get_quote_async(self, symbol: str) -> Optional[Dict]:
+        """
+        Fetch {'last_price', 'previous_close'} (GBP) for a symbol in one pass, trying sources
+        in the order learned for it. previous_close is None where the source doesn't give one.
+        Concurrent lookups of the same symbol share one fetch.
+        """
+        if not symbol: return None
+        
+        # Check Cache
+        cached = self._get_cached_quote(symbol)
+        if cached is not None:
+            return cached
+        return await self.inflight.do('quote', symbol, lambda: self._fetch_quote(symbol))
+
+    async def _fetch_quote(self, symbol: str) -> Optional[Dict]:
+        """Live per-symbol fetch behind get_quote_async (no cache lookup or coalescing)"""
+        is_fund = symbol in self.special_funds
+        try:
+            # Try sources in the order learned for this symbol, falling back on failure
+            # and hedging past slow ones
+            sources = self._sources(symbol)
+            ordered = [sources[source] for source in self.router.order(symbol, list(sources.keys()))]
+            answer = await self._hedged_fetch(symbol, ordered)
+            if answer is not None:
+                source, (price, currency, previous_close) = answer
+                final_price, final_previous = await self.normalize_quote_async(symbol, price, previous_close, currency)
                 
                 # Update Cache
-                self._PRICE_CACHE[symbol] = {'price': final_price, 'time': now}
-                return final_price
+                if is_fund:
+                    logger.info(f"Got price from {source} for {symbol}: {final_price}")
+                    # NAVs change once a day: hold this one until the next valuation is published
+                    self._cache_price(symbol, final_price, source, final_previous,
+                                      expires=next_fund_valuation(datetime.utcnow()))
+                else:
+                    self._cache_price(symbol, final_price, source, final_previous)
+                return {'last_price': final_price, 'previous_close': final_previous}
+            
+            if is_fund:
+                # Every source failed: serve the last good price (not re-cached, so it keeps its age)
+                last_good = await self._get_last_known_good(symbol)
+                if last_good:
+                    logger.warning(f"PriceFetcher: All sources failed for {symbol}, serving last known good price "
+                                   f"{last_good['last_price']} from {last_good['age_seconds'] / 3600:.1f}h ago")
+                return last_good
                 
         except Exception as e:
             logger.error(f"Error fetching price for {symbol}: {e}")
@@ -245,136 +639,353 @@ class PriceFetcher:
         
         return None
 
-    def get_special_fund_price(self, isin: str) -> Optional[float]:
-        """Get price for special funds using multiple sources"""
-        fund_info = self.special_funds.get(isin)
-        if not fund_info: return None
-            
-        # 1. Try Yahoo Finance first (if symbol available)
-        if 'yahoo_symbol' in fund_info:
+    def _pick_price(self, quote: Optional[Dict], use_previous_close: bool) -> Optional[float]:
+        """Price for a pricing mode; sources without a previous close fall back to the last price"""
+        if not quote:
+            return None
+        if use_previous_close and quote.get('previous_close') is not None:
+            return quote['previous_close']
+        return quote['last_price']
+
+    def _as_gbp(self, price: Optional[float]) -> Optional[Tuple[float, str, None]]:
+        return (price, 'GBP', None) if price else None
+
+    async def _fetch_from_yahoo(self, symbol: str) -> Optional[Tuple[float, str, Optional[float]]]:
+        """Raw (price, currency, previous_close) from Yahoo's chart JSON, falling back to yfinance when it has no data"""
+        try:
+            quote = await self.yahoo.get_quote(symbol)
+        except (CircuitOpenError, DeadlineExceeded, httpx.HTTPStatusError, httpx.TransportError):
+            # Throttled, failing or out of time: yfinance would only send Yahoo more traffic
+            raise
+        except Exception as e:
+            logger.debug(f"Yahoo chart failed for {symbol}: {e}")
+            quote = None
+        
+        if quote:
+            currency = quote['currency'] or self._CURRENCY_CACHE.get(symbol) or 'USD'
+            self._CURRENCY_CACHE[symbol] = currency
+            return (quote['price'], currency, quote['previous_close'])
+        
+        # yfinance is blocking, so it runs in the executor
+        return await self._run_yahoo(self._fetch_from_yfinance, symbol)
+
+    def _fetch_from_yfinance(self, symbol: str) -> Optional[Tuple[float, str, Optional[float]]]:
+        """Raw (price, currency, previous_close) from yfinance: fast_info, then 5d history"""
+        import yfinance as yf # Heavy (pandas), only loaded if the chart endpoint fails
+        ticker = yf.Ticker(symbol)
+        
+        price = None
+        previous_close = None
+        currency = 'USD' # Default assumption
+        errors = []
+        
+        # Method 1: fast_info (Newer, faster, less prone to breaking)
+        try:
+            price = ticker.fast_info.last_price
+            currency = ticker.fast_info.currency
             try:
-                ticker = yf.Ticker(fund_info['yahoo_symbol'])
-                try:
-                    price = ticker.fast_info.last_price
-                    if price:
-                        if isin.startswith('GB') and price > 10:
-                            price = price / 100
-                        return price
-                except:
-                    pass
+                previous_close = ticker.fast_info.previous_close
+            except Exception:
+                pass
+            if currency:
+                self._CURRENCY_CACHE[symbol] = currency
+        except Exception as e:
+            errors.append(e)
+        
+        # Method 2: History (Reliable Fallback)
+        if price is None:
+            try:
+                hist = ticker.history(period="5d")
+                if not hist.empty:
+                    price = float(hist['Close'].iloc[-1])
+                    if previous_close is None and len(hist) > 1:
+                        previous_close = float(hist['Close'].iloc[-2])
+                    meta = ticker.history_metadata
+                    if meta and 'currency' in meta:
+                        currency = meta['currency']
+                    elif symbol.endswith('.L'):
+                        currency = 'GBp'
             except Exception as e:
-                logger.warning(f"Yahoo Finance failed for special fund {isin}: {e}")
-        
-        # 2. Try Financial Times web scraping (Prioritized over HL as HL can be delayed)
-        if 'ft_url' in fund_info:
-             price = self.scrape_ft_price(fund_info['ft_url'])
-             if price: 
-                 logger.info(f"Got price from FT for {isin}: {price}")
-                 return price
-
-        # 3. Try HL web scraping
-        if 'hl_url' in fund_info:
-            price = self.scrape_hl_price(fund_info['hl_url'])
-            if price: return price
-             
-        # 4. Use fallback price
-        if isin in self.fallback_prices:
-            logger.info(f"Using fallback price for {fund_info['name']}")
-            return self.fallback_prices[isin]
+                errors.append(e)
+        
+        if price is None:
+            # Surface throttling/connection problems so _run_yahoo charges the breaker
+            for error in errors:
+                if self._is_provider_error(error):
+                    raise error
+            return None
+        
+        return (price, currency, previous_close)
+
+    async def _fetch_from_google(self, symbol: str) -> Optional[Tuple[float, str, None]]:
+        """Raw (price, currency, None) from the Google Finance scrape (no previous close)"""
+        result = await self.scrape_google_finance_async(symbol)
+        if not result:
+            return None
+        
+        price, currency = result
+        if not currency:
+            if symbol.endswith('.L'): 
+                 # Fallback if Google gave just number without currency symbol
+                 # Heuristic: If > 500, assume Pence (GBp)
+                 # VUAG.L (98.0) -> GBP (Don't divide)
+                 # RR.L (1250) -> GBp (Divide)
+                 if float(price) > 500:
+                     currency = 'GBp'
+                 else:
+                     currency = 'GBP'
+            else:
+                currency = 'USD' # Same default assumption as Yahoo
+        return (price, currency, None)
+
+    async def normalize_price_async(self, symbol: str, price: float, currency: Optional[str]) -> float:
+        """Convert a raw quote in its listing currency to GBP"""
+        return (await self.normalize_quote_async(symbol, price, None, currency))[0]
+
+    async def normalize_quote_async(self, symbol: str, price: float, previous_close: Optional[float],
+                                    currency: Optional[str]) -> Tuple[float, Optional[float]]:
+        """Normalize last price and previous close together (same pence/FX factor for both)"""
+        rates = await self.get_fx_rates_async() if currency in FxService.CURRENCIES else {}
+        return normalize_quote(symbol, price, previous_close, currency, rates)
+
+    def is_yahoo_symbol(self, symbol: str) -> bool:
+        """
+        True if the symbol goes straight to Yahoo (not crypto or a special fund,
+        and not a symbol that has learned to resolve elsewhere)
+        """
+        if not symbol:
+            return False
+        if self.is_crypto(symbol):
+            return False
+        if symbol in self.special_funds:
+            return False
+        return self.router.preferred(symbol) in (None, 'yahoo')
+
+    async def get_yahoo_quotes_batch_async(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch raw quotes for many symbols via Yahoo's spark endpoint (chunks requested concurrently).
+        Returns {symbol: {'price', 'previous_close', 'currency'}} for the symbols it resolved.
+        """
+        async def fetch_chunk(chunk: List[str]) -> Dict[str, Dict]:
+            try:
+                started = time.monotonic()
+                chunk_quotes = await self.yahoo.get_quotes(chunk)
+                # Share the round trip across the symbols it resolved
+                per_symbol_latency = (time.monotonic() - started) / max(len(chunk_quotes), 1)
+                for symbol in chunk_quotes:
+                    self.router.record_success(symbol, 'yahoo', per_symbol_latency)
+                return chunk_quotes
+            except CircuitOpenError:
+                logger.info("Yahoo circuit open, skipping batch quotes")
+            except Exception as e:
+                logger.warning(f"Yahoo batch quote failed for {chunk}: {e}")
+            return {}
+        
+        size = YahooClient.BATCH_SIZE
+        chunks = [symbols[i:i + size] for i in range(0, len(symbols), size)]
+        quotes = {}
+        for chunk_quotes in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+            quotes.update(chunk_quotes)
+        return quotes
+
+    async def get_quotes_from_yahoo_batch_async(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Resolve Yahoo-routed symbols in a few multi-symbol requests: {symbol: {'last_price', 'previous_close'}}
+        normalized to GBP. Symbols missing from the batch (or without a known currency) are left for the
+        per-symbol path.
+        """
+        if not symbols:
+            return {}
+        
+        prices = {}
+        quotes = await self.get_yahoo_quotes_batch_async(symbols)
+        
+        for symbol, quote in quotes.items():
+            currency = quote['currency'] or self._CURRENCY_CACHE.get(symbol)
+            if not currency:
+                # Flat spark payloads omit currency; let get_price learn it once
+                continue
+            self._CURRENCY_CACHE[symbol] = currency
             
+            final_price, final_previous = await self.normalize_quote_async(
+                symbol, quote['price'], quote['previous_close'], currency
+            )
+            self._cache_price(symbol, final_price, 'yahoo', final_previous)
+            prices[symbol] = {'last_price': final_price, 'previous_close': final_previous}
+        
+        logger.info(f"PriceFetcher: Yahoo batch resolved {len(prices)}/{len(symbols)} symbols")
+        return prices
+
+    def _get_cached_quote(self, symbol: str) -> Optional[Dict]:
+        """Fresh cached {'last_price', 'previous_close', 'as_of'} or None"""
+        return self._as_quote(self._PRICE_CACHE.get(symbol))
+
+    def _as_quote(self, entry: Optional[Dict], stale: bool = False) -> Optional[Dict]:
+        """
+        Quote from a cache entry, with 'as_of' (when it was fetched) so callers can tell it from a
+        live one. Stale entries are also marked 'stale' with their source and age.
+        """
+        if entry is None:
+            return None
+        quote = {'last_price': entry['price'], 'previous_close': entry.get('previous_close'), 'as_of': entry['time']}
+        if stale:
+            quote.update(stale=True, source=entry.get('source'),
+                         age_seconds=(datetime.utcnow() - entry['time']).total_seconds())
+        return quote
+
+    def _get_cached_price(self, symbol: str, use_previous_close: bool = False) -> Optional[float]:
+        return self._pick_price(self._get_cached_quote(symbol), use_previous_close)
+
+    def _cache_price(self, symbol: str, price: float, source: Optional[str] = None, previous_close: Optional[float] = None,
+                     expires: Optional[datetime] = None):
+        """Update the in-memory cache and queue the quote for the persistent store"""
+        entry = {'price': price, 'previous_close': previous_close, 'time': datetime.utcnow(), 'source': source}
+        if expires is not None:
+            entry['expires'] = expires
+        self._PRICE_CACHE.set(symbol, entry)
+        if self.quote_store is not None:
+            with self._write_lock:
+                self._pending_writes[symbol] = entry
+
+    def load_stored_quotes(self) -> int:
+        """
+        Read stored quotes into the memory cache (once per process). Returns quotes loaded.
+        Callers arriving while the load runs (e.g. a refresh during the startup load) wait for it.
+        """
+        if self.quote_store is None or self._store_loaded:
+            return 0
+        with self._store_lock:
+            if self._store_loaded:
+                return 0
+            self.load_special_funds()
+            
+            loaded = 0
+            for symbol, quote in self.quote_store.load().items():
+                current = self._PRICE_CACHE.peek(symbol)
+                if current is None or current['time'] < quote['time']:
+                    entry = {
+                        'price': quote['price'],
+                        'previous_close': quote.get('previous_close'),
+                        'time': quote['time'],
+                        'source': quote['source']
+                    }
+                    if symbol in self.special_funds:
+                        entry['expires'] = next_fund_valuation(quote['time'])
+                    self._PRICE_CACHE.set(symbol, entry)
+                    loaded += 1
+                # Seed the learned route with the source that last worked
+                if quote['source'] in self.PROVIDERS:
+                    self.router.record_success(symbol, quote['source'])
+            
+            # Only now: a concurrent caller seeing the flag must find the cache filled
+            self._store_loaded = True
+        
+        logger.info(f"PriceFetcher: Loaded {loaded} stored quotes")
+        return loaded
+
+    def load_special_funds(self) -> int:
+        """Replace the default fund map with the special_funds table (once per process). Returns funds loaded."""
+        if self.fund_registry is None or self._funds_loaded:
+            return 0
+        self._funds_loaded = True
+        
+        self.fund_registry.seed_defaults()
+        funds = self.fund_registry.load()
+        if funds is None:
+            return 0
+        self.special_funds = funds
+        logger.info(f"PriceFetcher: Loaded {len(funds)} special funds")
+        return len(funds)
+
+    def flush_quotes(self) -> int:
+        """Write queued quotes to the persistent store. Returns quotes written."""
+        if self.quote_store is None:
+            return 0
+        with self._write_lock:
+            pending = self._pending_writes
+            self._pending_writes = {}
+        return self.quote_store.save(pending)
+
+    def get_special_fund_price(self, isin: str) -> Optional[float]:
+        """Get price for special funds using multiple sources (last known good if they all fail)"""
+        if isin not in self.special_funds:
+            return None
+        return self.get_price(isin)
+
+    async def _get_last_known_good(self, symbol: str) -> Optional[Dict]:
+        """
+        Most recent successfully fetched quote for a symbol (memory cache, then the DB), marked
+        stale with its age. None if there isn't one younger than _LAST_GOOD_MAX_AGE_SECONDS.
+        """
+        entry = self._PRICE_CACHE.peek(symbol)
+        if entry is None and self.quote_store is not None:
+            entry = (await self._run_blocking(self.quote_store.load, [symbol])).get(symbol)
+        # Rows written by the old hardcoded fallback aren't real prices
+        if not entry or entry.get('source') == 'fallback':
+            return None
+        
+        age = (datetime.utcnow() - entry['time']).total_seconds()
+        if age > self._LAST_GOOD_MAX_AGE_SECONDS:
+            logger.warning(f"PriceFetcher: Last good price for {symbol} is {age / 86400:.1f} days old, not using it")
+            return None
+        
+        return self._as_quote(entry, stale=True)
+
+    async def _fetch_fund_from_yahoo(self, yahoo_symbol: str, quoted_in_pence: bool = False) -> Optional[float]:
+        """Fund NAV from Yahoo's chart JSON, falling back to yfinance when it has no data"""
+        try:
+            quote = await self.yahoo.get_quote(yahoo_symbol)
+        except (CircuitOpenError, DeadlineExceeded, httpx.HTTPStatusError, httpx.TransportError):
+            # Throttled, failing or out of time: yfinance would only send Yahoo more traffic
+            raise
+        except Exception as e:
+            logger.debug(f"Yahoo chart failed for {yahoo_symbol}: {e}")
+            quote = None
+        
+        if quote:
+            price = quote['price']
+        else:
+            price = await self._run_yahoo(self._fetch_fund_from_yfinance, yahoo_symbol)
+        if price:
+            if quoted_in_pence:
+                price = price / 100
+            return price
         return None
+
+    def _fetch_fund_from_yfinance(self, yahoo_symbol: str) -> Optional[float]:
+        import yfinance as yf
+        ticker = yf.Ticker(yahoo_symbol)
+        return ticker.fast_info.last_price
     
-    def scrape_hl_price(self, url: str) -> Optional[float]:
-        """Scrape price from Hargreaves Lansdown fund page"""
+    async def scrape_hl_price_async(self, url: str) -> Optional[float]:
+        """Scrape price from Hargreaves Lansdown fund page (shown in pence, returned in GBP)"""
         try:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code != 200: return None
-            
-            html_content = response.text
-            
-            # HL displays prices in PENCE (e.g., "355.10p")
-            price_patterns = [
-                r'Sell:\s*([1-9][\d,]{3,6}\.?\d*)p',
-                r'Buy:\s*([1-9][\d,]{3,6}\.?\d*)p',
-                r'Price:\s*([1-9][\d,]{3,6}\.?\d*)p',
-                r'>([1-9][\d,]{3,6}\.?\d*)p</span>',
-                r'Sell:\s*(\d{3,4}\.?\d*)p',
-                r'Buy:\s*(\d{3,4}\.?\d*)p',
-                r'(\d{3,4}\.?\d*)p\s+(?:Buy|Sell)',
-            ]
-            
-            all_matches = []
-            
-            for priority, pattern in enumerate(price_patterns):
-                matches = re.findall(pattern, html_content, re.IGNORECASE)
-                for match in matches:
-                    try:
-                        clean_match = match.replace(',', '')
-                        price_pence = float(clean_match)
-                        if 10 <= price_pence <= 500000:
-                            all_matches.append((price_pence, priority))
-                    except ValueError:
-                        continue
-            
-            if all_matches:
-                all_matches.sort(key=lambda x: x[1])
-                return all_matches[0][0] / 100
+            return await self._http_extract('hl', url, HlPriceExtractor(), headers=headers, timeout=10)
         except Exception as e:
             logger.warning(f"Error scraping HL for {url}: {e}")
         return None
 
-    def scrape_ft_price(self, url: str) -> Optional[float]:
+    async def scrape_ft_price_async(self, url: str) -> Optional[float]:
         try:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
-            response = requests.get(url, headers=headers, timeout=10)
-            content = response.text
-            
-            # 1. Try regex on raw HTML (ft.com structure)
-            # Pattern: Price (GBP)</span><span class="mod-ui-data-list__value">10.45</span>
-            # Also handle GBX (Pence) seen for some funds like UBS
-            html_patterns = [
-                # GBP Patterns
-                (r'Price\s*\(GBP\)</span>\s*<span[^>]*>(\d+\.?\d*)</span>', 1.0),
-                (r'Price\s*\(GBP\)\s*(\d+\.?\d*)', 1.0),
-                (r'Price\s*</span>\s*<span[^>]*>£?(\d+\.?\d*)</span>', 1.0),
-                
-                # GBX Patterns (Pence) -> Divide by 100
-                (r'Price\s*\(GBX\)</span>\s*<span[^>]*>(\d+\.?\d*)</span>', 100.0),
-                (r'Price\s*\(GBX\)\s*(\d+\.?\d*)', 100.0),
-            ]
-            
-            for pattern, divisor in html_patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                if matches:
-                    return float(matches[0]) / divisor
+            # 1. Price patterns on the raw HTML, stopping once the GBP price is seen
+            extractor = FtPriceExtractor()
+            price = await self._http_extract('ft', url, extractor, headers=headers, timeout=10)
+            if price is not None:
+                return price
 
-            # 2. Try trafilatura extraction if HTML regex failed
-            try:
-                extracted = trafilatura.extract(content)
-                if extracted:
-                    # Check GBP
-                    matches = re.findall(r'Price\s*\(GBP\)\s*(\d+\.?\d*)', extracted, re.IGNORECASE)
-                    if matches:
-                        return float(matches[0])
-                        
-                    # Check GBX
-                    matches = re.findall(r'Price\s*\(GBX\)\s*(\d+\.?\d*)', extracted, re.IGNORECASE)
-                    if matches:
-                        return float(matches[0]) / 100.0
-            except:
-                pass
-                
+            # 2. Try trafilatura extraction if HTML regex failed (CPU heavy, keep it off the event loop)
+            return await self._run_blocking(extractor.fallback)
         except Exception:
              pass
         return None
     
-    def scrape_google_finance(self, symbol: str) -> Optional[tuple]:
+    async def scrape_google_finance_async(self, symbol: str) -> Optional[tuple]:
         """Scrape price from Google Finance fallback. Returns (price, currency_code)"""
         try:
             # Simple header to look like browser
@@ -397,73 +1008,146 @@ class PriceFetcher:
                  # Generic search fallback
                  url = f"https://www.google.com/finance?q={symbol}"
 
-            response = requests.get(url, headers=headers, timeout=5)
-            if response.status_code != 200: 
-                return None
-            
-            content = response.text
-            
-            # Regex for the specific class provided by browser agent
-            # <div class="YMlKec fxKbKc">185.10</div>
-            # We look for YMlKec because fxKbKc might be layout specific
-            
-            # Look for: class="YMlKec fxKbKc">£10.50</div> or >10.50</div>
-            # Content might have currency symbol
-            
-            matches = re.findall(r'class="YMlKec fxKbKc">([^<]+)</div>', content)
-            if matches:
-                 raw_text = matches[0]
-                 # Detect currency
-                 currency = None
-                 if 'GBX' in raw_text:
-                     currency = 'GBX'
-                 elif '£' in raw_text:
-                     currency = 'GBP'
-                 elif '$' in raw_text:
-                     currency = 'USD'
-                 elif '€' in raw_text:
-                     currency = 'EUR'
-                     
-                 # Cleanup: Remove currency symbols ($, £, etc) and commas
-                 clean = raw_text.replace('$', '').replace('£', '').replace(',', '').replace('GBX', '').strip()
-                 return (float(clean), currency)
-                 
+            # Price sits in <div class="YMlKec fxKbKc">£10.50</div>, near the top of the page
+            return await self._http_extract('google', url, GoogleQuoteExtractor(), headers=headers, timeout=5)
         except Exception as e:
             logger.warning(f"Google Finance scrape failed for {symbol}: {e}")
         return None
 
-    def get_multiple_prices(self, symbols: List[str]) -> Dict[str, float]:
-        """Fetch prices for multiple symbols"""
-        prices = {}
+    def get_multiple_prices(self, symbols: List[str], use_previous_close: bool = False) -> Dict[str, float]:
+        """Fetch prices for multiple symbols (CoinGecko/Yahoo batches first, then per-symbol for the misses)"""
+        self.load_stored_quotes()
+        
+        quotes = {}
+        pending = []
         for symbol in symbols:
-            p = self.get_price(symbol)
-            if p: prices[symbol] = p
-        return prices
+            cached = self._get_cached_quote(symbol)
+            if cached is not None:
+                quotes[symbol] = cached
+            else:
+                pending.append(symbol)
+        
+        if pending:
+            quotes.update(self._run_sync(self._fetch_quotes_async(pending)))
+        
+        self.flush_quotes()
+        return self.pick_prices(quotes, use_previous_close)
 
-    async def get_price_async(self, symbol: str, use_previous_close: bool = False) -> Optional[float]:
-        """Fetch current price asynchronously"""
+    async def get_multiple_prices_async(self, symbols: List[str], use_previous_close: bool = False) -> Dict[str, float]:
+        """Fetch prices for multiple symbols in parallel (see get_multiple_quotes_async)"""
+        return self.pick_prices(await self.get_multiple_quotes_async(symbols), use_previous_close)
+
+    async def get_multiple_quotes_async(self, symbols: List[str], market_aware: bool = False) -> Dict[str, Dict]:
+        """
+        Fetch {symbol: {'last_price', 'previous_close'}} for multiple symbols in parallel, so callers
+        needing both pricing modes make one pass.
+        Fresh cache hits are returned as-is; stale ones (within _STALE_TTL_SECONDS) are served
+        immediately, marked 'stale', and refreshed in the background; everything else is fetched
+        live. Quotes that didn't come from a live fetch carry 'as_of'.
+        With market_aware, any cached quote taken since its market last moved (closed exchange,
+        fund between valuations) is served as-is, however old.
+        """
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self.get_price, symbol, use_previous_close)
+        if self.quote_store is not None and not self._store_loaded:
+            await loop.run_in_executor(None, self.load_stored_quotes)
+        
+        quotes = {}
+        pending = []
+        stale = []
+        unchanged = 0
+        now = datetime.utcnow()
+        for symbol in symbols:
+            if market_aware:
+                entry = self._PRICE_CACHE.peek(symbol)
+                market = self.market_for(symbol)
+                if entry is not None and market is not None and not market.moved_since(entry['time'], now):
+                    quotes[symbol] = self._as_quote(entry)
+                    unchanged += 1
+                    continue
+            
+            entry = self._PRICE_CACHE.get(symbol, allow_stale=True)
+            if entry is None:
+                pending.append(symbol)
+                continue
+            
+            is_fresh = self._PRICE_CACHE.is_fresh(entry)
+            quotes[symbol] = self._as_quote(entry, stale=not is_fresh)
+            if not is_fresh:
+                stale.append(symbol)
+        
+        if unchanged:
+            logger.info(f"PriceFetcher: {unchanged}/{len(symbols)} symbols unchanged since their last quote (market closed)")
+        if stale:
+            self._schedule_revalidation(stale)
+        
+        if pending:
+            quotes.update(await self._fetch_quotes_async(pending))
+            # Write behind: persist off the request path
+            loop.run_in_executor(None, self.flush_quotes)
+        
+        return quotes
 
-    async def get_multiple_prices_async(self, symbols: List[str], use_previous_close: bool = False) -> Dict[str, float]:
-        """Fetch prices for multiple symbols in parallel"""
+    def pick_prices(self, quotes: Dict[str, Dict], use_previous_close: bool) -> Dict[str, float]:
+        """{symbol: price} for one pricing mode from get_multiple_quotes_async results"""
         prices = {}
-        # Limit concurrency to avoid rate limits (Reduced from 10 to 4)
-        sem = asyncio.Semaphore(4)
-        import random
-
-        async def fetch_with_sem(symbol: str):
-            async with sem:
-                # Add random jitter to avoid burst patterns
-                await asyncio.sleep(random.uniform(0.5, 2.0))
-                price = await self.get_price_async(symbol, use_previous_close)
-                if price:
-                    prices[symbol] = price
-
-        await asyncio.gather(*(fetch_with_sem(s) for s in symbols))
+        for symbol, quote in quotes.items():
+            price = self._pick_price(quote, use_previous_close)
+            if price is not None:
+                prices[symbol] = price
         return prices
+
+    async def _fetch_quotes_async(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Live fetch (no cache lookups). Symbols another caller is already fetching join that
+        fetch; the rest go out together.
+        """
+        return await self.inflight.do_many('quote', symbols, self._fetch_quotes_batch)
+
+    async def _fetch_quotes_batch(self, symbols: List[str]) -> Dict[str, Dict]:
+        """CoinGecko/Yahoo batches first, then per-symbol for the misses"""
+        yahoo_symbols = [s for s in symbols if self.is_yahoo_symbol(s)]
+        crypto_prices, quotes = await asyncio.gather(
+            self.get_crypto_prices_batch_async(symbols),
+            self.get_quotes_from_yahoo_batch_async(yahoo_symbols)
+        )
+        for symbol, price in crypto_prices.items():
+            quotes[symbol] = {'last_price': price, 'previous_close': None}
+        
+        misses = [s for s in symbols if s not in quotes]
+        
+        # Pacing and concurrency are enforced per provider (token buckets + adaptive windows)
+        async def fetch(symbol: str):
+            quote = await self._fetch_quote(symbol)
+            if quote:
+                quotes[symbol] = quote
+
+        await asyncio.gather(*(fetch(s) for s in misses))
+        return quotes
+
+    def _schedule_revalidation(self, symbols: List[str]):
+        """Refresh stale symbols in the background (skipping ones already being refreshed)"""
+        to_refresh = [s for s in symbols if s not in self._revalidating]
+        if not to_refresh:
+            return
+        self._revalidating.update(to_refresh)
+        
+        async def revalidate():
+            try:
+                await self._fetch_quotes_async(to_refresh)
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self.flush_quotes)
+            except Exception as e:
+                logger.warning(f"PriceFetcher: Background refresh failed: {e}")
+            finally:
+                self._revalidating.difference_update(to_refresh)
+        
+        logger.info(f"PriceFetcher: Serving {len(to_refresh)} stale quotes, refreshing in background")
+        task = asyncio.create_task(revalidate())
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
     
-    def scrape_google_currency(self) -> Optional[float]:
+    async def scrape_google_currency_async(self) -> Optional[float]:
         """Scrape USD to GBP rate from Google Finance"""
         try:
             # URL for USD to GBP
@@ -471,74 +1155,115 @@ class PriceFetcher:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
             }
-            response = requests.get(url, headers=headers, timeout=5)
-            if response.status_code == 200:
-                # Try specific class first: <div class="YMlKec fxKbKc">0.7925</div>
-                matches = re.findall(r'class="YMlKec fxKbKc">([^<]+)</div>', response.text)
-                if matches:
-                    return float(matches[0].replace(',', '').strip())
-                
-                # Fallback Regex: Look for pattern "1 USD =" ... "0.7410 GBP" or similar structure
-                # Or look for "data-last-price" attribute if available (often not in SSR)
-                # Let's try searching for the value directly if it follows "1 USD ="
-                # But that's hard. Let's try a broader class search.
-                broad_matches = re.findall(r'>(\d+\.\d{4,})<', response.text)
-                # Filter for reasonable FX range (0.5 to 1.0)
-                for m in broad_matches:
-                    val = float(m)
-                    if 0.5 < val < 1.0:
-                        return val
-                        
+            # Specific class first (<div class="YMlKec fxKbKc">0.7925</div>), else the first
+            # 4dp number in a reasonable FX range (0.5 to 1.0)
+            return await self._http_extract('google', url, GoogleFxExtractor(), headers=headers, timeout=5)
         except Exception as e:
             logger.warning(f"Google Currency scrape failed: {e}")
         return None
 
+    def get_fx_rates(self) -> Dict[str, float]:
+        """GBP per unit for every supported currency (see FxService), refreshed every 15 mins"""
+        if self.fx.is_fresh():
+            return self.fx.current()
+        
+        with self._rate_lock:
+            # Another thread may have refreshed the rates while we waited
+            if self.fx.is_fresh():
+                return self.fx.current()
+            return self._run_sync(self.get_fx_rates_async())
+
+    async def get_fx_rates_async(self) -> Dict[str, float]:
+        """FX matrix without blocking the event loop (concurrent callers share one refresh)"""
+        return await self.fx.get_rates_async()
+
     def get_usd_to_gbp_rate(self) -> float:
         """Get current USD to GBP rate"""
-        # Cache check (15 mins)
-        if (self.usd_to_gbp_rate and self.last_rate_update and 
-            (datetime.now() - self.last_rate_update).seconds < 900):
-            return self.usd_to_gbp_rate
-            
-        rate = None
-        
-        # 1. Google Finance (Primary)
-        rate = self.scrape_google_currency()
+        return self.get_fx_rates()['USD']
 
-        # 2. Yahoo Finance (Backup)
-        if not rate:
-            try:
-                # Try Direct Pair
-                ticker = yf.Ticker('USDGBP=X') 
-                price = ticker.fast_info.last_price
-                if price and price > 0.5:
-                    rate = float(price)
-                else:
-                    # Fallback to Inverse
-                    ticker = yf.Ticker('GBPUSD=X')
-                    hist = ticker.history(period='1d')
-                    if not hist.empty:
-                        rate = 1 / float(hist['Close'].iloc[-1])
-            except Exception as e:
-                # logger.warning(f"Yahoo FX failed: {e}")
-                pass
+    async def get_usd_to_gbp_rate_async(self) -> float:
+        return (await self.get_fx_rates_async())['USD']
+
+    def convert_to_gbp(self, amounts: List[float], currencies: List[Optional[str]]) -> List[Optional[float]]:
+        """Convert amounts in mixed currencies to GBP with one (cached) FX refresh"""
+        self.get_fx_rates()
+        return self.fx.convert(amounts, currencies)
+
+    async def convert_to_gbp_async(self, amounts: List[float], currencies: List[Optional[str]]) -> List[Optional[float]]:
+        await self.get_fx_rates_async()
+        return self.fx.convert(amounts, currencies)
 
-        # 3. Static Fallback
+    async def _fetch_usd_to_gbp_fallback(self) -> Optional[float]:
+        """USD->GBP when the FX batch misses it: Google Finance, then yfinance"""
+        rate = await self.scrape_google_currency_async()
         if not rate:
-            rate = 0.75 # Updated to roughly 1.33 USD/GBP 
-            
-        # Update Cache
-        self.usd_to_gbp_rate = rate
-        self.last_rate_update = datetime.now()
-        
-        return rate 
-            
-        # Update Cache
-        self.usd_to_gbp_rate = rate
-        self.last_rate_update = datetime.now()
-        
+            rate = await self._run_yahoo(self._fetch_fx_from_yfinance)
         return rate
 
+    def _fetch_fx_from_yfinance(self) -> Optional[float]:
+        """USD->GBP from yfinance: direct pair, then the inverse of GBPUSD"""
+        import yfinance as yf
+        try:
+            # Try Direct Pair
+            ticker = yf.Ticker('USDGBP=X') 
+            price = ticker.fast_info.last_price
+            if price and price > 0.5:
+                return float(price)
+            # Fallback to Inverse
+            ticker = yf.Ticker('GBPUSD=X')
+            hist = ticker.history(period='1d')
+            if not hist.empty:
+                return 1 / float(hist['Close'].iloc[-1])
+        except Exception as e:
+            # logger.warning(f"Yahoo FX failed: {e}")
+            pass
+        return None
+
     def convert_usd_to_gbp(self, usd_price: float) -> Optional[float]:
         rate = self.get_usd_to_gbp_rate()
         return usd_price * rate
+
+    async def convert_usd_to_gbp_async(self, usd_price: float) -> Optional[float]:
+        rate = await self.get_usd_to_gbp_rate_async()
+        return usd_price * rate
+
+    def cache_stats(self) -> Dict:
+        """Size, per-source counts and hit/miss/stale counters of the shared price cache"""
+        return self._PRICE_CACHE.to_dict()
+
+    def rate_limit_stats(self) -> Dict[str, Dict]:
+        """Wait-time metrics for each provider's token bucket"""
+        return {name: bucket.to_dict() for name, bucket in self.rate_limits.items()}
+
+    def concurrency_stats(self) -> Dict[str, Dict]:
+        """Current adaptive concurrency window for each provider"""
+        return {name: limiter.to_dict() for name, limiter in self.concurrency.items()}
+
+    async def aclose(self):
+        """Release pooled HTTP connections held by the running loop"""
+        await self.http.aclose()
+
+
+# Process-wide fetcher shared by the scheduler and every request handler,
+# so the FX rate, price caches and HTTP connections survive between calls.
+_shared_fetcher: Optional[PriceFetcher] = None
+_shared_fetcher_lock = threading.Lock()
+
+def get_price_fetcher() -> PriceFetcher:
+    """Return the shared PriceFetcher, creating it on first use"""
+    global _shared_fetcher
+    if _shared_fetcher is None:
+        with _shared_fetcher_lock:
+            if _shared_fetcher is None:
+                from app.utils.quote_store import QuoteStore
+                from app.utils.fund_registry import FundRegistry
+                _shared_fetcher = PriceFetcher(quote_store=QuoteStore(), fund_registry=FundRegistry())
+    return _shared_fetcher
+
+async def close_price_fetcher():
+    """Close and drop the shared PriceFetcher (app shutdown)"""
+    global _shared_fetcher
+    with _shared_fetcher_lock:
+        fetcher, _shared_fetcher = _shared_fetcher, None
+    if fetcher is not None:
+        await fetcher.aclose()
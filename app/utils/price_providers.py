@@ -0,0 +1,209 @@
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+import threading
+
+if TYPE_CHECKING:
+    from app.utils.price_fetcher import PriceFetcher
+
+# Raw source result: (price, listing currency, previous close or None)
+RawQuote = Tuple[float, str, Optional[float]]
+
+
+def normalize_quote(symbol: str, price: float, previous_close: Optional[float], currency: Optional[str],
+                    rates: Dict[str, float]) -> Tuple[float, Optional[float]]:
+    """
+    Convert a raw quote in its listing currency to GBP (last price and previous close with the
+    same pence/FX factor). `rates` is GBP per unit of each foreign currency.
+    """
+    final_price = float(price)
+
+    if currency == 'GBp' or currency == 'GBX':
+        final_price = final_price / 100
+    elif symbol.endswith('.L') and final_price > 500 and currency != 'GBP':
+        # Catch-all for UK stocks that look like Pence but currency wasn't set to GBP explicitly
+        final_price = final_price / 100
+
+    if currency in rates and currency not in ('GBP', 'GBp', 'GBX'):
+        final_price = final_price * rates[currency]
+
+    if previous_close is None or not price:
+        return final_price, None
+    return final_price, float(previous_close) * (final_price / float(price))
+
+
+class ProviderStats:
+    """
+    Per-provider call counters: outcomes and latency of the calls that reached the provider,
+    plus a window of recent successful latencies for percentiles (hedging budgets)
+    """
+
+    WINDOW = 100
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.successes = 0
+        self.misses = 0    # Answered, but had no price for the symbol
+        self.errors = 0
+        self.skipped = 0   # Circuit open or symbol recently failed there
+        self.cancelled = 0 # Lost a hedged race
+        self.hedges = 0    # Started as a hedge behind a slow source
+        self.hedge_wins = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self._recent = deque(maxlen=self.WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str, latency: Optional[float] = None):
+        with self._lock:
+            if outcome == 'skipped':
+                self.skipped += 1
+                return
+            if outcome == 'cancelled':
+                self.cancelled += 1
+                return
+            self.calls += 1
+            if outcome == 'success':
+                self.successes += 1
+                if latency is not None:
+                    self._recent.append(latency)
+            elif outcome == 'miss':
+                self.misses += 1
+            else:
+                self.errors += 1
+            if latency is not None:
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+
+    def record_hedge(self, won: bool):
+        with self._lock:
+            self.hedges += 1
+            if won:
+                self.hedge_wins += 1
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """q-th percentile (0-1) of recent successful latencies, None without samples"""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    @property
+    def samples(self) -> int:
+        return len(self._recent)
+
+    def to_dict(self) -> Dict:
+        p50 = self.latency_percentile(0.5)
+        p90 = self.latency_percentile(0.9)
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'successes': self.successes,
+                'misses': self.misses,
+                'errors': self.errors,
+                'skipped': self.skipped,
+                'success_rate': round(self.successes / self.calls, 3) if self.calls else None,
+                'avg_latency': round(self.total_latency / self.calls, 3) if self.calls else None,
+                'max_latency': round(self.max_latency, 3),
+                'p50_latency': round(p50, 3) if p50 is not None else None,
+                'p90_latency': round(p90, 3) if p90 is not None else None,
+                'cancelled': self.cancelled,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins
+            }
+
+
+class PriceProvider:
+    """
+    One price source in the fetcher's pipeline.
+    `handles(symbol)` says whether it can price a symbol and `fetch(symbol)` returns a RawQuote
+    (or None). The fetcher tries the providers that handle a symbol in registration order
+    (a fund's preferred source first, then whatever the router has learned), and wraps each
+    call with circuit breaking, stats, normalization and the shared cache.
+    """
+
+    name: str = ''
+
+    def __init__(self, fetcher: 'PriceFetcher'):
+        self.fetcher = fetcher
+        self.stats = ProviderStats(self.name)
+
+    def handles(self, symbol: str) -> bool:
+        raise NotImplementedError
+
+    async def fetch(self, symbol: str) -> Optional[RawQuote]:
+        raise NotImplementedError
+
+    def _fund(self, symbol: str) -> Optional[Dict]:
+        return self.fetcher.special_funds.get(symbol)
+
+
+class CoinGeckoProvider(PriceProvider):
+    """Crypto in GBP (batched multi-coin responses are reused)"""
+
+    name = 'coingecko'
+
+    def handles(self, symbol: str) -> bool:
+        return self.fetcher.is_crypto(symbol)
+
+    async def fetch(self, symbol: str) -> Optional[RawQuote]:
+        return self.fetcher._as_gbp(await self.fetcher.get_crypto_price_from_coingecko_async(symbol))
+
+
+class YahooProvider(PriceProvider):
+    """Stocks/ETFs (chart JSON, yfinance fallback), crypto as the -USD pair, and funds with a Yahoo symbol"""
+
+    name = 'yahoo'
+
+    def handles(self, symbol: str) -> bool:
+        fund = self._fund(symbol)
+        return fund is None or 'yahoo_symbol' in fund
+
+    async def fetch(self, symbol: str) -> Optional[RawQuote]:
+        fund = self._fund(symbol)
+        if fund is not None:
+            return self.fetcher._as_gbp(await self.fetcher._fetch_fund_from_yahoo(
+                fund['yahoo_symbol'], fund.get('quoted_in_pence', False)
+            ))
+        return await self.fetcher._fetch_from_yahoo(self.fetcher.lookup_symbol(symbol))
+
+
+class GoogleProvider(PriceProvider):
+    """Google Finance quote page scrape (no previous close)"""
+
+    name = 'google'
+
+    def handles(self, symbol: str) -> bool:
+        return self._fund(symbol) is None
+
+    async def fetch(self, symbol: str) -> Optional[RawQuote]:
+        return await self.fetcher._fetch_from_google(self.fetcher.lookup_symbol(symbol))
+
+
+class FtProvider(PriceProvider):
+    """FT fund tearsheet (prioritized over HL as HL can be delayed)"""
+
+    name = 'ft'
+
+    def handles(self, symbol: str) -> bool:
+        return 'ft_url' in (self._fund(symbol) or {})
+
+    async def fetch(self, symbol: str) -> Optional[RawQuote]:
+        return self.fetcher._as_gbp(await self.fetcher.scrape_ft_price_async(self._fund(symbol)['ft_url']))
+
+
+class HlProvider(PriceProvider):
+    """Hargreaves Lansdown fund page"""
+
+    name = 'hl'
+
+    def handles(self, symbol: str) -> bool:
+        return 'hl_url' in (self._fund(symbol) or {})
+
+    async def fetch(self, symbol: str) -> Optional[RawQuote]:
+        return self.fetcher._as_gbp(await self.fetcher.scrape_hl_price_async(self._fund(symbol)['hl_url']))
+
+
+# Default pipeline, in fallback order
+DEFAULT_PROVIDERS = (CoinGeckoProvider, YahooProvider, GoogleProvider, FtProvider, HlProvider)
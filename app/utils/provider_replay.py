@@ -0,0 +1,356 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+from collections import namedtuple
+import asyncio
+import json
+import random
+import time
+import zlib
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Hosts each provider is reached on (names match the PriceFetcher providers)
+PROVIDER_HOSTS = {
+    'yahoo': ('query1.finance.yahoo.com', 'query2.finance.yahoo.com'),
+    'coingecko': ('api.coingecko.com',),
+    'google': ('www.google.com',),
+    'ft': ('markets.ft.com',),
+    'hl': ('www.hl.co.uk',),
+    't212': ('live.trading212.com', 'demo.trading212.com'),
+    'mempool': ('mempool.space',),
+}
+_HOST_PROVIDERS = {host: name for name, hosts in PROVIDER_HOSTS.items() for host in hosts}
+
+ReplayRequest = namedtuple('ReplayRequest', 'method url host path params')
+
+
+class CannedResponse:
+    """A response to serve: dict/list bodies are sent as JSON, str as text"""
+
+    def __init__(self, status: int = 200, body: Union[str, bytes, Dict, List, None] = b'',
+                 headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            self.body = json.dumps(body).encode('utf-8')
+            self.headers.setdefault('content-type', 'application/json')
+        elif isinstance(body, str):
+            self.body = body.encode('utf-8')
+            self.headers.setdefault('content-type', 'text/html; charset=utf-8')
+        else:
+            self.body = body or b''
+
+
+Responder = Union[CannedResponse, Callable[[ReplayRequest], CannedResponse]]
+# Seconds, or a (min, max) range drawn from the seeded generator
+Latency = Union[float, Tuple[float, float]]
+
+
+class ProviderReplay:
+    """
+    Offline stand-in for every external API the app talks to. Requests are answered from
+    recorded responses (a cassette) first, then from routes (provider + path prefix), so tests
+    and benchmarks run with no network and the same answers every time.
+    Per-provider `latency` and `throttle` (chance of a 429) make slow or rate-limited
+    providers reproducible too; randomness comes from one seeded generator.
+    Hand `transport()` to httpx clients (AsyncHttpClient, CryptoService) and `session()`
+    to requests users (Trading212Service).
+    """
+
+    def __init__(self, seed: int = 0, latency: Optional[Dict[str, Latency]] = None,
+                 throttle: Optional[Dict[str, float]] = None):
+        self.latency = dict(latency or {})
+        self.throttle = dict(throttle or {})
+        self.random = random.Random(seed)
+        self.routes: List[Tuple[str, str, Responder]] = []
+        self.recorded: Dict[str, Dict] = {}
+        # (method, url, status) per request served, in order
+        self.requests: List[Tuple[str, str, int]] = []
+
+    def add_route(self, provider: str, path: str, responder: Responder):
+        """Answer requests to a provider whose path starts with `path` (later routes win)"""
+        self.routes.insert(0, (provider, path, responder))
+
+    def counts(self) -> Dict[str, int]:
+        """Requests served per provider"""
+        counts = {}
+        for _, url, _ in self.requests:
+            provider = _HOST_PROVIDERS.get(urlsplit(url).hostname or '', 'other')
+            counts[provider] = counts.get(provider, 0) + 1
+        return counts
+
+    # Cassettes
+
+    @staticmethod
+    def _key(method: str, url: str) -> str:
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qs(parts.query, keep_blank_values=True).items()), doseq=True)
+        return f"{method.upper()} {parts.scheme}://{parts.netloc}{unquote(parts.path)}?{query}"
+
+    def record(self, method: str, url: str, status: int, headers: Dict[str, str], body: bytes):
+        # Bodies are stored decoded, so drop headers describing the wire encoding
+        headers = {k: v for k, v in headers.items()
+                   if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')}
+        self.recorded[self._key(method, url)] = {
+            'method': method.upper(), 'url': url, 'status': status, 'headers': headers,
+            'body': body.decode('utf-8', errors='replace')
+        }
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(list(self.recorded.values()), f, indent=1)
+
+    def load(self, path: str) -> 'ProviderReplay':
+        with open(path) as f:
+            for entry in json.load(f):
+                self.recorded[self._key(entry['method'], entry['url'])] = entry
+        return self
+
+    # Serving
+
+    def _draw_latency(self, provider: str) -> float:
+        latency = self.latency.get(provider, self.latency.get('*', 0.0))
+        if isinstance(latency, (tuple, list)):
+            return self.random.uniform(*latency)
+        return latency
+
+    def respond(self, method: str, url: str) -> Tuple[CannedResponse, float]:
+        """(response, latency in seconds) for a request"""
+        parts = urlsplit(url)
+        host = parts.hostname or ''
+        provider = _HOST_PROVIDERS.get(host, 'other')
+        latency = self._draw_latency(provider)
+
+        if self.random.random() < self.throttle.get(provider, self.throttle.get('*', 0.0)):
+            response = CannedResponse(429, 'Too Many Requests', {'retry-after': '1'})
+        else:
+            response = self._lookup(ReplayRequest(
+                method.upper(), url, host, unquote(parts.path),
+                {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            ), provider)
+
+        self.requests.append((method.upper(), url, response.status))
+        return response, latency
+
+    def _lookup(self, request: ReplayRequest, provider: str) -> CannedResponse:
+        entry = self.recorded.get(self._key(request.method, request.url))
+        if entry is not None:
+            return CannedResponse(entry['status'], entry['body'], entry.get('headers'))
+        for route_provider, path, responder in self.routes:
+            if route_provider == provider and request.path.startswith(path):
+                return responder(request) if callable(responder) else responder
+        return CannedResponse(404, f"No canned response for {request.method} {request.url}")
+
+    def transport(self) -> 'ReplayTransport':
+        return ReplayTransport(self)
+
+    def session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = ReplayAdapter(self)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+
+def _read_timeout(request: httpx.Request) -> Optional[float]:
+    return (request.extensions.get('timeout') or {}).get('read')
+
+
+class ReplayTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
+    """httpx transport (sync and async) serving a ProviderReplay; latency past the read timeout times out"""
+
+    def __init__(self, replay: ProviderReplay):
+        self.replay = replay
+
+    def _build(self, request: httpx.Request, response: CannedResponse) -> httpx.Response:
+        return httpx.Response(response.status, headers=response.headers, content=response.body, request=request)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response, latency = self.replay.respond(request.method, str(request.url))
+        timeout = _read_timeout(request)
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise httpx.ReadTimeout("Replayed provider timed out", request=request)
+        time.sleep(latency)
+        return self._build(request, response)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response, latency = self.replay.respond(request.method, str(request.url))
+        timeout = _read_timeout(request)
+        if timeout is not None and latency > timeout:
+            await asyncio.sleep(timeout)
+            raise httpx.ReadTimeout("Replayed provider timed out", request=request)
+        await asyncio.sleep(latency)
+        return self._build(request, response)
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests transport adapter serving a ProviderReplay"""
+
+    def __init__(self, replay: ProviderReplay):
+        super().__init__()
+        self.replay = replay
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        canned, latency = self.replay.respond(request.method, request.url)
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and latency > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.exceptions.ReadTimeout("Replayed provider timed out", request=request)
+        time.sleep(latency)
+
+        response = requests.Response()
+        response.status_code = canned.status
+        response.headers = CaseInsensitiveDict(canned.headers)
+        response._content = canned.body
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Async httpx transport that passes requests through to the network and records the answers"""
+
+    def __init__(self, replay: ProviderReplay, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.replay = replay
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        body = await response.aread()
+        self.replay.record(request.method, str(request.url), response.status_code, dict(response.headers), body)
+        headers = {k: v for k, v in response.headers.items() if k.lower() != 'content-encoding'}
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class RecordingAdapter(HTTPAdapter):
+    """requests adapter that passes requests through to the network and records the answers"""
+
+    def __init__(self, replay: ProviderReplay, **kwargs):
+        super().__init__(**kwargs)
+        self.replay = replay
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.replay.record(request.method, request.url, response.status_code, dict(response.headers), response.content)
+        return response
+
+
+# Canned market data. Anything not listed gets a stable made-up price, so synthetic
+# portfolios of any size price offline.
+
+# symbol: (price, currency, previous close)
+CANNED_QUOTES = {
+    'AAPL': (190.0, 'USD', 188.5),
+    'MSFT': (410.0, 'USD', 405.2),
+    'VUAG.L': (8950.0, 'GBp', 8900.0),
+    'RR.L': (390.0, 'GBp', 385.0),
+    'SAP.DE': (180.0, 'EUR', 178.0),
+    'USDGBP=X': (0.79, 'GBP', 0.79),
+    'EURGBP=X': (0.85, 'GBP', 0.85),
+    'CHFGBP=X': (0.9, 'GBP', 0.9),
+    'JPYGBP=X': (0.0053, 'GBP', 0.0053),
+}
+# CoinGecko id: GBP price
+CANNED_COINS = {'bitcoin': 52000.0, 'ethereum': 2600.0, 'solana': 110.0}
+GBP_PER_USD = 0.79
+
+def synthetic_price(key: str, low: float = 5.0, high: float = 500.0) -> float:
+    """Stable made-up price for a symbol/ISIN/coin (same on every run and machine)"""
+    return round(low + (zlib.crc32(key.encode('utf-8')) % 100000) / 100000 * (high - low), 2)
+
+def _quote(symbol: str) -> Tuple[float, str, float]:
+    if symbol in CANNED_QUOTES:
+        return CANNED_QUOTES[symbol]
+    price = synthetic_price(symbol)
+    return (price * 100, 'GBp', price * 99) if symbol.endswith('.L') else (price, 'USD', round(price * 0.99, 2))
+
+def _yahoo_chart(request: ReplayRequest) -> CannedResponse:
+    symbol = request.path.rsplit('/', 1)[-1]
+    price, currency, previous_close = _quote(symbol)
+    return CannedResponse(200, {'chart': {'result': [{
+        'meta': {'symbol': symbol, 'currency': currency, 'regularMarketPrice': price, 'previousClose': previous_close},
+        'indicators': {'quote': [{'close': [previous_close, price]}]}
+    }], 'error': None}})
+
+def _yahoo_spark(request: ReplayRequest) -> CannedResponse:
+    body = {}
+    for symbol in request.params.get('symbols', '').split(','):
+        if symbol:
+            price, currency, previous_close = _quote(symbol)
+            body[symbol] = {'symbol': symbol, 'currency': currency, 'regularMarketPrice': price,
+                            'chartPreviousClose': previous_close, 'close': [price]}
+    return CannedResponse(200, body)
+
+def _coingecko(request: ReplayRequest) -> CannedResponse:
+    body = {}
+    for coin_id in request.params.get('ids', '').split(','):
+        if coin_id:
+            gbp = CANNED_COINS.get(coin_id) or synthetic_price(coin_id, 0.1, 1000.0)
+            body[coin_id] = {'gbp': gbp, 'usd': round(gbp / GBP_PER_USD, 4)}
+    return CannedResponse(200, body)
+
+def _google(request: ReplayRequest) -> CannedResponse:
+    if request.path.endswith('USD-GBP'):
+        value = f"{GBP_PER_USD:.4f}"
+    else:
+        ticker, _, exchange = (request.path.rsplit('/', 1)[-1] if 'quote' in request.path
+                               else request.params.get('q', '')).partition(':')
+        if exchange == 'LON':
+            value = f"GBX {_quote(ticker + '.L')[0]:,.2f}"
+        else:
+            value = f"${_quote(ticker)[0]:,.2f}"
+    return CannedResponse(200, f'<html><body><div class="YMlKec fxKbKc">{value}</div></body></html>')
+
+def _ft(request: ReplayRequest) -> CannedResponse:
+    isin, _, currency = request.params.get('s', '').partition(':')
+    pence = synthetic_price(isin, 100.0, 5000.0)
+    if currency == 'GBX':
+        label, value = 'GBX', pence
+    else:
+        label, value = 'GBP', pence / 100
+    return CannedResponse(200, f'<html><body><ul><li><span>Price ({label})</span>'
+                               f'<span class="mod-ui-data-list__value">{value:.2f}</span></li></ul></body></html>')
+
+def _hl(request: ReplayRequest) -> CannedResponse:
+    pence = synthetic_price(request.path, 100.0, 5000.0)
+    return CannedResponse(200, f'<html><body><div class="price"><span>Sell: {pence:,.2f}p</span>'
+                               f'<span>Buy: {pence:,.2f}p</span></div></body></html>')
+
+def _mempool(request: ReplayRequest) -> CannedResponse:
+    address = request.path.rsplit('/', 1)[-1]
+    funded = zlib.crc32(address.encode('utf-8')) % 1_000_000
+    return CannedResponse(200, {'address': address,
+                                'chain_stats': {'funded_txo_sum': funded, 'spent_txo_sum': 0},
+                                'mempool_stats': {'funded_txo_sum': 0, 'spent_txo_sum': 0}})
+
+def canned_providers(t212_positions: Optional[Sequence[Dict[str, Any]]] = None, **kwargs) -> ProviderReplay:
+    """
+    ProviderReplay answering Yahoo (chart/spark), CoinGecko, Google, FT, HL, Trading 212
+    and mempool.space with canned data. kwargs go to ProviderReplay (seed, latency, throttle).
+    """
+    replay = ProviderReplay(**kwargs)
+    replay.add_route('yahoo', '/v8/finance/chart/', _yahoo_chart)
+    replay.add_route('yahoo', '/v7/finance/spark', _yahoo_spark)
+    replay.add_route('coingecko', '/api/v3/simple/price', _coingecko)
+    replay.add_route('google', '/finance', _google)
+    replay.add_route('ft', '/data/funds/tearsheet/', _ft)
+    replay.add_route('hl', '/funds/', _hl)
+    replay.add_route('mempool', '/api/address/', _mempool)
+    if t212_positions is None:
+        t212_positions = [
+            {'ticker': 'AAPL_US_EQ', 'quantity': 10.0, 'averagePrice': 150.0, 'currentPrice': 190.0, 'ppl': 316.0},
+            {'ticker': 'VUAGl_EQ', 'quantity': 25.0, 'averagePrice': 8000.0, 'currentPrice': 8950.0, 'ppl': 237.5},
+        ]
+    replay.add_route('t212', '/api/v0/equity/portfolio', CannedResponse(200, list(t212_positions)))
+    return replay
@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+import logging
+
+from app.database import SessionLocal
+from app.models import PriceQuote
+
+logger = logging.getLogger(__name__)
+
+class QuoteStore:
+    """Persists the last good price per symbol in the price_quotes table"""
+    
+    def __init__(self, session_factory=None):
+        # Short-lived sessions per call (NullPool friendly)
+        self.session_factory = session_factory or SessionLocal
+
+    def load(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Return {symbol: {'price', 'previous_close', 'currency', 'source', 'time'}} for stored quotes"""
+        db = self.session_factory()
+        try:
+            query = db.query(PriceQuote)
+            if symbols is not None:
+                query = query.filter(PriceQuote.symbol.in_(symbols))
+            
+            return {
+                row.symbol: {
+                    'price': row.price,
+                    'previous_close': row.previous_close,
+                    'currency': row.currency,
+                    'source': row.source,
+                    'time': row.fetched_at
+                }
+                for row in query.all()
+            }
+        except Exception as e:
+            logger.warning(f"QuoteStore: Failed to load quotes: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def save(self, quotes: Dict[str, Dict]) -> int:
+        """Upsert quotes ({symbol: {'price', 'previous_close', 'source', 'time'}}). Returns rows written."""
+        if not quotes:
+            return 0
+        
+        db = self.session_factory()
+        try:
+            existing = {
+                row.symbol: row
+                for row in db.query(PriceQuote).filter(PriceQuote.symbol.in_(list(quotes.keys()))).all()
+            }
+            
+            for symbol, quote in quotes.items():
+                row = existing.get(symbol)
+                if row is None:
+                    row = PriceQuote(symbol=symbol)
+                    db.add(row)
+                row.price = quote['price']
+                row.previous_close = quote.get('previous_close')
+                row.currency = quote.get('currency') or 'GBP'
+                row.source = quote.get('source')
+                row.fetched_at = quote.get('time') or datetime.utcnow()
+            
+            db.commit()
+            return len(quotes)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"QuoteStore: Failed to save {len(quotes)} quotes: {e}")
+            return 0
+        finally:
+            db.close()
@@ -0,0 +1,63 @@
+from typing import Dict
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter for one provider.
+    Refills at `rate` tokens per second up to `capacity` (the allowed burst). Callers
+    reserve a token up front and sleep only as long as the bucket needs to refill, so
+    requests run at the provider's allowed rate and no slower.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: int):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Wait metrics
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token (possibly borrowing ahead) and return seconds to wait before using it"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+            self.acquired += 1
+            if wait > 0:
+                self.waited += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'rate_per_second': self.rate,
+                'capacity': self.capacity,
+                'tokens': round(self.tokens, 2),
+                'acquired': self.acquired,
+                'waited': self.waited,
+                'total_wait_seconds': round(self.total_wait, 3),
+                'avg_wait_seconds': round(self.total_wait / self.waited, 3) if self.waited else 0.0,
+                'max_wait_seconds': round(self.max_wait, 3)
+            }
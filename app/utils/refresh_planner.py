@@ -0,0 +1,56 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from datetime import datetime
+
+if TYPE_CHECKING:
+    from app.utils.price_fetcher import PriceFetcher
+
+class RefreshPlanner:
+    """
+    Decides which symbols a price refresh actually needs to fetch, from the age of each
+    symbol's current price (e.g. Investment.last_updated).
+    A symbol is due when it has no price, or its price is older than the freshness target
+    for its asset class and its market has moved since. `max_age` (seconds) replaces both
+    for one refresh (0 refetches everything).
+    """
+
+    # Freshness target (seconds) per market from the calendar; 'OTHER' for unknown exchanges.
+    # Live markets sit just under the 5 minute scheduler tick so every tick refreshes them.
+    FRESHNESS_TARGETS = {
+        'CRYPTO': 240,
+        'LSE': 240,
+        'US': 240,
+        'FUND': 6 * 3600, # One new NAV a day
+        'OTHER': 900,
+    }
+
+    def __init__(self, price_fetcher: 'PriceFetcher', targets: Optional[Dict[str, int]] = None):
+        self.price_fetcher = price_fetcher
+        self.targets = {**self.FRESHNESS_TARGETS, **(targets or {})}
+
+    def target_for(self, symbol: str) -> int:
+        market = self.price_fetcher.market_for(symbol)
+        return self.targets.get(market.name if market else 'OTHER', self.targets['OTHER'])
+
+    def plan(self, priced_at: Dict[str, Optional[datetime]], max_age: Optional[int] = None,
+             now: Optional[datetime] = None) -> Tuple[List[str], List[str]]:
+        """
+        Split symbols into (due, fresh) given {symbol: time of its current price (UTC), or None
+        if it has none}.
+        """
+        now = now or datetime.utcnow()
+        due = []
+        fresh = []
+        for symbol, as_of in priced_at.items():
+            if as_of is None or max_age == 0:
+                due.append(symbol)
+                continue
+
+            target = max_age if max_age is not None else self.target_for(symbol)
+            age = (now - as_of).total_seconds()
+            market = self.price_fetcher.market_for(symbol)
+            if age < target or (max_age is None and market is not None and not market.moved_since(as_of, now)):
+                fresh.append(symbol)
+            else:
+                due.append(symbol)
+
+        return due, fresh
@@ -0,0 +1,92 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+import asyncio
+import threading
+
+class SingleFlight:
+    """
+    In-flight request table: concurrent callers asking for the same key await one shared task
+    instead of each doing the network work. Entries are per event loop and disappear as soon
+    as the task finishes (results are cached elsewhere).
+    """
+
+    def __init__(self):
+        # {(loop, namespace, key): (task, extract)} where extract(task_result) -> value for key
+        self._calls: Dict[Tuple, Tuple[asyncio.Future, Callable[[Any], Any]]] = {}
+        self._lock = threading.Lock()
+        # Calls that joined an existing flight, per namespace
+        self.coalesced: Dict[str, int] = {}
+        self.started: Dict[str, int] = {}
+
+    def _register(self, entries: Dict[Tuple, Callable[[Any], Any]], task: asyncio.Future):
+        for k, extract in entries.items():
+            self._calls[k] = (task, extract)
+
+        def forget(_):
+            with self._lock:
+                for k in entries:
+                    if self._calls.get(k, (None,))[0] is task:
+                        del self._calls[k]
+        task.add_done_callback(forget)
+
+    async def do(self, namespace: str, key: Hashable, fn: Callable[[], Awaitable]) -> Any:
+        """Run fn() for key, or join the call already in flight for it"""
+        loop = asyncio.get_running_loop()
+        k = (loop, namespace, key)
+        with self._lock:
+            entry = self._calls.get(k)
+            if entry is None:
+                task = asyncio.ensure_future(fn())
+                self._register({k: lambda result: result}, task)
+                self.started[namespace] = self.started.get(namespace, 0) + 1
+                entry = self._calls[k]
+            else:
+                self.coalesced[namespace] = self.coalesced.get(namespace, 0) + 1
+
+        task, extract = entry
+        # Shield so one caller being cancelled doesn't cancel the work others wait on
+        return extract(await asyncio.shield(task))
+
+    async def do_many(self, namespace: str, keys: List[Hashable],
+                      fn: Callable[[List[Hashable]], Awaitable[Dict]]) -> Dict:
+        """
+        Resolve many keys at once: keys already in flight join their calls, the rest are
+        fetched together by one fn(missing_keys) -> {key: value}. Returns {key: value}
+        for keys that resolved to a value.
+        """
+        loop = asyncio.get_running_loop()
+        joined = {}
+        missing = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._calls.get((loop, namespace, key))
+                if entry is None:
+                    missing.append(key)
+                else:
+                    joined[key] = entry
+            if joined:
+                self.coalesced[namespace] = self.coalesced.get(namespace, 0) + len(joined)
+
+            if missing:
+                task = asyncio.ensure_future(fn(missing))
+                self._register(
+                    {(loop, namespace, key): (lambda result, key=key: (result or {}).get(key)) for key in missing},
+                    task
+                )
+                self.started[namespace] = self.started.get(namespace, 0) + len(missing)
+
+        results = {}
+        if missing:
+            results.update(await asyncio.shield(task) or {})
+        for key, (joined_task, extract) in joined.items():
+            value = extract(await asyncio.shield(joined_task))
+            if value is not None:
+                results[key] = value
+        return results
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'started': dict(self.started),
+                'coalesced': dict(self.coalesced)
+            }
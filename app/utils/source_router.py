@@ -0,0 +1,70 @@
+from typing import Dict, List, Optional
+import threading
+
+class SourceRouter:
+    """
+    Learns which price source works for each symbol and how fast it answers.
+    Sources that last succeeded for a symbol are tried first (fastest first),
+    then untried sources in their default order, then ones that only failed.
+    """
+
+    # Weight of the newest latency sample in the moving average
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self):
+        # {symbol: {source: {'successes': int, 'failures': int, 'latency': float, 'last_ok': bool}}}
+        self._stats: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, symbol: str, source: str) -> Dict:
+        return self._stats.setdefault(symbol, {}).setdefault(
+            source, {'successes': 0, 'failures': 0, 'latency': None, 'last_ok': False}
+        )
+
+    def record_success(self, symbol: str, source: str, latency: Optional[float] = None):
+        with self._lock:
+            entry = self._entry(symbol, source)
+            entry['successes'] += 1
+            entry['last_ok'] = True
+            if latency is not None:
+                if entry['latency'] is None:
+                    entry['latency'] = latency
+                else:
+                    entry['latency'] = self.LATENCY_ALPHA * latency + (1 - self.LATENCY_ALPHA) * entry['latency']
+
+    def record_failure(self, symbol: str, source: str):
+        with self._lock:
+            entry = self._entry(symbol, source)
+            entry['failures'] += 1
+            entry['last_ok'] = False
+
+    def order(self, symbol: str, candidates: List[str]) -> List[str]:
+        """Return candidates in the order they should be tried for this symbol"""
+        with self._lock:
+            stats = dict(self._stats.get(symbol, {}))
+
+        def rank(item):
+            index, source = item
+            entry = stats.get(source)
+            if entry and entry['last_ok']:
+                # Unknown latency (e.g. seeded from the DB) sorts after measured ones
+                latency = entry['latency'] if entry['latency'] is not None else float('inf')
+                return (0, latency, index)
+            if entry is None or entry['successes'] > 0:
+                return (1, 0, index)
+            return (2, 0, index)
+
+        return [source for _, source in sorted(enumerate(candidates), key=rank)]
+
+    def preferred(self, symbol: str) -> Optional[str]:
+        """Best known source for a symbol, or None if nothing has succeeded yet"""
+        with self._lock:
+            stats = self._stats.get(symbol, {})
+            known = [(e['latency'] if e['latency'] is not None else float('inf'), source)
+                     for source, e in stats.items() if e['last_ok']]
+        return min(known)[1] if known else None
+
+    def to_dict(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {symbol: {source: dict(entry) for source, entry in sources.items()}
+                    for symbol, sources in self._stats.items()}
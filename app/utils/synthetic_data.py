@@ -0,0 +1,258 @@
+"""
+Synthetic portfolios and history for scale testing and benchmarks.
+
+Usage:
+    python -m app.utils.synthetic_data [--users N] [--holdings N] [--snapshot-days DAYS | --snapshots N]
+        [--months N] [--wallets N] [--platforms A,B,...] [--seed N] [--now ISO] [--database-url URL]
+        [--create-tables]
+
+Writes to DATABASE_URL unless --database-url is given. Output is deterministic: the same seed
+and options give the same rows (pass --now as well to pin the timestamps).
+"""
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models import (
+    CryptoBalanceSnapshot, CryptoWallet, Investment, MonthlyFinancialRecord, NetWorthSnapshot, PlatformCash, User
+)
+from app.utils.fund_registry import DEFAULT_SPECIAL_FUNDS
+from app.utils.provider_replay import synthetic_price
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+import argparse
+import math
+import random
+
+# What each platform holds: US stocks, LSE stocks/ETFs, funds (registry ISINs) or crypto
+PLATFORM_KINDS = {
+    'Trading212 ISA': ('us', 'uk'),
+    'InvestEngine ISA': ('uk',),
+    'Degiro': ('us', 'uk'),
+    'HL Stocks & Shares LISA': ('fund',),
+    'Crypto': ('crypto',),
+}
+CRYPTO_SYMBOLS = ('BTC', 'ETH', 'SOL', 'ADA', 'DOT', 'LINK', 'AVAX', 'XRP', 'LTC', 'UNI')
+BECH32_CHARS = 'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
+
+
+class SyntheticDataGenerator:
+    """
+    Creates users with holdings across platforms, platform cash, monthly records, a net worth
+    snapshot series and BTC wallets, all with bulk inserts in batches of `batch_size` rows.
+    Each user draws from its own generator seeded by (seed, user index), so adding users or
+    changing one table's options doesn't reshuffle the others.
+    """
+
+    def __init__(self, db: Session, seed: int = 0, now: Optional[datetime] = None, batch_size: int = 10000):
+        self.db = db
+        self.seed = seed
+        self.now = (now or datetime.utcnow()).replace(second=0, microsecond=0)
+        self.batch_size = batch_size
+
+    def generate(self, users: int = 1, holdings: int = 20, platforms: Sequence[str] = tuple(PLATFORM_KINDS),
+                 months: int = 24, snapshot_days: float = 365, snapshots: Optional[int] = None,
+                 snapshot_minutes: int = 5, wallets: int = 1, symbol_pool: int = 200,
+                 t212_sync: bool = False) -> Dict[str, int]:
+        """
+        Generate `users` users. `snapshots` (a row count) overrides `snapshot_days`; `symbol_pool`
+        is how many distinct tickers of each kind users pick from (shared tickers are realistic
+        for price refreshes). With t212_sync, users get encrypted placeholder Trading212
+        credentials and auto-sync enabled. Returns rows written per table.
+        """
+        counts = {'users': 0, 'investments': 0, 'platform_cash': 0, 'monthly_records': 0,
+                  'snapshots': 0, 'wallets': 0, 'wallet_snapshots': 0}
+        points = snapshots if snapshots is not None else int(snapshot_days * 24 * 60 / snapshot_minutes)
+
+        for index in range(users):
+            rng = random.Random(f"{self.seed}:{index}")
+            user = User(email=f"synthetic-{self.seed}-{index}@example.com", created_at=self.now,
+                        preferences=self._preferences() if t212_sync else {})
+            self.db.add(user)
+            self.db.flush()
+            counts['users'] += 1
+
+            rows = self._investments(rng, user.id, holdings, platforms, symbol_pool)
+            self._insert(Investment, rows)
+            counts['investments'] += len(rows)
+
+            cash = [{'user_id': user.id, 'platform': platform, 'cash_balance': round(rng.uniform(0, 5000), 2),
+                     'last_updated': self.now} for platform in platforms]
+            self._insert(PlatformCash, cash)
+            counts['platform_cash'] += len(cash)
+
+            totals = self._platform_totals(rows, cash)
+            net_worth = sum(totals.values())
+            records = self._monthly_records(rng, user.id, months, net_worth)
+            self._insert(MonthlyFinancialRecord, records)
+            counts['monthly_records'] += len(records)
+
+            counts['snapshots'] += self._insert(NetWorthSnapshot,
+                                                self._snapshots(rng, user.id, totals, points, snapshot_minutes))
+
+            for _ in range(wallets):
+                counts['wallet_snapshots'] += self._wallet(rng, user.id)
+                counts['wallets'] += 1
+
+            self.db.commit()
+        return counts
+
+    def _insert(self, model, rows) -> int:
+        """Bulk insert an iterable of row dicts in batches; returns the row count"""
+        written = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.db.execute(insert(model), batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            self.db.execute(insert(model), batch)
+            written += len(batch)
+        return written
+
+    def _preferences(self) -> Dict:
+        from app.utils.security import encrypt_value
+        return {'trading212_sync': {
+            'enabled': True,
+            'api_key_id_enc': encrypt_value('synthetic-key'),
+            'api_secret_key_enc': encrypt_value('synthetic-secret'),
+        }}
+
+    def _symbol(self, rng: random.Random, kind: str, symbol_pool: int) -> str:
+        if kind == 'us':
+            return f"US{rng.randrange(symbol_pool):04d}"
+        if kind == 'uk':
+            return f"UK{rng.randrange(symbol_pool):04d}.L"
+        if kind == 'fund':
+            return rng.choice(sorted(DEFAULT_SPECIAL_FUNDS))
+        return rng.choice(CRYPTO_SYMBOLS)
+
+    def _investments(self, rng: random.Random, user_id: int, holdings: int, platforms: Sequence[str],
+                     symbol_pool: int) -> List[Dict]:
+        rows = []
+        held = set()
+        for _ in range(holdings):
+            platform = rng.choice(platforms)
+            kind = rng.choice(PLATFORM_KINDS.get(platform, ('us', 'uk')))
+            symbol = self._symbol(rng, kind, symbol_pool)
+            if (platform, symbol) in held:
+                # Pools are small for funds and crypto; a repeat becomes a US stock instead
+                symbol = f"US{len(rows):04d}X"
+            held.add((platform, symbol))
+
+            price = synthetic_price(symbol)
+            quantity = round(rng.uniform(1, 200), 4) if kind != 'crypto' else round(rng.uniform(0.01, 5), 6)
+            bought_at = price * rng.uniform(0.6, 1.2)
+            rows.append({
+                'user_id': user_id, 'platform': platform, 'name': symbol, 'symbol': symbol,
+                'holdings': quantity, 'amount_spent': round(quantity * bought_at, 2),
+                'average_buy_price': round(bought_at, 4), 'current_price': price,
+                # Every price needs a refresh on the first tick
+                'last_updated': self.now - timedelta(days=rng.randint(1, 30)),
+                'created_at': self.now - timedelta(days=rng.randint(30, 1500)),
+            })
+        return rows
+
+    @staticmethod
+    def _platform_totals(investments: List[Dict], cash: List[Dict]) -> Dict[str, float]:
+        totals = {}
+        for row in investments:
+            totals[row['platform']] = totals.get(row['platform'], 0.0) + row['holdings'] * row['current_price']
+        for row in cash:
+            totals[row['platform']] = totals.get(row['platform'], 0.0) + row['cash_balance']
+        return totals
+
+    def _monthly_records(self, rng: random.Random, user_id: int, months: int, net_worth: float) -> List[Dict]:
+        rows = []
+        period = date(self.now.year, self.now.month, 1)
+        for _ in range(months):
+            income = round(rng.uniform(3000, 6000), 2)
+            expenses = round(income * rng.uniform(0.5, 0.9), 2)
+            invested = round((income - expenses) * rng.uniform(0.3, 1.0), 2)
+            rows.append({'user_id': user_id, 'period_date': period, 'net_worth': round(net_worth, 2),
+                         'total_income': income, 'total_expenses': expenses, 'total_invested': invested,
+                         'details': {}, 'created_at': self.now})
+            # Walk back a month: take off that month's saving and some market growth
+            net_worth = max(0.0, (net_worth - invested) / (1 + rng.gauss(0.005, 0.03)))
+            period = (period - timedelta(days=1)).replace(day=1)
+        return rows
+
+    def _snapshots(self, rng: random.Random, user_id: int, totals: Dict[str, float], points: int,
+                   minutes: int) -> Iterator[Dict]:
+        """Net worth walking back from today's totals: ~6%/year drift, daily swing, per-step noise"""
+        steps_per_year = 365 * 24 * 60 / minutes
+        drift = 0.06 / steps_per_year
+        noise = 0.12 / math.sqrt(steps_per_year)
+        net_worth = sum(totals.values()) or 1.0
+        shares = {platform: value / net_worth for platform, value in totals.items()}
+
+        for step in range(1, points + 1):
+            timestamp = self.now - timedelta(minutes=minutes * step)
+            net_worth /= 1 + drift + rng.gauss(0, noise)
+            hour = timestamp.hour + timestamp.minute / 60
+            value = net_worth * (1 + 0.002 * math.sin(hour / 24 * 2 * math.pi))
+            yield {'user_id': user_id, 'timestamp': timestamp, 'total_amount': round(value, 2),
+                   'assets_breakdown': {p: round(value * share, 2) for p, share in shares.items()},
+                   'currency': 'GBP', 'created_at': timestamp}
+
+    def _wallet(self, rng: random.Random, user_id: int, days: int = 90) -> int:
+        """A BTC address wallet with its own investment and daily balance history; returns snapshot rows"""
+        address = 'bc1q' + ''.join(rng.choice(BECH32_CHARS) for _ in range(38))
+        balance = round(rng.uniform(0.01, 2), 8)
+        investment = Investment(user_id=user_id, platform='Crypto', name='Bitcoin (wallet)', symbol='BTC',
+                                holdings=balance, current_price=synthetic_price('BTC'),
+                                last_updated=self.now - timedelta(days=1), created_at=self.now)
+        self.db.add(investment)
+        self.db.flush()
+        wallet = CryptoWallet(investment_id=investment.id, xpub=address, address_type='bech32',
+                              last_synced_at=self.now, created_at=self.now)
+        self.db.add(wallet)
+        self.db.flush()
+
+        history = []
+        for day in range(days):
+            history.append({'wallet_id': wallet.id, 'timestamp': self.now - timedelta(days=day),
+                            'balance': balance, 'currency': 'BTC'})
+            if rng.random() < 0.1:
+                balance = max(0.0, round(balance - rng.uniform(-0.05, 0.05), 8))
+        return self._insert(CryptoBalanceSnapshot, history)
+
+
+def main():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.database import Base, SQLALCHEMY_DATABASE_URI
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1)
+    parser.add_argument('--holdings', type=int, default=20, help='holdings per user')
+    parser.add_argument('--platforms', default=','.join(PLATFORM_KINDS))
+    parser.add_argument('--months', type=int, default=24, help='monthly records per user')
+    parser.add_argument('--snapshot-days', type=float, default=365, help='days of snapshot history per user')
+    parser.add_argument('--snapshots', type=int, help='snapshot rows per user (overrides --snapshot-days)')
+    parser.add_argument('--snapshot-minutes', type=int, default=5)
+    parser.add_argument('--wallets', type=int, default=1, help='BTC wallets per user')
+    parser.add_argument('--t212-sync', action='store_true', help='enable Trading212 auto-sync with placeholder credentials')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--now', type=datetime.fromisoformat, help='pin "now" (UTC) for reproducible timestamps')
+    parser.add_argument('--database-url', default=SQLALCHEMY_DATABASE_URI)
+    parser.add_argument('--create-tables', action='store_true')
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url.replace('postgres://', 'postgresql://', 1))
+    if args.create_tables:
+        Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        counts = SyntheticDataGenerator(db, seed=args.seed, now=args.now).generate(
+            users=args.users, holdings=args.holdings, platforms=args.platforms.split(','), months=args.months,
+            snapshot_days=args.snapshot_days, snapshots=args.snapshots, snapshot_minutes=args.snapshot_minutes,
+            wallets=args.wallets, t212_sync=args.t212_sync
+        )
+    finally:
+        db.close()
+    print(', '.join(f"{count} {table}" for table, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import quote
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+class YahooClient:
+    """
+    Small client for Yahoo's chart and spark JSON endpoints.
+    Quotes come back as plain {'price', 'previous_close', 'currency'} values (previous_close
+    may be None), so the hot path never builds a yfinance Ticker or a pandas DataFrame.
+    Requests go through `get(url, **kwargs)` so the caller keeps its own rate limiting
+    and circuit breaking.
+    """
+
+    CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+    # Spark returns quote meta for many symbols per request
+    SPARK_URL = "https://query1.finance.yahoo.com/v7/finance/spark"
+    BATCH_SIZE = 20 # Yahoo rejects larger symbol lists
+
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'application/json'
+    }
+
+    def __init__(self, get: Callable[..., Awaitable[httpx.Response]]):
+        self._get = get
+
+    async def get_quote(self, symbol: str) -> Optional[Dict]:
+        """
+        Quote for one symbol from the chart endpoint (5 daily bars), or None if Yahoo has no data
+        for it. Raises httpx.HTTPStatusError when Yahoo is throttling (429) or failing (5xx).
+        """
+        params = {'range': '5d', 'interval': '1d'}
+        response = await self._get(self.CHART_URL.format(symbol=quote(symbol, safe='')),
+                                   params=params, headers=self.HEADERS, timeout=10)
+        if response.status_code == 429 or response.status_code >= 500:
+            response.raise_for_status()
+        if response.status_code != 200:
+            logger.debug(f"Yahoo chart failed ({response.status_code}) for {symbol}")
+            return None
+        return self.parse_chart(response.json())
+
+    async def get_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Quotes for up to BATCH_SIZE symbols in one spark request: {symbol: quote}"""
+        params = {'symbols': ','.join(symbols), 'range': '1d', 'interval': '1d'}
+        response = await self._get(self.SPARK_URL, params=params, headers=self.HEADERS, timeout=10)
+        if response.status_code != 200:
+            logger.warning(f"Yahoo batch quote failed ({response.status_code}) for {len(symbols)} symbols")
+            return {}
+        return self.parse_spark(response.json())
+
+    @staticmethod
+    def parse_chart(data: Dict) -> Optional[Dict]:
+        """
+        Quote from a chart payload. The last bar is the current session, so the close before
+        it is the previous close when the meta doesn't carry one.
+        """
+        results = ((data or {}).get('chart') or {}).get('result') or []
+        if not results:
+            return None
+        meta = results[0].get('meta') or {}
+        closes = ((((results[0].get('indicators') or {}).get('quote') or [{}])[0]).get('close') or [])
+        valid_closes = [c for c in closes if c is not None]
+
+        price = meta.get('regularMarketPrice')
+        if price is None and valid_closes:
+            price = valid_closes[-1]
+        if price is None:
+            return None
+
+        previous_close = meta.get('previousClose')
+        if previous_close is None and len(valid_closes) > 1:
+            previous_close = valid_closes[-2]
+
+        return {
+            'price': float(price),
+            'previous_close': float(previous_close) if previous_close is not None else None,
+            'currency': meta.get('currency')
+        }
+
+    @staticmethod
+    def parse_spark(data: Dict) -> Dict[str, Dict]:
+        """Parse both spark payload shapes (nested 'spark.result' and flat per-symbol)"""
+        quotes = {}
+
+        if isinstance(data, dict) and 'spark' in data:
+            entries = []
+            for result in (data['spark'] or {}).get('result') or []:
+                responses = result.get('response') or []
+                if not responses:
+                    continue
+                meta = responses[0].get('meta') or {}
+                closes = (((responses[0].get('indicators') or {}).get('quote') or [{}])[0]).get('close') or []
+                entries.append((result.get('symbol'), meta, closes))
+        else:
+            entries = [(symbol, body, body.get('close') or []) for symbol, body in (data or {}).items() if isinstance(body, dict)]
+
+        for symbol, meta, closes in entries:
+            if not symbol:
+                continue
+
+            price = meta.get('regularMarketPrice')
+            if price is None:
+                valid_closes = [c for c in closes if c is not None]
+                if valid_closes:
+                    price = valid_closes[-1]
+            if price is None:
+                continue
+
+            # range=1d, so the chart's previous close is yesterday's
+            previous_close = meta.get('previousClose')
+            if previous_close is None:
+                previous_close = meta.get('chartPreviousClose')
+
+            quotes[symbol] = {
+                'price': float(price),
+                'previous_close': float(previous_close) if previous_close is not None else None,
+                'currency': meta.get('currency')
+            }
+
+        return quotes
@@ -0,0 +1,206 @@
+"""
+Benchmark the streaming HTML price extractors against the old whole-page regex scrapes.
+
+Usage:
+    python benchmarks/bench_html_extractors.py [--pages DIR | --synthetic] [--repeat N] [--chunk BYTES]
+    python benchmarks/bench_html_extractors.py --save DIR
+
+Runs over the saved pages in benchmarks/pages by default: every file named hl_*.html,
+ft_*.html, google_*.html or fx_*.html is a page of that kind (see benchmarks/pages/README.md).
+--pages DIR uses another directory, --synthetic generated pages (large page, price element near
+the top). --save DIR fetches the live HL / FT / Google Finance pages the price fetcher scrapes
+into DIR, e.g. to refresh benchmarks/pages.
+
+"read KB" is how much of the page the streaming extractor needed before it could stop the
+download; the timings are CPU only.
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+import httpx
+
+sys.path.append(os.getcwd())
+
+from app.utils.fund_registry import DEFAULT_SPECIAL_FUNDS
+from app.utils.html_extractors import (
+    FtPriceExtractor, GoogleFxExtractor, GoogleQuoteExtractor, HlPriceExtractor
+)
+
+
+# --- Old implementations (whole page, re.findall per pattern) ---
+
+def legacy_hl(html_content):
+    price_patterns = [
+        r'Sell:\s*([1-9][\d,]{3,6}\.?\d*)p',
+        r'Buy:\s*([1-9][\d,]{3,6}\.?\d*)p',
+        r'Price:\s*([1-9][\d,]{3,6}\.?\d*)p',
+        r'>([1-9][\d,]{3,6}\.?\d*)p</span>',
+        r'Sell:\s*(\d{3,4}\.?\d*)p',
+        r'Buy:\s*(\d{3,4}\.?\d*)p',
+        r'(\d{3,4}\.?\d*)p\s+(?:Buy|Sell)',
+    ]
+    all_matches = []
+    for priority, pattern in enumerate(price_patterns):
+        for match in re.findall(pattern, html_content, re.IGNORECASE):
+            try:
+                price_pence = float(match.replace(',', ''))
+                if 10 <= price_pence <= 500000:
+                    all_matches.append((price_pence, priority))
+            except ValueError:
+                continue
+    if all_matches:
+        all_matches.sort(key=lambda x: x[1])
+        return all_matches[0][0] / 100
+    return None
+
+
+def legacy_ft(content):
+    html_patterns = [
+        (r'Price\s*\(GBP\)</span>\s*<span[^>]*>(\d+\.?\d*)</span>', 1.0),
+        (r'Price\s*\(GBP\)\s*(\d+\.?\d*)', 1.0),
+        (r'Price\s*</span>\s*<span[^>]*>£?(\d+\.?\d*)</span>', 1.0),
+        (r'Price\s*\(GBX\)</span>\s*<span[^>]*>(\d+\.?\d*)</span>', 100.0),
+        (r'Price\s*\(GBX\)\s*(\d+\.?\d*)', 100.0),
+    ]
+    for pattern, divisor in html_patterns:
+        matches = re.findall(pattern, content, re.IGNORECASE)
+        if matches:
+            return float(matches[0]) / divisor
+    return None
+
+
+def legacy_google(content):
+    matches = re.findall(r'class="YMlKec fxKbKc">([^<]+)</div>', content)
+    if matches:
+        raw_text = matches[0]
+        currency = None
+        if 'GBX' in raw_text:
+            currency = 'GBX'
+        elif '£' in raw_text:
+            currency = 'GBP'
+        elif '$' in raw_text:
+            currency = 'USD'
+        elif '€' in raw_text:
+            currency = 'EUR'
+        clean = raw_text.replace('$', '').replace('£', '').replace(',', '').replace('GBX', '').strip()
+        return (float(clean), currency)
+    return None
+
+
+def legacy_fx(content):
+    matches = re.findall(r'class="YMlKec fxKbKc">([^<]+)</div>', content)
+    if matches:
+        return float(matches[0].replace(',', '').strip())
+    for m in re.findall(r'>(\d+\.\d{4,})<', content):
+        val = float(m)
+        if 0.5 < val < 1.0:
+            return val
+    return None
+
+
+KINDS = {
+    'hl': (legacy_hl, HlPriceExtractor),
+    'ft': (legacy_ft, FtPriceExtractor),
+    'google': (legacy_google, GoogleQuoteExtractor),
+    'fx': (legacy_fx, GoogleFxExtractor),
+}
+
+
+def synthetic_pages():
+    filler = ''.join(
+        f'<div class="row"><span class="label">Item {i}</span><span class="value">{i * 1.5:.2f}</span></div>'
+        for i in range(3000)
+    )
+    head = '<html><head><script>' + 'var x = 1;' * 2000 + '</script></head><body>'
+    tail = filler + '</body></html>'
+    return {
+        'hl': [('synthetic', head + '<div class="price"><span>Sell: 1,234.50p</span><span>Buy: 1,240.00p</span></div>' + tail)],
+        'ft': [('synthetic', head + '<li><span>Price (GBX)</span><span class="mod-ui-data-list__value">355.10</span></li>' + tail)],
+        'google': [('synthetic', head + '<div class="YMlKec fxKbKc">$185.10</div>' + tail)],
+        'fx': [('synthetic', head + '<div class="YMlKec fxKbKc">0.7925</div>' + tail)],
+    }
+
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+
+# Live pages for --save: {file name: URL}, the pages PriceFetcher scrapes
+LIVE_PAGES = {
+    'hl_positive_change.html': DEFAULT_SPECIAL_FUNDS['GB00BYVGKV59']['hl_url'],
+    'hl_ubs_sp500.html': DEFAULT_SPECIAL_FUNDS['GB00BMN91T34']['hl_url'],
+    'ft_positive_change.html': DEFAULT_SPECIAL_FUNDS['GB00BYVGKV59']['ft_url'],
+    'ft_global_tech.html': DEFAULT_SPECIAL_FUNDS['LU1033663649']['ft_url'],
+    'google_rr_lon.html': 'https://www.google.com/finance/quote/RR:LON',
+    'google_aapl_nasdaq.html': 'https://www.google.com/finance/quote/AAPL:NASDAQ',
+    'fx_usd_gbp.html': 'https://www.google.com/finance/quote/USD-GBP',
+}
+
+
+def save_pages(directory):
+    os.makedirs(directory, exist_ok=True)
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+    with httpx.Client(headers=headers, timeout=20, follow_redirects=True) as client:
+        for name, url in LIVE_PAGES.items():
+            response = client.get(url)
+            if response.status_code != 200:
+                print(f"{name}: HTTP {response.status_code}, not saved")
+                continue
+            with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+                f.write(response.text)
+            print(f"{name}: {len(response.text) / 1024:.0f} KB")
+
+
+def saved_pages(directory):
+    pages = {kind: [] for kind in KINDS}
+    for name in sorted(os.listdir(directory)):
+        kind = name.split('_', 1)[0]
+        if kind in pages and name.endswith('.html'):
+            with open(os.path.join(directory, name), encoding='utf-8', errors='replace') as f:
+                pages[kind].append((name, f.read()))
+    return pages
+
+
+def stream(extractor_cls, page, chunk):
+    """Feed the page in chunks like the HTTP stream; returns (value, chars read)"""
+    extractor = extractor_cls()
+    read = 0
+    for i in range(0, len(page), chunk):
+        read += len(page[i:i + chunk])
+        if extractor.feed(page[i:i + chunk]):
+            break
+    return extractor.close(), read
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', default=PAGES_DIR,
+                        help='directory of saved pages (hl_*.html, ft_*.html, google_*.html, fx_*.html)')
+    parser.add_argument('--synthetic', action='store_true', help='use generated pages instead of saved ones')
+    parser.add_argument('--save', metavar='DIR', help='fetch the live pages into DIR and exit')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--chunk', type=int, default=8192, help='stream chunk size in characters')
+    args = parser.parse_args()
+
+    if args.save:
+        save_pages(args.save)
+        return
+    pages = synthetic_pages() if args.synthetic else saved_pages(args.pages)
+
+    print(f"{'page':<26}{'page KB':>9}{'read KB':>9}{'legacy ms':>11}{'stream ms':>11}{'speedup':>9}  result")
+    for kind, (legacy, extractor_cls) in KINDS.items():
+        for name, page in pages.get(kind, []):
+            expected = legacy(page)
+            value, read = stream(extractor_cls, page, args.chunk)
+            if value != expected:
+                print(f"{name}: MISMATCH legacy={expected!r} stream={value!r}")
+
+            legacy_ms = timeit.timeit(lambda: legacy(page), number=args.repeat) / args.repeat * 1000
+            stream_ms = timeit.timeit(lambda: stream(extractor_cls, page, args.chunk), number=args.repeat) / args.repeat * 1000
+            print(f"{name:<26}{len(page) / 1024:>9.0f}{read / 1024:>9.0f}{legacy_ms:>11.3f}{stream_ms:>11.3f}"
+                  f"{legacy_ms / stream_ms:>8.1f}x  {value!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark one scheduler tick (price refresh, Trading212 sync, snapshot, history cleanup) as
+holdings and history grow.
+
+Usage:
+    python benchmarks/bench_scheduler_tick.py [--holdings 10,100,1000] [--snapshots 10000,100000]
+        [--db sqlite|sqlite-memory|URL ...] [--ticks N] [--latency MIN,MAX] [--throttle P] [--seed N]
+
+Every (database, holdings, snapshots) combination gets freshly created tables seeded by
+app.utils.synthetic_data with one user, that many holdings (US/LSE stocks, funds, crypto across
+platforms, Trading212 auto-sync enabled) and that many 5-minutely snapshots going back from
+now; the same --seed seeds the same data. Then SchedulerService.run_tick
+runs --ticks times against canned provider responses (app.utils.provider_replay), so nothing
+touches the network. The first tick is cold (every price due, the whole history to thin),
+later ones show the steady state.
+
+Reports seconds and SQL statements per stage. --db defaults to an on-disk SQLite file; pass a
+postgresql:// URL (or set BENCH_DATABASE_URL) to add Postgres. Its tables are dropped and
+recreated, so don't point it at real data.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.getcwd())
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Investment, User
+from app.services.scheduler_service import SchedulerService
+from app.utils import price_fetcher as pf
+from app.utils.http_client import AsyncHttpClient
+from app.utils.price_cache import PriceCache
+from app.utils.provider_replay import canned_providers
+from app.utils.synthetic_data import SyntheticDataGenerator
+
+STAGES = ('prices', 't212', 'snapshot', 'cleanup')
+
+
+class QueryCounter:
+    """SQL statements per stage, from the engine's before_cursor_execute event"""
+
+    def __init__(self, engine):
+        self.counts = {}
+        self.stage = None
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        if self.stage is not None:
+            self.counts[self.stage] = self.counts.get(self.stage, 0) + 1
+
+    def start(self, stage):
+        self.stage = stage
+
+    def reset(self):
+        self.counts, self.stage = {}, None
+
+
+def make_engine(db):
+    if db == 'sqlite-memory':
+        return create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    if db == 'sqlite':
+        path = os.path.join(tempfile.mkdtemp(prefix='bench_tick_'), 'bench.db')
+        return create_engine(f'sqlite:///{path}', connect_args={'check_same_thread': False})
+    return create_engine(db.replace('postgres://', 'postgresql://', 1))
+
+
+def t212_positions(session, user_id):
+    """The user's Trading212 holdings as the T212 portfolio endpoint returns them"""
+    positions = []
+    for inv in session.query(Investment).filter(Investment.user_id == user_id, Investment.platform == 'Trading212 ISA'):
+        ticker = f"{inv.symbol[:-2]}l_EQ" if inv.symbol.endswith('.L') else f"{inv.symbol}_US_EQ"
+        positions.append({'ticker': ticker, 'quantity': inv.holdings, 'averagePrice': inv.average_buy_price,
+                          'currentPrice': inv.current_price, 'ppl': 0.0})
+    return positions
+
+
+def use_replayed_providers(replay):
+    """Point the shared PriceFetcher at the replay, with empty class-level caches"""
+    pf.PriceFetcher._PRICE_CACHE = PriceCache()
+    pf.PriceFetcher._CURRENCY_CACHE = {}
+    pf.PriceFetcher._COINGECKO_CACHE = {'time': None, 'data': {}}
+    pf._shared_fetcher = pf.PriceFetcher(http_client=AsyncHttpClient(transport=replay.transport()),
+                                         use_yfinance=False)
+
+
+def run(db, holdings, snapshots, args):
+    engine = make_engine(db)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    started = time.perf_counter()
+    session = Session()
+    SyntheticDataGenerator(session, seed=args.seed).generate(users=1, holdings=holdings, snapshots=snapshots,
+                                                             t212_sync=True)
+    user_id = session.query(User.id).scalar()
+    positions = t212_positions(session, user_id)
+    session.close()
+    seeded = time.perf_counter() - started
+
+    latency = tuple(float(x) for x in args.latency.split(','))
+    replay = canned_providers(t212_positions=positions, seed=args.seed,
+                              latency={'*': latency if len(latency) == 2 else latency[0]},
+                              throttle={'*': args.throttle})
+    use_replayed_providers(replay)
+    counter = QueryCounter(engine)
+
+    results = []
+    for tick in range(1, args.ticks + 1):
+        counter.reset()
+        requests_before = len(replay.requests)
+        session = Session()
+        try:
+            result = asyncio.run(SchedulerService(session, user_id=user_id).run_tick(
+                t212_session=replay.session(), on_stage=counter.start, use_yfinance=False
+            ))
+        finally:
+            counter.start(None)
+            session.close()
+        results.append((tick, result, dict(counter.counts), len(replay.requests) - requests_before))
+
+    engine.dispose()
+    return seeded, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--holdings', default='10,100,1000', help='comma separated holding counts')
+    parser.add_argument('--snapshots', default='10000,100000', help='comma separated snapshot counts (e.g. add 1000000)')
+    parser.add_argument('--db', action='append', help='sqlite (default), sqlite-memory or a database URL; repeatable')
+    parser.add_argument('--ticks', type=int, default=2)
+    parser.add_argument('--latency', default='0', help='provider latency in seconds, or MIN,MAX for a seeded range')
+    parser.add_argument('--throttle', type=float, default=0.0, help='chance of a 429 per provider request')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-v', '--verbose', action='store_true', help='show app logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+    # The T212 sync appends to debug_log.txt in the working directory: keep that out of the repo
+    os.chdir(tempfile.mkdtemp(prefix='bench_tick_'))
+    databases = args.db or ['sqlite']
+    if os.getenv('BENCH_DATABASE_URL'):
+        databases.append(os.environ['BENCH_DATABASE_URL'])
+
+    header = f"{'db':<14}{'holdings':>9}{'snapshots':>10}{'seed s':>8}{'tick':>5}"
+    header += ''.join(f"{stage + ' s':>11}{'q':>6}" for stage in STAGES)
+    header += f"{'total s':>9}{'http':>6}{'updated':>8}"
+    print(header)
+    for db in databases:
+        label = db if db.startswith('sqlite') else db.split('://', 1)[0]
+        for holdings in [int(x) for x in args.holdings.split(',')]:
+            for snapshots in [int(x) for x in args.snapshots.split(',')]:
+                seeded, results = run(db, holdings, snapshots, args)
+                for tick, result, queries, http_requests in results:
+                    stages = result['stages']
+                    line = f"{label:<14}{holdings:>9}{snapshots:>10}{seeded:>8.1f}{tick:>5}"
+                    line += ''.join(f"{stages.get(stage, 0):>11.3f}{queries.get(stage, 0):>6}" for stage in STAGES)
+                    line += f"{sum(stages.values()):>9.3f}{http_requests:>6}{result['prices']['updated_count']:>8}"
+                    print(line, flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,12 @@
-from sqlalchemy import create_engine, text
-from app.models import HistoricalNetWorth, User
+from app.models import NetWorthSnapshot, User
 from app.database import SessionLocal
 from datetime import datetime, timedelta
 import random
-import os
 from dotenv import load_dotenv
 import math
 
+# For larger / multi-user data sets see: python -m app.utils.synthetic_data --help
+
 load_dotenv()
 
 db = SessionLocal()
@@ -20,33 +20,31 @@ def seed_intraday_data():
 
     # Get current total from networth service logic (approximation)
     # Or just use a base value since we are mocking
-    base_net_worth = 121000.0 
-    
+    base_net_worth = 121000.0
+
     # Generate data for last 24 hours, every 15 mins
     start_time = datetime.utcnow() - timedelta(hours=24)
     entries = []
-    
+
     current_time = start_time
     while current_time <= datetime.utcnow():
-        # Add some random walk
-        import random
         # Create a realistic looking curve: sine wave + random noise
         # 24h sine wave
         time_seed = current_time.hour + (current_time.minute / 60.0)
         daily_pattern = math.sin((time_seed / 24.0) * 2 * math.pi) * 500
         noise = random.uniform(-200, 200)
-        
+
         value = base_net_worth + daily_pattern + noise
-        
-        entry = HistoricalNetWorth(
+
+        entries.append(NetWorthSnapshot(
             user_id=user.id,
             timestamp=current_time,
-            net_worth=value,
-            platform_breakdown={"MockPlatform": value} # Simplified breakdown
-        )
-        db.add(entry)
+            total_amount=value,
+            assets_breakdown={"MockPlatform": value} # Simplified breakdown
+        ))
         current_time += timedelta(minutes=15)
-        
+
+    db.add_all(entries)
     db.commit()
     print(f"Added {len(entries)} mock entries.")
 